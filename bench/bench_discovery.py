@@ -0,0 +1,60 @@
+import argparse, gc, os, sys, tempfile, time, tracemalloc
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "src"))
+
+from corpus import CorpusOptions, write_site
+from generator import BuildOptions, generate_pages_recursive, iter_pages
+from siteindex import SiteIndex
+from template import TemplateIndex
+
+# Builds sites of growing size out of tiny pages and reports peak traced
+# memory per page for discovery alone and for a full build. Discovery and
+# rendering stream, so what is left per page is its site index and manifest
+# entry: bytes/page should stay flat as the page count grows.
+def parse_args():
+    parser = argparse.ArgumentParser(description="Measure discovery and build memory per page on large sites")
+    parser.add_argument("--pages", type=int, action="append", help="site sizes to measure (default: 1000, 10000, 100000)")
+    parser.add_argument("--skip-build", action="store_true", help="only measure discovery")
+    return parser.parse_args()
+
+def measure(run):
+    gc.collect()
+    tracemalloc.start()
+    started = time.perf_counter()
+    result = run()
+    elapsed = time.perf_counter() - started
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    return result, peak, elapsed
+
+def discover(content_dir, template_path, dest_dir):
+    templates = TemplateIndex(template_path, content_dir)
+    site_index = SiteIndex(None, content_dir)
+    return sum(1 for _ in iter_pages(content_dir, templates, dest_dir, "/", site_index))
+
+def build(root, content_dir, template_path, dest_dir):
+    manifest_path = os.path.join(root, ".cache", "manifest.json")
+    index_path = os.path.join(root, ".cache", "site-index.json")
+    return generate_pages_recursive(content_dir, template_path, dest_dir, "/", build=BuildOptions(manifest_path, index_path))
+
+def main():
+    args = parse_args()
+    sizes = args.pages or [1_000, 10_000, 100_000]
+    print(f"{'pages':>8} {'stage':<10} {'peak MB':>9} {'bytes/page':>11} {'seconds':>8}")
+    for pages in sizes:
+        with tempfile.TemporaryDirectory() as root:
+            content_dir, template_path = write_site(root, CorpusOptions(pages=pages, paragraphs=1, depth=2))
+            dest_dir = os.path.join(root, "docs")
+
+            count, peak, elapsed = measure(lambda: discover(content_dir, template_path, dest_dir))
+            assert count == pages
+            print(f"{pages:>8} {'discover':<10} {peak / 1e6:>9.1f} {peak / pages:>11.0f} {elapsed:>8.2f}")
+            if args.skip_build:
+                continue
+
+            failures, peak, elapsed = measure(lambda: build(root, content_dir, template_path, dest_dir))
+            assert not failures
+            print(f"{pages:>8} {'build':<10} {peak / 1e6:>9.1f} {peak / pages:>11.0f} {elapsed:>8.2f}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,45 @@
+import os, random, sys, time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "src"))
+
+from md_to_text import tokenize_inline, text_to_textnodes_multipass
+
+def make_paragraph(rng, spans):
+    pieces = []
+    for i in range(spans):
+        kind = rng.randrange(6)
+        if kind == 0:
+            pieces.append(f"**bold {i}**")
+        elif kind == 1:
+            pieces.append(f"_italic {i}_")
+        elif kind == 2:
+            pieces.append(f"`code {i}`")
+        elif kind == 3:
+            pieces.append(f"![image {i}](/images/{i}.png)")
+        elif kind == 4:
+            pieces.append(f"[link {i}](https://example.com/{i})")
+        else:
+            pieces.append(f"plain words number {i}")
+    return " and ".join(pieces)
+
+def throughput(fn, text, min_seconds=0.5):
+    runs = 0
+    start = time.perf_counter()
+    elapsed = 0.0
+    while elapsed < min_seconds:
+        fn(text)
+        runs += 1
+        elapsed = time.perf_counter() - start
+    return len(text.encode("utf-8")) * runs / elapsed / 1e6
+
+def main():
+    rng = random.Random(42)
+    print(f"{'spans':>6} {'bytes':>9} {'multipass MB/s':>15} {'single-pass MB/s':>17} {'speedup':>8}")
+    for spans in (10, 100, 1000, 5000):
+        text = make_paragraph(rng, spans)
+        old = throughput(text_to_textnodes_multipass, text)
+        new = throughput(tokenize_inline, text)
+        print(f"{spans:>6} {len(text):>9} {old:>15.2f} {new:>17.2f} {new / old:>7.1f}x")
+
+if __name__ == "__main__":
+    main()
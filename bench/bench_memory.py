@@ -0,0 +1,73 @@
+import gc, os, sys, tracemalloc
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "src"))
+
+from htmlnode import HTMLNode
+from md_to_html import markdown_to_html_node
+from textnode import TextNode, TextType, text_node_to_html_node
+
+# The nodes as they were before __slots__, for the "before" figures: the same
+# attributes in a per-instance __dict__, and a fresh children list and props
+# dict for every HTML node.
+class DictTextNode:
+    def __init__(self, text, text_type, url=None):
+        self.text = text
+        self.text_type = text_type
+        self.url = url
+
+class DictHTMLNode:
+    def __init__(self, tag=None, value=None, children=None, props=None):
+        self.tag = tag
+        self.value = value
+        self.children = children if children is not None else []
+        self.props = props if props is not None else {}
+
+# Copies a tree into nodes made by `make`, sharing the text values, so both
+# node styles are measured over the same structure.
+def copy_tree(node, make):
+    children = [copy_tree(child, make) for child in node.children] if node.children else None
+    return make(node.tag, node.value, children, dict(node.props) if node.props else None)
+
+def measure(build):
+    gc.collect()
+    tracemalloc.start()
+    before = tracemalloc.get_traced_memory()[0]
+    result = build()
+    after = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    return result, after - before
+
+def count_nodes(node):
+    count = 1
+    for child in node.children:
+        count += count_nodes(child)
+    return count
+
+def make_markdown(paragraphs):
+    parts = ["# Memory benchmark"]
+    for i in range(paragraphs):
+        parts.append(f"Paragraph {i} with **bold**, _italic_, `code` and a [link](/page/{i}) plus ![img](/images/{i}.png)")
+        parts.append(f"- item {i}\n- another **item**\n- last item")
+    return "\n\n".join(parts)
+
+def main():
+    count = 100_000
+    nodes, size = measure(lambda: [TextNode("text", TextType.TEXT) for _ in range(count)])
+    nodes, dict_size = measure(lambda: [DictTextNode("text", TextType.TEXT) for _ in range(count)])
+    print(f"TextNode:          {size / count:7.1f} bytes/node ({dict_size / count:.1f} with __dict__)")
+
+    text_nodes = [TextNode("text", TextType.BOLD) for _ in range(count)]
+    nodes, size = measure(lambda: [text_node_to_html_node(node) for node in text_nodes])
+    nodes, dict_size = measure(lambda: [DictHTMLNode("b", node.text) for node in text_nodes])
+    print(f"LeafNode:          {size / count:7.1f} bytes/node ({dict_size / count:.1f} with __dict__)")
+
+    markdown = make_markdown(5_000)
+    tree, size = measure(lambda: markdown_to_html_node(markdown))
+    total = count_nodes(tree)
+    print(f"Page tree:         {size / total:7.1f} bytes/node ({total} nodes, {size / 1e6:.1f} MB)")
+    copied, size = measure(lambda: copy_tree(tree, HTMLNode))
+    copied, dict_size = measure(lambda: copy_tree(tree, DictHTMLNode))
+    print(f"Page tree nodes:   {size / total:7.1f} bytes/node ({dict_size / total:.1f} with __dict__, text excluded)")
+
+if __name__ == "__main__":
+    main()
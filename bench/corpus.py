@@ -0,0 +1,97 @@
+import os, random
+
+WORDS = (
+    "the ring of power was forged in the fires of mount doom by sauron "
+    "while elves dwarves and men each received rings of their own and "
+    "hobbits lived quietly in the shire far from the shadow of mordor"
+).split()
+
+TEMPLATE = """<!doctype html>
+<html>
+  <head>
+    <title>{{ Title }}</title>
+    <link href="/index.css" rel="stylesheet" />
+  </head>
+  <body>
+    <article>{{ Content }}</article>
+  </body>
+</html>
+"""
+
+# The link, image and emphasis densities are the share of words written as
+# links, images and inline markup; the list and code densities are the share
+# of blocks written as lists and code blocks.
+class CorpusOptions:
+    def __init__(self, pages=200, paragraphs=20, depth=2, link_density=0.075, image_density=0.0125, list_density=0.2, code_density=0.1, emphasis_density=0.2625, seed=1954):
+        self.pages = pages
+        self.paragraphs = paragraphs
+        self.depth = depth
+        self.link_density = link_density
+        self.image_density = image_density
+        self.list_density = list_density
+        self.code_density = code_density
+        self.emphasis_density = emphasis_density
+        self.seed = seed
+
+    def as_dict(self):
+        return dict(vars(self))
+
+def _sentence(rng, options):
+    words = []
+    for _ in range(rng.randint(8, 20)):
+        word = rng.choice(WORDS)
+        roll = rng.random()
+        if roll < options.link_density:
+            word = f"[{word}](/pages/{rng.randint(0, options.pages)})"
+        elif roll < options.link_density + options.image_density:
+            word = f"![{word}](/images/{word}.png)"
+        elif roll < options.link_density + options.image_density + options.emphasis_density:
+            word = rng.choice([f"**{word}**", f"_{word}_", f"`{word}`"])
+        words.append(word)
+    return " ".join(words).capitalize() + "."
+
+def make_page(rng, options, title):
+    blocks = [f"# {title}"]
+    for i in range(options.paragraphs):
+        roll = rng.random()
+        if roll < options.code_density:
+            lines = [f"line_{n} = {rng.choice(WORDS)}" for n in range(rng.randint(2, 8))]
+            blocks.append("```\n" + "\n".join(lines) + "\n```")
+        elif roll < options.code_density + options.list_density:
+            if rng.random() < 0.5:
+                blocks.append("\n".join(f"- {_sentence(rng, options)}" for _ in range(rng.randint(2, 6))))
+            else:
+                blocks.append("\n".join(f"{n}. {_sentence(rng, options)}" for n in range(1, rng.randint(3, 7))))
+        elif roll < options.code_density + options.list_density + 0.05:
+            blocks.append(f"## Section {i}")
+        elif roll < options.code_density + options.list_density + 0.1:
+            blocks.append(f"> {_sentence(rng, options)}\n> {_sentence(rng, options)}")
+        else:
+            blocks.append("\n".join(_sentence(rng, options) for _ in range(rng.randint(2, 5))))
+    return "\n\n".join(blocks) + "\n"
+
+def iter_pages(options):
+    rng = random.Random(options.seed)
+    for i in range(options.pages):
+        parts = []
+        n = i
+        for _ in range(rng.randint(0, options.depth)):
+            parts.append(f"section{n % 7}")
+            n //= 7
+        parts.append(f"page{i}")
+        yield os.path.join(*parts), make_page(rng, options, f"Page {i}")
+
+# Writes a deterministic content tree plus template.html under root and returns
+# (content_dir, template_path).
+def write_site(root, options):
+    content_dir = os.path.join(root, "content")
+    for rel_dir, markdown in iter_pages(options):
+        page_dir = os.path.join(content_dir, rel_dir)
+        os.makedirs(page_dir, exist_ok=True)
+        with open(os.path.join(page_dir, "index.md"), "w") as f:
+            f.write(markdown)
+
+    template_path = os.path.join(root, "template.html")
+    with open(template_path, "w") as f:
+        f.write(TEMPLATE)
+    return content_dir, template_path
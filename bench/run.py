@@ -0,0 +1,149 @@
+import argparse, contextlib, io, json, os, shutil, sys, tempfile, time, tracemalloc
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "src"))
+
+from corpus import CorpusOptions, iter_pages, write_site
+from generator import generate_page, generate_pages_recursive
+from md_to_html import markdown_to_html_node
+from md_to_text import BlockType, iter_blocks, markdown_to_blocks, text_to_textnodes
+from template import load_template
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="Benchmark every stage of the site generator on a synthetic corpus")
+    parser.add_argument("--pages", type=int, default=200)
+    parser.add_argument("--paragraphs", type=int, default=20, help="blocks per page")
+    parser.add_argument("--depth", type=int, default=2, help="maximum directory depth of generated pages")
+    parser.add_argument("--link-density", type=float, default=0.075, help="share of words that are links")
+    parser.add_argument("--image-density", type=float, default=0.0125, help="share of words that are images")
+    parser.add_argument("--emphasis-density", type=float, default=0.2625, help="share of words in bold, italics or code")
+    parser.add_argument("--list-density", type=float, default=0.2, help="share of blocks that are lists")
+    parser.add_argument("--code-density", type=float, default=0.1, help="share of blocks that are code blocks")
+    parser.add_argument("--seed", type=int, default=1954)
+    parser.add_argument("--repeat", type=int, default=3, help="runs per benchmark; the fastest is reported")
+    parser.add_argument("--only", action="append", help="run only the named benchmark (repeatable)")
+    parser.add_argument("--save", metavar="PATH", help="write results as a JSON baseline")
+    parser.add_argument("--compare", metavar="PATH", help="compare against a saved baseline")
+    parser.add_argument("--threshold", type=float, default=0.15, help="slowdown ratio flagged as a regression")
+    return parser.parse_args()
+
+class Benchmark:
+    def __init__(self, name, run, pages, setup=None):
+        self.name = name
+        self.run = run
+        self.pages = pages
+        self.setup = setup
+
+def build_benchmarks(options, root):
+    pages = list(iter_pages(options))
+    markdowns = [markdown for _, markdown in pages]
+    paragraphs = [
+        block.text.replace("\n", " ")
+        for markdown in markdowns
+        for block in iter_blocks(markdown)
+        if block.block_type == BlockType.PARAGRAPH
+    ]
+    trees = [markdown_to_html_node(markdown) for markdown in markdowns]
+    content_dir, template_path = write_site(root, options)
+    template = load_template(template_path)
+    sources = [os.path.join(content_dir, rel_dir, "index.md") for rel_dir, _ in pages]
+    page_dest = os.path.join(root, "page-out")
+    site_dest = os.path.join(root, "site-out")
+
+    def run_generate_page():
+        for source in sources:
+            generate_page(source, template, page_dest, "/")
+
+    def reset_site():
+        shutil.rmtree(site_dest, ignore_errors=True)
+        os.makedirs(site_dest)
+
+    def run_site_build():
+        generate_pages_recursive(content_dir, template_path, site_dest, "/")
+
+    os.makedirs(page_dest, exist_ok=True)
+    count = len(pages)
+    return [
+        Benchmark("markdown_to_blocks", lambda: [markdown_to_blocks(markdown) for markdown in markdowns], count),
+        Benchmark("text_to_textnodes", lambda: [text_to_textnodes(text) for text in paragraphs], count),
+        Benchmark("markdown_to_html_node", lambda: [markdown_to_html_node(markdown) for markdown in markdowns], count),
+        Benchmark("to_html", lambda: [tree.to_html() for tree in trees], count),
+        Benchmark("generate_page", run_generate_page, count),
+        Benchmark("generate_pages_recursive", run_site_build, count, reset_site),
+    ]
+
+def measure(benchmark, repeat):
+    best = None
+    for _ in range(repeat):
+        if benchmark.setup:
+            benchmark.setup()
+        with contextlib.redirect_stdout(io.StringIO()):
+            started = time.perf_counter()
+            benchmark.run()
+            elapsed = time.perf_counter() - started
+        best = elapsed if best is None else min(best, elapsed)
+
+    if benchmark.setup:
+        benchmark.setup()
+    tracemalloc.start()
+    with contextlib.redirect_stdout(io.StringIO()):
+        benchmark.run()
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+
+    return {
+        "seconds": best,
+        "pages_per_second": benchmark.pages / best if best else None,
+        "peak_bytes": peak,
+    }
+
+def compare(results, baseline, threshold):
+    regressions = []
+    for name, result in results.items():
+        previous = baseline.get("results", {}).get(name)
+        if previous is None:
+            continue
+        ratio = result["seconds"] / previous["seconds"]
+        result["baseline_ratio"] = ratio
+        if ratio > 1 + threshold:
+            regressions.append((name, ratio))
+    return regressions
+
+def print_results(results):
+    print(f"{'benchmark':<26} {'time (ms)':>10} {'pages/s':>10} {'peak MB':>9} {'vs base':>8}")
+    for name, result in results.items():
+        ratio = result.get("baseline_ratio")
+        ratio_text = f"{ratio:.2f}x" if ratio is not None else "-"
+        print(f"{name:<26} {result['seconds'] * 1000:>10.1f} {result['pages_per_second']:>10.0f} {result['peak_bytes'] / 1e6:>9.1f} {ratio_text:>8}")
+
+def main():
+    args = parse_args()
+    options = CorpusOptions(args.pages, args.paragraphs, args.depth, args.link_density, args.image_density, args.list_density, args.code_density, args.emphasis_density, args.seed)
+
+    results = {}
+    with tempfile.TemporaryDirectory() as root:
+        for benchmark in build_benchmarks(options, root):
+            if args.only and benchmark.name not in args.only:
+                continue
+            results[benchmark.name] = measure(benchmark, args.repeat)
+
+    regressions = []
+    if args.compare:
+        with open(args.compare, "r") as f:
+            baseline = json.load(f)
+        if baseline.get("corpus") != options.as_dict():
+            print("Warning: baseline was recorded with different corpus options")
+        regressions = compare(results, baseline, args.threshold)
+
+    print_results(results)
+
+    if args.save:
+        with open(args.save, "w") as f:
+            json.dump({"corpus": options.as_dict(), "results": results}, f, indent=2, sort_keys=True)
+
+    for name, ratio in regressions:
+        print(f"REGRESSION: {name} is {ratio:.2f}x slower than baseline (threshold {1 + args.threshold:.2f}x)")
+    if regressions:
+        sys.exit(1)
+
+if __name__ == "__main__":
+    main()
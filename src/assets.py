@@ -0,0 +1,131 @@
+import hashlib, logging, os, posixpath, re, shutil
+from manifest import hash_file
+from output import write_if_changed
+from state import load_state, remove_output, save_state
+from sync import walk_files
+from transforms import split_url
+
+logger = logging.getLogger(__name__)
+
+STATE_VERSION = 1
+FINGERPRINT_LENGTH = 10
+FINGERPRINT_EXTENSIONS = (".css", ".js", ".png", ".jpg", ".jpeg", ".gif", ".webp", ".svg", ".ico", ".woff", ".woff2")
+HEADERS_FILENAME = "_headers"
+IMMUTABLE = "public, max-age=31536000, immutable"
+
+# url(...) in stylesheets, with or without quotes
+css_url_pattern = re.compile(r"""url\(\s*(['"]?)([^'")\s]+)\1\s*\)""")
+
+# "images/tom.png" -> "images/tom.3f9a1c2b7d.png"
+def fingerprinted_name(rel_path, digest):
+    root, extension = posixpath.splitext(rel_path)
+    return f"{root}.{digest[:FINGERPRINT_LENGTH]}{extension}"
+
+# Writes a content-addressed copy of every asset in src_dir next to the plain
+# copy that sync_files keeps, and returns the site paths mapped to their
+# fingerprinted paths, e.g. "/index.css" -> "/index.3f9a1c2b7d.css". The state
+# file keeps each source's stat and hash, so unchanged assets are not hashed
+# again, and lists the outputs written, so superseded copies are removed.
+# `bundles` maps a bundle's site path to the stylesheets concatenated into it;
+# each member then maps to the bundle.
+def fingerprint_assets(src_dir, dest_dir, state_path, basepath="/", bundles=None, headers=False):
+    src_dir = os.path.abspath(src_dir)
+    dest_dir = os.path.abspath(dest_dir)
+    bundles = bundles or {}
+    state = load_state(state_path, {"version": STATE_VERSION})
+    previous = {"hashes": state.get("hashes", {}), "outputs": state.get("outputs", [])}
+    hashes = {}
+    assets = {}
+    stylesheets = []
+    for rel_path, path in walk_files(src_dir):
+        rel_path = rel_path.replace(os.sep, "/")
+        if not rel_path.endswith(FINGERPRINT_EXTENSIONS):
+            continue
+        if rel_path.endswith(".css"):
+            stylesheets.append(rel_path)
+            continue
+        stat = os.stat(path)
+        entry = previous["hashes"].get(rel_path)
+        if entry is None or entry["size"] != stat.st_size or entry["mtime_ns"] != stat.st_mtime_ns:
+            entry = {"size": stat.st_size, "mtime_ns": stat.st_mtime_ns, "hash": hash_file(path)}
+        hashes[rel_path] = entry
+        output = fingerprinted_name(rel_path, entry["hash"])
+        _copy(path, os.path.join(dest_dir, output))
+        assets["/" + rel_path] = "/" + output
+
+    # Stylesheets come last so their url() references already point at the
+    # fingerprinted copies; a stylesheet's own fingerprint then changes with
+    # the files it uses. They are small, so they are read on every build.
+    members = {member for paths in bundles.values() for member in paths}
+    missing = sorted(set(members) - {"/" + rel_path for rel_path in stylesheets})
+    if missing:
+        raise ValueError(f"Bundled stylesheets not found in {src_dir}: {', '.join(missing)}")
+    bundled = {}
+    for rel_path in stylesheets:
+        with open(os.path.join(src_dir, rel_path), "r", encoding="utf-8") as f:
+            text = rewrite_css(f.read(), rel_path, assets, basepath)
+        if "/" + rel_path in members:
+            bundled["/" + rel_path] = text
+            continue
+        assets["/" + rel_path] = "/" + _write_fingerprinted(dest_dir, rel_path, text)
+    for bundle, paths in sorted(bundles.items()):
+        output = "/" + _write_fingerprinted(dest_dir, bundle.lstrip("/"), "\n".join(bundled[path] for path in paths))
+        for path in paths:
+            assets[path] = output
+
+    outputs = sorted(output.lstrip("/") for output in set(assets.values()))
+    if headers:
+        write_if_changed(os.path.join(dest_dir, HEADERS_FILENAME), headers_file(assets).encode("utf-8"))
+        outputs.append(HEADERS_FILENAME)
+    for output in set(previous["outputs"]) - set(outputs):
+        remove_output(os.path.join(dest_dir, output))
+
+    save_state(state_path, {"version": STATE_VERSION}, hashes=hashes, outputs=outputs)
+    logger.info("Fingerprinted %d asset(s)", len(assets))
+    return assets
+
+# Points url() references that resolve to a fingerprinted asset at its copy.
+# Relative references are resolved against the stylesheet and written as
+# root-relative URLs, so they still resolve from a bundle elsewhere.
+def rewrite_css(text, rel_path, assets, basepath="/"):
+    directory = "/" + posixpath.dirname(rel_path)
+
+    def rewrite(match):
+        url = match.group(2)
+        if url.startswith(("data:", "#", "//")) or "://" in url:
+            return match.group(0)
+        path, suffix = split_url(url)
+        if not path.startswith("/"):
+            path = posixpath.normpath(posixpath.join(directory, path))
+        output = assets.get(path)
+        if output is None:
+            return match.group(0)
+        return f"url({match.group(1)}{basepath}{output[1:]}{suffix}{match.group(1)})"
+
+    return css_url_pattern.sub(rewrite, text)
+
+# The _headers format read by Netlify and Cloudflare Pages.
+def headers_file(assets):
+    lines = []
+    for output in sorted(set(assets.values())):
+        lines.append(output)
+        lines.append(f"  Cache-Control: {IMMUTABLE}")
+    return "\n".join(lines) + "\n"
+
+# A fingerprinted name only ever holds the same bytes, so an existing copy is
+# left alone.
+def _copy(src_path, dest_path):
+    if os.path.exists(dest_path):
+        return
+    os.makedirs(os.path.dirname(dest_path), exist_ok=True)
+    tmp_path = f"{dest_path}.{os.getpid()}.tmp"
+    shutil.copy2(src_path, tmp_path)
+    os.replace(tmp_path, dest_path)
+
+def _write_fingerprinted(dest_dir, rel_path, text):
+    data = text.encode("utf-8")
+    output = fingerprinted_name(rel_path, hashlib.sha256(data).hexdigest())
+    path = os.path.join(dest_dir, output)
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    write_if_changed(path, data)
+    return output
@@ -0,0 +1,172 @@
+import hashlib, os, pickle, threading
+from collections import OrderedDict
+
+def cache_key(*parts):
+    digest = hashlib.sha256()
+    for part in parts:
+        if isinstance(part, str):
+            part = part.encode("utf-8")
+        digest.update(len(part).to_bytes(8, "little"))
+        digest.update(part)
+    return digest.hexdigest()
+
+# A directory of files named by key, bounded to roughly max_bytes with
+# least-recently-used eviction (reads bump the file's mtime). Entries are
+# written to a temporary file and renamed into place, so processes sharing the
+# directory only ever see complete entries; an entry vanishing underneath a
+# reader or an evictor is treated as a miss.
+class DiskCache:
+    def __init__(self, directory, max_bytes=256 * 1024 * 1024):
+        self.directory = os.path.abspath(directory)
+        self.max_bytes = max_bytes
+        self._size = None
+        self._written = 0
+        self._lock = threading.Lock()
+
+    def __getstate__(self):
+        return {"directory": self.directory, "max_bytes": self.max_bytes}
+
+    def __setstate__(self, state):
+        self.__init__(state["directory"], state["max_bytes"])
+
+    def _path(self, key):
+        return os.path.join(self.directory, key[:2], key)
+
+    def get(self, key):
+        path = self._path(key)
+        try:
+            with open(path, "rb") as f:
+                data = f.read()
+            os.utime(path)
+        except FileNotFoundError:
+            return None
+        return data
+
+    def set(self, key, data):
+        path = self._path(key)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        tmp_path = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+        with open(tmp_path, "wb") as f:
+            f.write(data)
+        os.replace(tmp_path, path)
+
+        # Other processes write to the same directory, so the running size is
+        # re-read from disk whenever a tenth of the bound has been written here.
+        with self._lock:
+            self._written += len(data)
+            if self._size is None or self._written > self.max_bytes // 10:
+                self._size = self.total_size()
+                self._written = 0
+            else:
+                self._size += len(data)
+            if self._size > self.max_bytes:
+                self._size = self.evict()
+
+    def get_object(self, key):
+        data = self.get(key)
+        if data is None:
+            return None
+        try:
+            return pickle.loads(data)
+        except Exception:
+            self.delete(key)
+            return None
+
+    def set_object(self, key, value):
+        self.set(key, pickle.dumps(value, protocol=pickle.HIGHEST_PROTOCOL))
+
+    def delete(self, key):
+        try:
+            os.remove(self._path(key))
+        except FileNotFoundError:
+            pass
+
+    def _entries(self):
+        entries = []
+        try:
+            shards = os.scandir(self.directory)
+        except FileNotFoundError:
+            return entries
+        with shards:
+            for shard in shards:
+                if not shard.is_dir():
+                    continue
+                with os.scandir(shard.path) as files:
+                    for entry in files:
+                        if entry.name.endswith(".tmp"):
+                            continue
+                        try:
+                            stat = entry.stat()
+                        except FileNotFoundError:
+                            continue
+                        entries.append((stat.st_mtime_ns, stat.st_size, entry.path))
+        return entries
+
+    def total_size(self):
+        return sum(size for _, size, _ in self._entries())
+
+    # Drops the least recently used entries until the cache is at 90% of its
+    # bound, leaving headroom so eviction does not run on every write.
+    def evict(self):
+        entries = sorted(self._entries())
+        size = sum(size for _, size, _ in entries)
+        target = self.max_bytes * 0.9
+        for _, entry_size, path in entries:
+            if size <= target:
+                break
+            try:
+                os.remove(path)
+            except FileNotFoundError:
+                pass
+            size -= entry_size
+        return size
+
+# The caches unpickled in this process, by size bound and backing directory.
+_process_caches = {}
+
+def _process_cache(max_entries, backing):
+    key = (max_entries, getattr(backing, "directory", None))
+    cache = _process_caches.get(key)
+    if cache is None:
+        cache = _process_caches[key] = LRUCache(max_entries, backing)
+    return cache
+
+# An in-memory LRU of objects bounded to max_entries, optionally in front of a
+# DiskCache: misses fall through to the disk and whatever is set is written
+# to both. Jobs carry the cache to worker processes, where every copy that is
+# unpickled resolves to one instance per process, so each worker keeps its
+# memory for the whole build over the shared disk.
+class LRUCache:
+    def __init__(self, max_entries=4096, backing=None):
+        self.max_entries = max_entries
+        self.backing = backing
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def __reduce__(self):
+        return _process_cache, (self.max_entries, self.backing)
+
+    def get_object(self, key):
+        with self._lock:
+            value = self._entries.get(key)
+            if value is not None:
+                self._entries.move_to_end(key)
+                return value
+        if self.backing is None:
+            return None
+        value = self.backing.get_object(key)
+        if value is not None:
+            self._remember(key, value)
+        return value
+
+    def set_object(self, key, value):
+        self._remember(key, value)
+        if self.backing is not None:
+            self.backing.set_object(key, value)
+
+    def _remember(self, key, value):
+        with self._lock:
+            self._entries[key] = value
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
@@ -0,0 +1,66 @@
+import json, os
+from manifest import hash_file
+from state import load_state, save_state
+from sync import walk_files
+
+STATE_VERSION = 1
+
+class Changeset:
+    def __init__(self):
+        self.added = {}
+        self.changed = {}
+        self.removed = []
+
+    def __bool__(self):
+        return bool(self.added or self.changed or self.removed)
+
+    def to_dict(self):
+        return {"added": self.added, "changed": self.changed, "removed": self.removed}
+
+    def write(self, path):
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        with open(path, "w") as f:
+            json.dump(self.to_dict(), f, indent=2, sort_keys=True)
+
+    def __repr__(self):
+        return f"Changeset(added={len(self.added)}, changed={len(self.changed)}, removed={len(self.removed)})"
+
+# The state of the output directory as last deployed: path -> size, mtime and
+# content hash. Outputs are only rewritten when their bytes change, so a file
+# whose size and mtime still match the state keeps its recorded hash and is
+# never read; only files written by this build are hashed.
+class OutputState:
+    def __init__(self, dest_dir, state_path):
+        self.dest_dir = os.path.abspath(dest_dir)
+        self.state_path = state_path
+        self.files = self._load()
+
+    def _load(self):
+        return load_state(self.state_path, {"version": STATE_VERSION}).get("files", {})
+
+    # Compares the output directory with the recorded state, records the new
+    # state and returns what a deploy has to upload and delete.
+    def update(self):
+        changeset = Changeset()
+        current = {}
+        for rel_path, path in walk_files(self.dest_dir):
+            if path.endswith(".tmp"):
+                continue
+            rel_path = rel_path.replace(os.sep, "/")
+            stat = os.stat(path)
+            entry = self.files.get(rel_path)
+            if entry is not None and entry["size"] == stat.st_size and entry["mtime_ns"] == stat.st_mtime_ns:
+                current[rel_path] = entry
+                continue
+            digest = hash_file(path)
+            current[rel_path] = {"size": stat.st_size, "mtime_ns": stat.st_mtime_ns, "hash": digest}
+            if entry is None:
+                changeset.added[rel_path] = digest
+            elif entry["hash"] != digest:
+                changeset.changed[rel_path] = digest
+        changeset.removed = sorted(rel_path for rel_path in self.files if rel_path not in current)
+        self.files = current
+        return changeset
+
+    def save(self):
+        save_state(self.state_path, {"version": STATE_VERSION}, files=self.files)
@@ -0,0 +1,78 @@
+import gzip, hashlib, json, logging, os
+from executor import run_jobs
+from manifest import hash_file
+from output import write_if_changed
+from state import load_state, remove_output, save_state
+from sync import walk_files
+
+logger = logging.getLogger(__name__)
+
+STATE_VERSION = 1
+COMPRESSIBLE_EXTENSIONS = (".html", ".css", ".js", ".xml")
+GZIP_SUFFIX = ".gz"
+
+# Writes a .gz sibling next to every compressible output of at least min_size
+# bytes, for servers that send precompressed files. The state file maps each
+# output to its size, mtime and hash, so an output whose stat is unchanged is
+# neither read nor hashed again, and one whose hash is unchanged is not
+# recompressed. Compression runs on a thread pool; zlib releases the GIL.
+def compress_outputs(dest_dir, state_path, workers=None, min_size=1024, etags_path=None):
+    dest_dir = os.path.abspath(dest_dir)
+    previous = load_state(state_path, {"version": STATE_VERSION}).get("files", {})
+    current = {}
+    jobs = []
+    for rel_path, path in walk_files(dest_dir):
+        if path.endswith(GZIP_SUFFIX) or path.endswith(".tmp"):
+            continue
+        rel_path = rel_path.replace(os.sep, "/")
+        stat = os.stat(path)
+        entry = dict(previous.get(rel_path) or {})
+        if not entry or entry["size"] != stat.st_size or entry["mtime_ns"] != stat.st_mtime_ns:
+            digest = hash_file(path)
+            if entry.get("hash") != digest:
+                entry = {"hash": digest}
+            entry = dict(entry, size=stat.st_size, mtime_ns=stat.st_mtime_ns)
+
+        if not should_compress(rel_path, stat.st_size, min_size):
+            entry.pop("gzip_hash", None)
+        elif "gzip_hash" not in entry or not os.path.isfile(path + GZIP_SUFFIX):
+            jobs.append((path, rel_path))
+        current[rel_path] = entry
+
+    for rel_path, entry in previous.items():
+        if "gzip_hash" in entry and "gzip_hash" not in current.get(rel_path, {}):
+            remove_output(os.path.join(dest_dir, rel_path + GZIP_SUFFIX))
+
+    for rel_path, gzip_hash in run_jobs(compress_file, jobs, "thread", workers):
+        current[rel_path]["gzip_hash"] = gzip_hash
+    if jobs:
+        logger.info("Compressed %d file(s)", len(jobs))
+
+    save_state(state_path, {"version": STATE_VERSION}, files=current)
+    if etags_path is not None:
+        write_etags(etags_path, current)
+    return current
+
+def should_compress(rel_path, size, min_size):
+    return size >= min_size and rel_path.endswith(COMPRESSIBLE_EXTENSIONS)
+
+def compress_file(job):
+    path, rel_path = job
+    with open(path, "rb") as f:
+        data = f.read()
+    # mtime=0 keeps the output byte-identical across builds
+    compressed = gzip.compress(data, compresslevel=9, mtime=0)
+    write_if_changed(path + GZIP_SUFFIX, compressed)
+    return rel_path, hashlib.sha256(compressed).hexdigest()
+
+def etag(digest):
+    return f'"{digest[:32]}"'
+
+def write_etags(path, files):
+    etags = {}
+    for rel_path, entry in sorted(files.items()):
+        etags[rel_path] = {"etag": etag(entry["hash"])}
+        if "gzip_hash" in entry:
+            etags[rel_path]["gzip_etag"] = etag(entry["gzip_hash"])
+    os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+    write_if_changed(path, json.dumps(etags, indent=2, sort_keys=True).encode("utf-8"))
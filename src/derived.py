@@ -0,0 +1,199 @@
+import html, logging, os, re, time
+from datetime import datetime
+from typing import NamedTuple
+from xml.sax.saxutils import escape, quoteattr
+
+from htmlnode import LeafNode, ParentNode
+from output import write_if_changed
+from transforms import Fragment, page_transforms
+
+logger = logging.getLogger(__name__)
+
+# A full RFC 3339 date-time, as Atom requires
+rfc3339_pattern = re.compile(r"\d{4}-\d{2}-\d{2}T\d{2}:\d{2}:\d{2}(\.\d+)?(Z|[+-]\d{2}:\d{2})\Z")
+
+FEED_FILENAME = "feed.xml"
+SITEMAP_FILENAME = "sitemap.xml"
+
+class DerivedOptions(NamedTuple):
+    # content directories whose pages get a paginated listing, e.g. "blog"
+    sections: tuple = ("blog",)
+    page_size: int = 10
+    tags: bool = True
+    # absolute URL the site is served from; the feed and sitemap need it
+    site_url: str = None
+    feed_title: str = None
+    # Atom requires an author for the feed; defaults to the feed title
+    feed_author: str = None
+    feed_entries: int = 20
+
+class DerivedPage(NamedTuple):
+    url: str
+    title: str
+    content: ParentNode
+
+# Listings, tag pages, the Atom feed and the sitemap are built from the site
+# index alone: one pass groups the published pages by section and tag, so the
+# cost grows with the number of pages rather than with pages times listings,
+# and no page is read or parsed again.
+def generate_derived_pages(site_index, template, dest_dir, basepath, options, minify=False, assets=None):
+    pages = site_index.published()
+    sections = {section: [] for section in options.sections}
+    tags = {}
+    for key, entry in pages.items():
+        url = entry["url"]
+        for section in sections:
+            prefix = f"/{section}/"
+            if url.startswith(prefix) and url != prefix:
+                sections[section].append(entry)
+        if options.tags:
+            for tag in entry.get("tags", []):
+                tags.setdefault(tag, []).append(entry)
+
+    page_urls = {entry["url"] for entry in pages.values()}
+    derived = []
+    for section, entries in sections.items():
+        if entries:
+            derived.extend(listing_pages(f"/{section}/", section.replace("-", " ").title(), sort_entries(entries), options.page_size))
+    for tag, entries in sorted(tags.items()):
+        derived.extend(listing_pages(f"/tags/{slugify(tag)}/", f"Tagged: {tag}", sort_entries(entries), options.page_size))
+
+    transforms = page_transforms(basepath, assets=assets)
+    template = template.with_basepath(basepath).with_assets(assets)
+    if minify:
+        template = template.minified()
+    outputs = []
+    for page in derived:
+        if page.url in page_urls:
+            logger.warning("Not generating listing %s: a content page has the same URL", page.url)
+            continue
+        output = url_to_output(page.url)
+        write_file(os.path.join(dest_dir, output), template.render({
+            "Title": page.title,
+            "Content": Fragment.from_node(page.content).render(transforms, minify),
+            "Basepath": basepath,
+            "Date": "",
+            "Tags": "",
+        }))
+        outputs.append(output)
+
+    if options.site_url:
+        feed_entries = sort_entries([entry for entries in sections.values() for entry in entries])[:options.feed_entries]
+        write_file(os.path.join(dest_dir, FEED_FILENAME), atom_feed(feed_entries, options, basepath))
+        write_file(os.path.join(dest_dir, SITEMAP_FILENAME), sitemap(list(pages.values()), [page.url for page in derived], options.site_url, basepath))
+        outputs.extend([FEED_FILENAME, SITEMAP_FILENAME])
+    else:
+        logger.debug("No site URL set, skipping %s and %s", FEED_FILENAME, SITEMAP_FILENAME)
+    return outputs
+
+# Newest first; undated pages come last, ordered by title.
+def sort_entries(entries):
+    dated = sorted((entry for entry in entries if entry.get("date")), key=lambda entry: (entry["date"], entry_title(entry)))
+    dated.reverse()
+    undated = sorted((entry for entry in entries if not entry.get("date")), key=entry_title)
+    return dated + undated
+
+def entry_title(entry):
+    return entry.get("title") or entry["url"]
+
+def slugify(text):
+    return re.sub(r"[^a-z0-9]+", "-", text.lower()).strip("-") or "tag"
+
+def page_url(base_url, number):
+    return base_url if number == 1 else f"{base_url}page/{number}/"
+
+def url_to_output(url):
+    return os.path.join(*url.strip("/").split("/"), "index.html") if url != "/" else "index.html"
+
+def listing_pages(base_url, title, entries, page_size):
+    page_count = max(1, -(-len(entries) // page_size))
+    pages = []
+    for number in range(1, page_count + 1):
+        chunk = entries[(number - 1) * page_size:number * page_size]
+        items = [listing_item(entry) for entry in chunk]
+        children = [LeafNode("h1", html.escape(title, quote=False)), ParentNode("ul", items)]
+        links = []
+        if number > 1:
+            links.append(LeafNode("a", "Newer", {"href": page_url(base_url, number - 1), "rel": "prev"}))
+        if number < page_count:
+            links.append(LeafNode("a", "Older", {"href": page_url(base_url, number + 1), "rel": "next"}))
+        if links:
+            children.append(ParentNode("nav", links))
+        page_title = title if number == 1 else f"{title} (page {number})"
+        pages.append(DerivedPage(page_url(base_url, number), page_title, ParentNode("div", children)))
+    return pages
+
+def listing_item(entry):
+    children = [LeafNode("a", html.escape(entry_title(entry), quote=False), {"href": entry["url"]})]
+    if entry.get("date"):
+        children.append(LeafNode(None, " "))
+        children.append(LeafNode("time", html.escape(entry["date"]), {"datetime": html.escape(entry["date"])}))
+    return ParentNode("li", children)
+
+def absolute_url(site_url, basepath, url):
+    return site_url.rstrip("/") + basepath.rstrip("/") + url
+
+# Atom timestamps must be full RFC 3339 date-times. Front matter dates are
+# accepted as YYYY-MM-DD or as a full date-time; pages without a date, or with
+# one in another format, use the source file's mtime recorded in the index.
+def entry_updated(entry):
+    date = entry.get("date")
+    if date:
+        updated = f"{date}T00:00:00Z" if len(date) == 10 else date
+        if valid_timestamp(updated):
+            return updated
+        logger.warning("Ignoring date %r of %s: expected YYYY-MM-DD or an RFC 3339 date-time", date, entry["url"])
+    mtime_ns = entry.get("stat", [0, 0])[1]
+    return time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime(mtime_ns / 1e9))
+
+def valid_timestamp(text):
+    if not rfc3339_pattern.match(text):
+        return False
+    try:
+        datetime.fromisoformat(text.replace("Z", "+00:00"))
+    except ValueError:
+        return False
+    return True
+
+def atom_feed(entries, options, basepath):
+    home = absolute_url(options.site_url, basepath, "/")
+    updated = max((entry_updated(entry) for entry in entries), default="1970-01-01T00:00:00Z")
+    lines = [
+        '<?xml version="1.0" encoding="utf-8"?>',
+        '<feed xmlns="http://www.w3.org/2005/Atom">',
+        f"  <title>{escape(options.feed_title or options.site_url)}</title>",
+        f"  <link href={quoteattr(home)}/>",
+        f'  <link rel="self" href={quoteattr(absolute_url(options.site_url, basepath, "/" + FEED_FILENAME))}/>',
+        f"  <id>{escape(home)}</id>",
+        f"  <updated>{updated}</updated>",
+        f"  <author><name>{escape(options.feed_author or options.feed_title or options.site_url)}</name></author>",
+    ]
+    for entry in entries:
+        url = absolute_url(options.site_url, basepath, entry["url"])
+        lines.extend([
+            "  <entry>",
+            f"    <title>{escape(entry_title(entry))}</title>",
+            f"    <link href={quoteattr(url)}/>",
+            f"    <id>{escape(url)}</id>",
+            f"    <updated>{entry_updated(entry)}</updated>",
+        ])
+        lines.extend(f"    <category term={quoteattr(tag)}/>" for tag in entry.get("tags", []))
+        lines.append("  </entry>")
+    lines.append("</feed>")
+    return "\n".join(lines) + "\n"
+
+def sitemap(entries, derived_urls, site_url, basepath):
+    lines = [
+        '<?xml version="1.0" encoding="utf-8"?>',
+        '<urlset xmlns="http://www.sitemaps.org/schemas/sitemap/0.9">',
+    ]
+    for entry in sorted(entries, key=lambda entry: entry["url"]):
+        lines.append(f"  <url><loc>{escape(absolute_url(site_url, basepath, entry['url']))}</loc><lastmod>{entry_updated(entry)[:10]}</lastmod></url>")
+    for url in sorted(set(derived_urls) - {entry["url"] for entry in entries}):
+        lines.append(f"  <url><loc>{escape(absolute_url(site_url, basepath, url))}</loc></url>")
+    lines.append("</urlset>")
+    return "\n".join(lines) + "\n"
+
+def write_file(path, text):
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    write_if_changed(path, text.encode("utf-8"))
@@ -0,0 +1,34 @@
+import os
+
+# Walks a tree with os.scandir and an explicit stack instead of recursion,
+# yielding (directory, files) one directory at a time in sorted depth-first
+# order. `files` are the DirEntry objects of the directory's regular files
+# with the given suffix; their type and stat come from the directory listing
+# (cached by DirEntry), so no separate isfile/isdir/stat call is made per
+# entry. Only one directory's listing is held at a time, plus the queue of
+# subdirectories still to visit.
+def walk_sorted(root, suffix=""):
+    stack = [root]
+    while stack:
+        directory = stack.pop()
+        try:
+            with os.scandir(directory) as iterator:
+                entries = sorted(iterator, key=lambda entry: entry.name)
+        except (FileNotFoundError, NotADirectoryError):
+            continue
+
+        files = []
+        subdirectories = []
+        for entry in entries:
+            if entry.is_file():
+                if entry.name.endswith(suffix):
+                    files.append(entry)
+            elif entry.is_dir():
+                subdirectories.append(entry.path)
+        yield directory, files
+        stack.extend(reversed(subdirectories))
+
+def first_file(directory, suffix):
+    for _, files in walk_sorted(directory, suffix):
+        return files[0].path if files else None
+    return None
@@ -0,0 +1,77 @@
+import os
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from functools import partial
+
+EXECUTORS = ("serial", "thread", "process")
+
+def default_workers():
+    return os.cpu_count() or 1
+
+def chunk_size(job_count, workers):
+    # A few chunks per worker keeps the pool balanced while amortising the
+    # cost of pickling jobs across the process boundary.
+    return max(1, job_count // (workers * 4))
+
+def run_jobs(fn, jobs, executor="serial", workers=None):
+    if executor not in EXECUTORS:
+        raise ValueError(f"Unsupported executor: {executor}")
+
+    jobs = list(jobs)
+    workers = workers or default_workers()
+    if executor == "serial" or workers == 1 or len(jobs) <= 1:
+        return [fn(job) for job in jobs]
+
+    if executor == "thread":
+        with ThreadPoolExecutor(max_workers=workers) as pool:
+            return list(pool.map(fn, jobs))
+
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        return list(pool.map(fn, jobs, chunksize=chunk_size(len(jobs), workers)))
+
+# Jobs sent to a process pool as one task while streaming, which amortises the
+# pickling round trip without knowing the total job count up front.
+STREAM_CHUNK = 16
+
+def _run_batch(fn, batch):
+    return [fn(job) for job in batch]
+
+def _batches(jobs, size):
+    batch = []
+    for job in jobs:
+        batch.append(job)
+        if len(batch) == size:
+            yield batch
+            batch = []
+    if batch:
+        yield batch
+
+# Like run_jobs, but consumes `jobs` lazily and yields (job, result) pairs in
+# job order as they complete. At most `window` batches are in flight, so
+# neither the jobs nor their results are ever all held in memory.
+def iter_jobs(fn, jobs, executor="serial", workers=None, window=None):
+    if executor not in EXECUTORS:
+        raise ValueError(f"Unsupported executor: {executor}")
+
+    workers = workers or default_workers()
+    if executor == "serial" or workers == 1:
+        for job in jobs:
+            yield job, fn(job)
+        return
+
+    if executor == "thread":
+        pool_class, size = ThreadPoolExecutor, 1
+    else:
+        pool_class, size = ProcessPoolExecutor, STREAM_CHUNK
+    window = window or workers * 4
+    run_batch = partial(_run_batch, fn)
+    with pool_class(max_workers=workers) as pool:
+        pending = deque()
+        for batch in _batches(jobs, size):
+            pending.append((batch, pool.submit(run_batch, batch)))
+            if len(pending) >= window:
+                batch, future = pending.popleft()
+                yield from zip(batch, future.result())
+        while pending:
+            batch, future = pending.popleft()
+            yield from zip(batch, future.result())
@@ -0,0 +1,127 @@
+from itertools import chain, islice
+
+FRONT_MATTER_DELIMITER = "---"
+FRONT_MATTER_END = ("---", "...")
+
+# A header longer than this is not treated as front matter, so a stray "---"
+# on the first line never makes a reader scan the whole file.
+MAX_HEADER_LINES = 100
+
+DEFAULT_METADATA = {
+    "title": None,
+    "date": None,
+    "tags": [],
+    "draft": False,
+    "template": None,
+}
+
+# Keys whose yes/no/true/false values are booleans; elsewhere they are text,
+# so "title: No" is the title "No".
+BOOLEAN_KEYS = ("draft",)
+
+# Front matter is the small YAML subset a page header needs: "key: value"
+# lines, inline lists ("tags: [a, b]"), block lists ("- a" lines under an
+# empty key), quoted strings and booleans for BOOLEAN_KEYS. Everything else is an error.
+def parse_front_matter(lines):
+    metadata = {}
+    key = None
+    for number, line in enumerate(lines, start=2):
+        stripped = line.strip()
+        if not stripped or stripped.startswith("#"):
+            continue
+        if stripped.startswith("- ") and key is not None and isinstance(metadata[key], list):
+            metadata[key].append(_parse_scalar(stripped[2:]))
+            continue
+        name, separator, value = line.partition(":")
+        name = name.strip()
+        if not separator or not name or line[0].isspace():
+            raise ValueError(f"Invalid front matter on line {number}: {stripped}")
+        key = name.lower()
+        value = value.strip()
+        if value == "":
+            metadata[key] = []
+        elif key in BOOLEAN_KEYS:
+            metadata[key] = _parse_bool(value)
+        else:
+            metadata[key] = _parse_value(value)
+    return normalize_metadata(metadata)
+
+def _parse_value(value):
+    if value.startswith("[") and value.endswith("]"):
+        return [_parse_scalar(item) for item in value[1:-1].split(",") if item.strip()]
+    return _parse_scalar(value)
+
+def _parse_scalar(value):
+    value = value.strip()
+    if len(value) >= 2 and value[0] == value[-1] and value[0] in "\"'":
+        return value[1:-1]
+    return value
+
+def _parse_bool(value):
+    lowered = value.strip().lower()
+    if lowered in ("true", "yes"):
+        return True
+    if lowered in ("false", "no"):
+        return False
+    return _parse_scalar(value)
+
+def normalize_metadata(metadata):
+    normalized = dict(DEFAULT_METADATA, **metadata)
+    tags = normalized["tags"]
+    if isinstance(tags, str):
+        tags = tags.split(",")
+    normalized["tags"] = [str(tag).strip() for tag in tags if str(tag).strip()]
+    normalized["draft"] = normalized["draft"] is True
+    for key in ("title", "date", "template"):
+        if normalized[key] == []:
+            normalized[key] = None
+        elif normalized[key] is not None:
+            normalized[key] = str(normalized[key])
+    return normalized
+
+def _header_lines(lines):
+    header = []
+    for line in lines:
+        if line.rstrip("\r\n") in FRONT_MATTER_END:
+            return header
+        if len(header) >= MAX_HEADER_LINES:
+            return None
+        header.append(line)
+    return None
+
+# Reads only the header of a page: a file without front matter costs one line.
+def read_front_matter(path):
+    with open(path, "r") as f:
+        if f.readline().rstrip("\r\n") != FRONT_MATTER_DELIMITER:
+            return normalize_metadata({})
+        header = _header_lines(f)
+    if header is None:
+        return normalize_metadata({})
+    return parse_front_matter(header)
+
+def split_front_matter(text):
+    if not text.startswith(FRONT_MATTER_DELIMITER):
+        return normalize_metadata({}), text
+    lines = text.splitlines(keepends=True)
+    if lines[0].rstrip("\r\n") != FRONT_MATTER_DELIMITER:
+        return normalize_metadata({}), text
+    header = _header_lines(lines[1:])
+    if header is None:
+        return normalize_metadata({}), text
+    return parse_front_matter(header), "".join(lines[len(header) + 2:])
+
+# Streaming counterpart of split_front_matter over an iterator of lines without
+# newlines: returns the metadata and an iterator over the remaining lines, having
+# read no more than the header.
+def split_front_matter_lines(lines):
+    lines = iter(lines)
+    first = next(lines, None)
+    if first is None:
+        return normalize_metadata({}), iter(())
+    if first != FRONT_MATTER_DELIMITER:
+        return normalize_metadata({}), chain([first], lines)
+    header = list(islice(lines, MAX_HEADER_LINES + 1))
+    for index, line in enumerate(header):
+        if line.rstrip("\r") in FRONT_MATTER_END:
+            return parse_front_matter(header[:index]), chain(header[index + 1:], lines)
+    return normalize_metadata({}), chain([first], header, lines)
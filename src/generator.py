@@ -1,6 +1,26 @@
-import os, shutil
-from md_to_html import markdown_to_html_node
-from md_to_text import extract_title
+import hashlib, logging, os, shutil
+from contextlib import nullcontext
+from typing import NamedTuple
+from executor import iter_jobs
+from discovery import first_file, walk_sorted
+from metrics import PageTimer
+from cache import cache_key
+from md_to_html import PARSER_VERSION, block_to_html_node, iter_block_nodes, markdown_to_html_node
+from md_to_text import extract_title, iter_blocks
+from frontmatter import split_front_matter, split_front_matter_lines
+from manifest import BuildManifest, hash_file
+from siteindex import SiteIndex
+from derived import generate_derived_pages
+from output import OutputWriter, write_if_changed
+from template import Template, TemplateIndex, load_template, resolve_template_file
+from transforms import Fragment, page_transforms
+
+GENERATOR_VERSION = "3"
+
+# Bump when the shape of cached page content changes.
+CONTENT_CACHE_FORMAT = "fragment-1"
+
+logger = logging.getLogger(__name__)
 
 def move_files(src_dir, dest_dir):
     dest_folder = os.path.abspath(dest_dir)
@@ -8,10 +28,9 @@ def move_files(src_dir, dest_dir):
     try:
         if os.path.exists(dest_folder):
             shutil.rmtree(dest_folder)
-        else:
-            os.makedirs(dest_folder)
+        os.makedirs(dest_folder, exist_ok=True)
     except Exception as e:
-        print('Failed to delete %s. Reason: %s' % (dest_folder, e))
+        logger.error('Failed to delete %s. Reason: %s', dest_folder, e)
 
     src_folder = os.path.abspath(src_dir)
     for filename in os.listdir(src_folder):
@@ -21,78 +40,390 @@ def move_files(src_dir, dest_dir):
             if os.path.isfile(src_file_path):
                 shutil.copy2(src_file_path, dest_file_path)
             elif os.path.isdir(src_file_path):
-                shutil.copytree(src_file_path, dest_file_path)
+                shutil.copytree(src_file_path, dest_file_path, dirs_exist_ok=True)
         except Exception as e:
-            print('Failed to copy %s. Reason: %s' % (src_file_path, e))
+            logger.error('Failed to copy %s. Reason: %s', src_file_path, e)
 
-def generate_page(from_path, template_path, dest_path, basepath):
-    print(f"Generating page from {from_path} to {dest_path} using {template_path}")
+def generate_page(from_path, template_path, dest_path, basepath, timer=None, options=None, writer=None):
+    if isinstance(template_path, Template):
+        template = template_path
+    else:
+        template = load_template(resolve_template_file(template_path))
+    if timer is None:
+        timer = PageTimer(from_path)
+    if options is None:
+        options = RenderOptions()
+
+    logger.debug("Generating page from %s to %s using %s", from_path, dest_path, template.path)
 
-    md_file = None
     from_path = os.path.abspath(from_path)
     if os.path.isdir(from_path):
-        for filename in os.listdir(from_path):
-            if os.path.isfile(os.path.join(from_path, filename)) and filename.endswith(".md"):
-               md_file = os.path.join(from_path, filename)
-               break
+        md_file = first_file(from_path, ".md")
     else:
         md_file = from_path
 
     if md_file is None:
         raise Exception(f"No markdown file found in directory: {from_path}")
 
-    with open(md_file, "r") as f:
-        md_content = f.read()
-
-    template_file = None
-    template_path = os.path.abspath(template_path)
-    if os.path.isdir(template_path):
-        for filename in os.listdir(template_path):
-            if os.path.isfile(os.path.join(template_path, filename)) and filename.endswith(".html"):
-               template_file = os.path.join(template_path, filename)
-               break
+    dest_path = os.path.abspath(dest_path)
+    if os.path.isdir(dest_path):
+        dest_file_path = os.path.join(dest_path, "index.html")
     else:
-        template_file = template_path
+        dest_file_path = dest_path
+
+    if options.stream_threshold and os.path.getsize(md_file) >= options.stream_threshold:
+        return stream_page(md_file, template, dest_file_path, basepath, timer, options)
 
-    if template_file is None:
-        raise Exception(f"No template file found in directory: {template_path}")
-    
-    with open(template_file, "r") as f:
-        template_content = f.read()
+    with timer.stage("read"):
+        with open(md_file, "r") as f:
+            md_content = f.read()
+            timer.bytes_in = os.fstat(f.fileno()).st_size
+        metadata, md_content = split_front_matter(md_content)
 
-    #print(f"Markdown content:\n{md_content}\n")
-    html_node = markdown_to_html_node(md_content)
-    html_content = html_node.to_html()
+    fragment, title = render_content(md_content, timer, options.parse_cache, metadata["title"], options.block_cache)
 
+    logger.debug("using basepath: %s", basepath)
+    with timer.stage("transform"):
+        html_content = fragment.render(page_transforms(basepath, options.transforms, options.assets, options.images), options.minify)
 
-    title = extract_title(md_content)
+    template = page_template(template, basepath, options)
+    with timer.stage("template"):
+        template_content = template.render({
+            "Title": title,
+            "Content": html_content,
+            "Basepath": basepath,
+            "Date": metadata["date"] or "",
+            "Tags": ", ".join(metadata["tags"]),
+        })
 
-    template_content = template_content.replace("{{ Content }}", html_content)
-    template_content = template_content.replace("{{ Title }}", title)
+    with timer.stage("write"):
+        data = template_content.encode("utf-8")
+        timer.bytes_out = len(data)
+        if writer is not None:
+            writer.write(dest_file_path, data)
+        else:
+            write_if_changed(dest_file_path, data)
+    return title
 
-    print(f"using basepath: {basepath}")
-    template_content = template_content.replace("href=\"/", f"href=\"{basepath}")
-    template_content = template_content.replace("src=\"/", f"src=\"{basepath}")
+# Renders a large page block by block straight into its output file: the
+# markdown is read a line at a time and each block is parsed, serialized and
+# written before the next one is read, between the template text around the
+# Content slot. Memory stays proportional to the largest block rather than the
+# document. The parse cache and the write-behind queue both hold whole pages,
+# so this path bypasses them.
+def stream_page(md_file, template, dest_file_path, basepath, timer, options):
+    transform = page_transforms(basepath, options.transforms, options.assets, options.images)
+    template = page_template(template, basepath, options)
 
-    dest_path = os.path.abspath(dest_path)
-    if os.path.isdir(dest_path):
-        dest_file_path = os.path.join(dest_path, "index.html")
+    with timer.stage("title"):
+        with open(md_file, "r") as f:
+            metadata, lines = split_front_matter_lines(line.rstrip("\n") for line in f)
+            # without a front matter title this reads up to the first heading
+            title = metadata["title"] or extract_title(lines)
+    prefix, suffix = template.render_around("Content", {
+        "Title": title,
+        "Basepath": basepath,
+        "Date": metadata["date"] or "",
+        "Tags": ", ".join(metadata["tags"]),
+    })
+
+    with timer.stage("stream"):
+        with open(md_file, "r") as source:
+            _, lines = split_front_matter_lines(line.rstrip("\n") for line in source)
+            timer.bytes_in = os.fstat(source.fileno()).st_size
+            tmp_path = f"{dest_file_path}.{os.getpid()}.stream.tmp"
+            digest = hashlib.sha256()
+            try:
+                with open(tmp_path, "wb") as out:
+                    def write(text):
+                        data = text.encode("utf-8")
+                        digest.update(data)
+                        out.write(data)
+
+                    write(prefix)
+                    write("<div>")
+                    for node in iter_block_nodes(lines):
+                        write(Fragment.from_node(node).render(transform, options.minify))
+                    write("</div>")
+                    write(suffix)
+                    timer.bytes_out = out.tell()
+                # as with write_if_changed, identical output keeps its mtime
+                if _same_output(dest_file_path, timer.bytes_out, digest.hexdigest()):
+                    os.remove(tmp_path)
+                else:
+                    os.replace(tmp_path, dest_file_path)
+            except BaseException:
+                if os.path.exists(tmp_path):
+                    os.remove(tmp_path)
+                raise
+    return title
+
+# Template links get the same basepath and fingerprints as the content.
+def page_template(template, basepath, options):
+    template = template.with_basepath(basepath).with_assets(options.assets)
+    if options.minify:
+        template = template.minified()
+    return template
+
+# Only an existing output of the same size is read back and hashed.
+def _same_output(path, size, digest):
+    try:
+        if os.stat(path).st_size != size:
+            return False
+    except FileNotFoundError:
+        return False
+    return hash_file(path) == digest
+
+# The serialized content only depends on the markdown itself, so the fragment
+# and title are cached by content hash; a template or basepath change then
+# only re-runs the attribute transforms and the template fill. A title set in
+# the front matter saves looking for the page's first heading.
+def render_content(md_content, timer, parse_cache=None, title=None, block_cache=None):
+    key = None
+    if parse_cache is not None:
+        with timer.stage("cache"):
+            key = cache_key(PARSER_VERSION, CONTENT_CACHE_FORMAT, md_content)
+            cached = parse_cache.get_object(key)
+        if cached is not None:
+            fragment, cached_title = cached
+            return fragment, title or cached_title or extract_title(md_content)
+
+    if block_cache is not None:
+        with timer.stage("parse"):
+            fragment = render_blocks(md_content, block_cache)
     else:
-        dest_file_path = dest_path
-    
-    with open(dest_file_path, "w") as f:
-        f.write(template_content)
+        with timer.stage("parse"):
+            html_node = markdown_to_html_node(md_content)
+        with timer.stage("serialize"):
+            fragment = Fragment.from_node(html_node)
+    heading = None
+    if title is None:
+        with timer.stage("title"):
+            heading = title = extract_title(md_content)
+
+    if parse_cache is not None:
+        with timer.stage("cache"):
+            parse_cache.set_object(key, (fragment, heading))
+    return fragment, title
 
-def generate_pages_recursive(dir_path_content, template_path, dest_dir_path, basepath):
+# Rendered blocks are keyed by their text alone: a block's type and its tree
+# depend on nothing else.
+def block_cache_key(parsed_block):
+    return cache_key(PARSER_VERSION, "block", parsed_block.text)
+
+# Renders the page one block at a time through the block cache, so a block
+# shared with other pages, or unchanged since the last build, is neither
+# parsed nor serialized again; editing one paragraph re-renders that block.
+def render_blocks(md_content, block_cache):
+    fragments = []
+    for block in iter_blocks(md_content):
+        key = block_cache_key(block)
+        fragment = block_cache.get_object(key)
+        if fragment is None:
+            fragment = Fragment.from_node(block_to_html_node(block))
+            block_cache.set_object(key, fragment)
+        fragments.append(fragment)
+    return Fragment.join(fragments, "<div>", "</div>")
+
+def generate_pages_recursive(dir_path_content, template_path, dest_dir_path, basepath, *, build=None, options=None, metrics=None):
     dir_path_content = os.path.abspath(dir_path_content)
     template_path = os.path.abspath(template_path)
     dest_dir_path = os.path.abspath(dest_dir_path)
+    if build is None:
+        build = BuildOptions()
+    if options is None:
+        options = RenderOptions()
+
+    templates = TemplateIndex(template_path, dir_path_content)
+    site_index = SiteIndex(build.index_path, dir_path_content)
+    manifest = None
+    if build.manifest_path is not None:
+        manifest = BuildManifest(build.manifest_path, dir_path_content, dest_dir_path, GENERATOR_VERSION, templates.default.hash, basepath, options.minify, options.assets_digest, options.images_digest)
+
+    # Worker processes write their own pages; other processes keep the CPUs
+    # busy meanwhile, and the writer could not be shared with them anyway.
+    writer = None
+    if build.output_workers and build.executor != "process":
+        writer = OutputWriter(build.output_workers)
+
+    # Discovery, freshness checks and rendering form one lazy pipeline, so only
+    # the pages in flight are held in memory, whatever the size of the site.
+    jobs = iter_pages(dir_path_content, templates, dest_dir_path, basepath, site_index, build.include_drafts)
+    jobs = _prepare_jobs(jobs, site_index, dest_dir_path, manifest, options, writer)
+
+    failures = []
+    try:
+        for job, (error, timer, title) in iter_jobs(run_page_job, jobs, build.executor, build.workers):
+            if metrics is not None:
+                metrics.add_page(timer)
+            if error is not None:
+                logger.error("Failed to generate page from %s. Reason: %s", job.source, error)
+                failures.append((job.source, error))
+                continue
+            site_index.set_title(job.source, title)
+            if manifest is not None:
+                manifest.record(job.source, job.source_hash, job.template.hash, job.dest_file)
+    finally:
+        if writer is not None:
+            with metrics.stage("flush") if metrics is not None else nullcontext():
+                writer.close()
+
+    if writer is not None:
+        for path, error in writer.errors:
+            source = site_index.source_of(os.path.relpath(path, dest_dir_path))
+            failures.append((source, error))
+            if manifest is not None:
+                manifest.forget(source)
+
+    if manifest is not None:
+        for stale_path in manifest.stale_outputs():
+            if os.path.isfile(stale_path):
+                logger.info("Removing stale page %s", stale_path)
+                os.remove(stale_path)
+        manifest.save()
+
+    finish_site(site_index, templates.default, dest_dir_path, basepath, build.derived, metrics, options)
+    return failures
+
+# Publishes each discovered page in the index, drops pages the manifest says
+# are fresh and creates each output directory once, just before its first page.
+def _prepare_jobs(jobs, site_index, dest_dir_path, manifest, options, writer):
+    created = set()
+    for job in jobs:
+        publish_page(site_index, job, dest_dir_path)
+        if manifest is not None and job.error is None:
+            source_hash = hash_file(job.source)
+            if manifest.is_fresh(job.source, source_hash, job.template.hash, job.dest_file):
+                logger.debug("Skipping unchanged page %s", job.source)
+                manifest.record(job.source, source_hash, job.template.hash, job.dest_file)
+                site_index.carry_over_title(job.source)
+                continue
+            job = job._replace(source_hash=source_hash)
+        job = job._replace(options=options, writer=writer)
+        if job.dest_dir not in created:
+            os.makedirs(job.dest_dir, exist_ok=True)
+            created.add(job.dest_dir)
+        yield job
+
+def publish_page(site_index, job, dest_dir_path):
+    site_index.publish(job.source, os.path.relpath(job.dest_file, dest_dir_path), page_url(job.dest_dir, dest_dir_path))
+
+def publish_pages(site_index, jobs, dest_dir_path):
+    for job in jobs:
+        publish_page(site_index, job, dest_dir_path)
 
-    for filename in os.listdir(dir_path_content):
-        content_file_path = os.path.join(dir_path_content, filename)
-        if os.path.isfile(content_file_path) and filename.endswith(".md"):
-            generate_page(content_file_path, template_path, dest_dir_path, basepath)
-        elif os.path.isdir(content_file_path):
-            new_dest_dir_path = os.path.join(dest_dir_path, filename)
-            os.makedirs(new_dest_dir_path, exist_ok=True)
-            generate_pages_recursive(content_file_path, template_path, new_dest_dir_path, basepath)
\ No newline at end of file
+# Runs once the pages are written: generates the derived pages from the index,
+# removes outputs that are no longer published and saves the index.
+def finish_site(site_index, template, dest_dir_path, basepath, derived=None, metrics=None, options=None):
+    if options is None:
+        options = RenderOptions()
+    if derived is not None:
+        with metrics.stage("derived") if metrics is not None else nullcontext():
+            site_index.derived = generate_derived_pages(site_index, template, dest_dir_path, basepath, derived, options.minify, options.assets)
+
+    for output in site_index.withdrawn_outputs():
+        withdrawn_path = os.path.join(dest_dir_path, output)
+        if os.path.isfile(withdrawn_path):
+            logger.info("Removing unpublished page %s", withdrawn_path)
+            os.remove(withdrawn_path)
+    site_index.save()
+
+# How a build runs, as opposed to how its pages are rendered.
+class BuildOptions(NamedTuple):
+    # the incremental build manifest; every page is rendered without one
+    manifest_path: str = None
+    # the site index, kept between builds so unchanged headers are not read
+    index_path: str = None
+    executor: str = "serial"
+    workers: int = None
+    # background threads writing pages (0 = write inline)
+    output_workers: int = 2
+    include_drafts: bool = False
+    derived: object = None
+
+# How pages are rendered: the same for every page of a build, so one value is
+# carried by each job instead of a dozen arguments.
+class RenderOptions(NamedTuple):
+    parse_cache: object = None
+    block_cache: object = None
+    # extra attribute transforms, run after the built-in ones
+    transforms: list = None
+    minify: bool = False
+    # sources of at least this many bytes are rendered by stream_page
+    stream_threshold: int = None
+    assets: object = None
+    images: object = None
+
+    @property
+    def assets_digest(self):
+        return self.assets.digest if self.assets is not None else None
+
+    @property
+    def images_digest(self):
+        return self.images.digest if self.images is not None else None
+
+class PageJob(NamedTuple):
+    source: str
+    template: Template
+    dest_dir: str
+    basepath: str
+    source_hash: str = None
+    options: RenderOptions = RenderOptions()
+    writer: object = None
+    # set when discovery already knows the page cannot be rendered
+    error: str = None
+
+    @property
+    def dest_file(self):
+        return os.path.join(self.dest_dir, "index.html")
+
+# Page metadata comes from the site index, which reads at most the header of
+# each page, so drafts are left out without their bodies being read.
+def iter_pages(dir_path_content, templates, dest_dir_path, basepath, site_index=None, include_drafts=False):
+    if site_index is None:
+        site_index = SiteIndex(None, dir_path_content)
+    for directory, files in walk_sorted(dir_path_content, ".md"):
+        if not files:
+            continue
+        dest_dir = os.path.normpath(os.path.join(dest_dir_path, os.path.relpath(directory, dir_path_content)))
+        template = templates.for_directory(directory)
+        for entry in files:
+            try:
+                metadata = site_index.lookup(entry.path, entry.stat())
+            except ValueError as e:
+                # the page has no index entry, so it is reported as a failure
+                # without being published
+                logger.debug("Unreadable front matter in %s: %s", entry.path, e)
+                yield PageJob(entry.path, template, dest_dir, basepath, error=f"{type(e).__name__}: {e}")
+                continue
+            if metadata["draft"] and not include_drafts:
+                logger.debug("Skipping draft %s", entry.path)
+                continue
+            page_template = template
+            if metadata["template"]:
+                try:
+                    page_template = templates.named(metadata["template"])
+                except Exception as e:
+                    yield PageJob(entry.path, template, dest_dir, basepath, error=f"{type(e).__name__}: {e}")
+                    continue
+            yield PageJob(entry.path, page_template, dest_dir, basepath)
+
+def discover_pages(dir_path_content, templates, dest_dir_path, basepath, site_index=None, include_drafts=False):
+    return list(iter_pages(dir_path_content, templates, dest_dir_path, basepath, site_index, include_drafts))
+
+# The site-relative URL of the page written to dest_dir, e.g. "/blog/tom/".
+def page_url(dest_dir, dest_root):
+    relative = os.path.relpath(dest_dir, dest_root)
+    if relative == ".":
+        return "/"
+    return "/" + relative.replace(os.sep, "/") + "/"
+
+def run_page_job(job):
+    timer = PageTimer(job.source)
+    if job.error is not None:
+        return job.error, timer, None
+    try:
+        title = generate_page(job.source, job.template, job.dest_dir, job.basepath, timer, job.options, job.writer)
+    except Exception as e:
+        return f"{type(e).__name__}: {e}", timer, None
+    return None, timer, title
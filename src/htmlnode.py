@@ -1,19 +1,112 @@
+import re, sys
+
+class _FrozenList(list):
+    __slots__ = ()
+
+    def _immutable(self, *args, **kwargs):
+        raise TypeError("shared empty children list cannot be modified")
+
+    append = extend = insert = remove = pop = clear = sort = reverse = _immutable
+    __setitem__ = __delitem__ = __iadd__ = __imul__ = _immutable
+
+    def __reduce__(self):
+        return "EMPTY_CHILDREN"
+
+class _FrozenDict(dict):
+    __slots__ = ()
+
+    def _immutable(self, *args, **kwargs):
+        raise TypeError("shared empty props dict cannot be modified")
+
+    update = pop = popitem = clear = setdefault = _immutable
+    __setitem__ = __delitem__ = __ior__ = _immutable
+
+    def __reduce__(self):
+        return "EMPTY_PROPS"
+
+# Shared by every node created without children or props. Code that needs to
+# add props to such a node must assign a new dict rather than mutate this one.
+EMPTY_CHILDREN = _FrozenList()
+EMPTY_PROPS = _FrozenDict()
+
+# Attribute values that are valid HTML without quotes
+unquoted_value_pattern = re.compile(r"[^\s\"'=<>`]+\Z")
+
+# With compact, empty values are written as bare attributes and quotes are
+# dropped wherever HTML allows it.
+def format_props(props, compact=False):
+    if not props:
+        return ""
+    if not compact:
+        return "".join([f' {key}="{value}"' for key, value in props.items()])
+    parts = []
+    for key, value in props.items():
+        value = str(value)
+        if value == "":
+            parts.append(f" {key}")
+        elif unquoted_value_pattern.match(value):
+            parts.append(f" {key}={value}")
+        else:
+            parts.append(f' {key}="{value}"')
+    return "".join(parts)
+
 class HTMLNode:
+    __slots__ = ("tag", "value", "children", "props")
+
     def __init__(self, tag: str = None, value: str = None, children: list = None, props: dict = None):
-        self.tag = tag
+        self.tag = sys.intern(tag) if tag is not None else None
         self.value = value
-        self.children = children if children is not None else []
-        self.props = props if props is not None else {}
+        self.children = children if children is not None else EMPTY_CHILDREN
+        self.props = props if props is not None else EMPTY_PROPS
     
-    def to_html(self):
+    def to_html(self, transform=None):
+        chunks = []
+        self.write_chunks(chunks.append, transform)
+        return "".join(chunks)
+
+    def write_to(self, stream, transform=None):
+        self.write_chunks(stream.write, transform)
+
+    # `transform(tag, props)` is called for every element that has attributes
+    # and returns the props to serialize in their place.
+    def write_chunks(self, write, transform=None):
         raise NotImplementedError("to_html method must be implemented by subclasses")
+
+    def write_open_tag(self, write, transform=None):
+        if not self.props:
+            write(f"<{self.tag}>")
+            return
+        write(f"<{self.tag}")
+        write(self.props_to_html(transform))
+        write(">")
+
+    def iter_html(self, transform=None):
+        # Walks the tree with an explicit stack so deep nesting costs no more
+        # per chunk than shallow nesting (unlike chained `yield from`).
+        stack = [self]
+        while stack:
+            item = stack.pop()
+            if type(item) is tuple:
+                yield item[0]
+            elif isinstance(item, ParentNode):
+                item._check()
+                chunks = []
+                item.write_open_tag(chunks.append, transform)
+                yield "".join(chunks)
+                stack.append((f"</{item.tag}>",))
+                stack.extend(reversed(item.children))
+            elif isinstance(item, HTMLNode):
+                chunks = []
+                item.write_chunks(chunks.append, transform)
+                yield from chunks
+            else:
+                raise ValueError("All children of a ParentNode must be instances of HTMLNode")
     
-    def props_to_html(self):
-        props_str = ""
-        if self.props is not None and len(self.props) > 0:
-            for key, value in self.props.items():
-                props_str += f' {key}="{value}"'
-        return props_str
+    def props_to_html(self, transform=None, compact=False):
+        props = self.props
+        if transform is not None and props:
+            props = transform(self.tag, props)
+        return format_props(props, compact)
     
     def __eq__(self, other):
         if self.tag == other.tag and self.value == other.value and self.children == other.children and self.props == other.props:
@@ -24,40 +117,52 @@ class HTMLNode:
         return f"HTMLNode({self.tag}, {self.value}, {self.children}, {self.props_to_html()})"
     
 class LeafNode(HTMLNode):
+    __slots__ = ()
+
     def __init__(self, tag: str, value: str, props: dict = None):
         super().__init__(tag, value, None, props)
 
-    def to_html(self):
+    def write_chunks(self, write, transform=None):
         if self.value is None:
             raise ValueError("LeafNode must have a value to convert to HTML")
         
         if self.tag is None:
-            return self.value
+            write(self.value)
+            return
         
-        return f"<{self.tag}{self.props_to_html()}>{self.value}</{self.tag}>"
+        if not self.props:
+            write(f"<{self.tag}>{self.value}</{self.tag}>")
+            return
+        self.write_open_tag(write, transform)
+        write(f"{self.value}</{self.tag}>")
     
     def __repr__(self):
         return f"LeafNode({self.tag}, {self.value}, {self.props_to_html()})"
     
 class ParentNode(HTMLNode):
+    __slots__ = ()
+
     def __init__(self, tag: str, children: list, props: dict = None):
         super().__init__(tag, None, children, props)
 
-    def to_html(self):
+    def _check(self):
         if self.tag is None:
             raise ValueError("ParentNode must have a tag to convert to HTML")
         
         if self.children is None:
             raise ValueError("invalid HTML: no children")
-        html = f"<{self.tag}{self.props_to_html()}>"
+
+    def write_chunks(self, write, transform=None):
+        self._check()
+        self.write_open_tag(write, transform)
 
         for child in self.children:
             if not isinstance(child, HTMLNode):
                 raise ValueError("All children of a ParentNode must be instances of HTMLNode")
            
-            html += child.to_html()
+            child.write_chunks(write, transform)
             
-        return html + f"</{self.tag}>"
+        write(f"</{self.tag}>")
     
     def __repr__(self):
         return f"ParentNode({self.tag}, {self.children}, {self.props_to_html()})"
\ No newline at end of file
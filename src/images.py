@@ -0,0 +1,131 @@
+import hashlib, json, logging, os, re, struct
+from typing import NamedTuple
+from manifest import hash_file
+from state import load_state, save_state
+from sync import walk_files
+
+logger = logging.getLogger(__name__)
+
+STATE_VERSION = 1
+IMAGE_EXTENSIONS = (".png", ".jpg", ".jpeg", ".gif", ".webp", ".svg")
+
+# The root <svg> element and its width, height and viewBox attributes
+svg_root_pattern = re.compile(rb"<svg\b[^>]*>", re.S)
+svg_length_pattern = re.compile(rb"""(?<![\w-])(width|height)\s*=\s*["']\s*([\d.]+)\s*(px)?\s*["']""")
+svg_viewbox_pattern = re.compile(rb"""(?<![\w-])viewBox\s*=\s*["']\s*[-\d.]+[\s,]+[-\d.]+[\s,]+([\d.]+)[\s,]+([\d.]+)\s*["']""")
+
+# JPEG start-of-frame markers; C4, C8 and CC share the range but are not frames
+JPEG_FRAME_MARKERS = set(range(0xC0, 0xD0)) - {0xC4, 0xC8, 0xCC}
+
+class ImageOptions(NamedTuple):
+    # site path, e.g. "/images/tom.png" -> (width, height)
+    sizes: dict
+    # the first images of a page are left to load eagerly, as they are
+    # likely to be above the fold
+    eager: int = 1
+
+    @property
+    def digest(self):
+        return hashlib.sha256(json.dumps([sorted(self.sizes.items()), self.eager]).encode("utf-8")).hexdigest()
+
+# Reads the pixel size of an image from its header, or returns None for a
+# format it does not know. Only the header is read; for JPEG the segments
+# before the frame header are skipped with seeks.
+def read_image_size(path):
+    with open(path, "rb") as f:
+        head = f.read(32)
+        if head.startswith(b"\x89PNG\r\n\x1a\n") and head[12:16] == b"IHDR":
+            return struct.unpack(">II", head[16:24])
+        if head[:6] in (b"GIF87a", b"GIF89a"):
+            return struct.unpack("<HH", head[6:10])
+        if head.startswith(b"RIFF") and head[8:12] == b"WEBP":
+            return _webp_size(head)
+        if head.startswith(b"\xff\xd8"):
+            f.seek(2)
+            return _jpeg_size(f)
+        if path.lower().endswith(".svg"):
+            f.seek(0)
+            return _svg_size(f.read(4096))
+    return None
+
+# A truncated file is an unknown size rather than an error.
+def _webp_size(head):
+    chunk = head[12:16]
+    if chunk == b"VP8 " and len(head) >= 30 and head[23:26] == b"\x9d\x01\x2a":
+        width, height = struct.unpack("<HH", head[26:30])
+        return width & 0x3FFF, height & 0x3FFF
+    if chunk == b"VP8L" and len(head) >= 25 and head[20] == 0x2F:
+        bits = int.from_bytes(head[21:25], "little")
+        return (bits & 0x3FFF) + 1, ((bits >> 14) & 0x3FFF) + 1
+    if chunk == b"VP8X" and len(head) >= 30:
+        return int.from_bytes(head[24:27], "little") + 1, int.from_bytes(head[27:30], "little") + 1
+    return None
+
+def _jpeg_size(f):
+    while True:
+        byte = f.read(1)
+        while byte == b"\xff":
+            byte = f.read(1)
+        if not byte:
+            return None
+        marker = byte[0]
+        # markers without a length
+        if marker == 0x01 or 0xD0 <= marker <= 0xD9:
+            continue
+        length = f.read(2)
+        if len(length) < 2:
+            return None
+        if marker in JPEG_FRAME_MARKERS:
+            frame = f.read(5)
+            if len(frame) < 5:
+                return None
+            height, width = struct.unpack(">HH", frame[1:5])
+            return width, height
+        f.seek(struct.unpack(">H", length)[0] - 2, os.SEEK_CUR)
+
+# Pixel or unitless width and height on the root element, else the viewBox.
+def _svg_size(head):
+    root = svg_root_pattern.search(head)
+    if root is None:
+        return None
+    lengths = {name.decode(): float(value) for name, value, _ in svg_length_pattern.findall(root.group(0))}
+    if "width" in lengths and "height" in lengths:
+        return round(lengths["width"]), round(lengths["height"])
+    viewbox = svg_viewbox_pattern.search(root.group(0))
+    if viewbox is None:
+        return None
+    return round(float(viewbox.group(1))), round(float(viewbox.group(2)))
+
+# Maps the site path of every image in src_dir to its size. Sizes are cached by
+# content hash in the state file, and each file's hash by its stat, so an
+# unchanged image is neither hashed nor parsed again.
+def image_sizes(src_dir, state_path):
+    src_dir = os.path.abspath(src_dir)
+    state = load_state(state_path, {"version": STATE_VERSION})
+    previous = {"files": state.get("files", {}), "sizes": state.get("sizes", {})}
+    files = {}
+    sizes_by_hash = {}
+    sizes = {}
+    for rel_path, path in walk_files(src_dir):
+        rel_path = rel_path.replace(os.sep, "/")
+        if not rel_path.lower().endswith(IMAGE_EXTENSIONS):
+            continue
+        stat = os.stat(path)
+        entry = previous["files"].get(rel_path)
+        if entry is None or entry["size"] != stat.st_size or entry["mtime_ns"] != stat.st_mtime_ns:
+            entry = {"size": stat.st_size, "mtime_ns": stat.st_mtime_ns, "hash": hash_file(path)}
+        files[rel_path] = entry
+        size = sizes_by_hash.get(entry["hash"]) or previous["sizes"].get(entry["hash"])
+        if size is None:
+            try:
+                size = read_image_size(path)
+            except (OSError, struct.error, ValueError) as e:
+                logger.warning("Could not read the size of %s: %s", path, e)
+            if size is None:
+                logger.debug("Unknown image size for %s", path)
+                continue
+        sizes_by_hash[entry["hash"]] = list(size)
+        sizes["/" + rel_path] = tuple(size)
+
+    save_state(state_path, {"version": STATE_VERSION}, files=files, sizes=sizes_by_hash)
+    return sizes
@@ -1,10 +1,174 @@
-import sys
+import argparse, logging, os, sys
 
-from generator import move_files, generate_pages_recursive
+from assets import fingerprint_assets
+from cache import DiskCache, LRUCache
+from changeset import OutputState
+from compress import compress_outputs
+from derived import DerivedOptions
+from executor import EXECUTORS
+from generator import BuildOptions, RenderOptions, move_files, generate_page, generate_pages_recursive
+from images import ImageOptions, image_sizes
+from metrics import BuildMetrics
+from sync import sync_files
+from transforms import AssetTransform
+
+logger = logging.getLogger("main")
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="Build the static site from content/ into docs/")
+    parser.add_argument("basepath", nargs="?", default="/")
+    parser.add_argument("--incremental", action="store_true", help="only re-render pages whose inputs changed since the last build")
+    parser.add_argument("--clean", action="store_true", help="wipe docs/ and copy every static file before building")
+    parser.add_argument("--changeset", metavar="PATH", help="where to write the added/changed/removed output paths with their hashes (default: CACHE_DIR/changeset.json)")
+    parser.add_argument("--fingerprint", action="store_true", help="also write content-hashed copies of static assets (index.3f9a1c2b7d.css) and link pages to them")
+    parser.add_argument("--bundle", action="append", metavar="PATH=CSS,...", help="with --fingerprint, concatenate stylesheets into one bundle, e.g. /site.css=/index.css,/extra.css (repeatable)")
+    parser.add_argument("--headers", action="store_true", help="with --fingerprint, write docs/_headers marking fingerprinted assets immutable")
+    parser.add_argument("--image-attributes", action="store_true", help="add width and height from the static image files, plus loading=\"lazy\" and decoding=\"async\", to content images")
+    parser.add_argument("--eager-images", type=int, default=1, metavar="N", help="with --image-attributes, images at the top of each page left to load eagerly")
+    parser.add_argument("--hash-static", action="store_true", help="compare static files by content hash when their size or mtime differ")
+    parser.add_argument("--watch", action="store_true", help="serve docs/ and rebuild affected pages whenever content, static files or the template change")
+    parser.add_argument("--port", type=int, default=8888, help="port used to serve docs/ in watch mode")
+    parser.add_argument("--cache-dir", default=".cache", help="where build state such as the page manifest is kept")
+    parser.add_argument("--parse-cache", action="store_true", help="cache rendered page content by markdown hash so template or basepath changes skip parsing (implied by --incremental)")
+    parser.add_argument("--block-cache", action="store_true", help="cache rendered blocks by their text, in memory and on disk, so blocks shared between pages or unchanged since the last build are not parsed again (implied by --incremental)")
+    parser.add_argument("--block-cache-entries", type=int, default=4096, help="rendered blocks kept in memory during a build")
+    parser.add_argument("--cache-size", type=int, default=256, help="size bound of the parse cache in MB")
+    parser.add_argument("--drafts", action="store_true", help="also build pages marked draft in their front matter")
+    parser.add_argument("--site-url", help="absolute URL the site is served from, e.g. https://example.com; enables feed.xml and sitemap.xml")
+    parser.add_argument("--feed-title", help="title of the Atom feed (default: the site URL)")
+    parser.add_argument("--feed-author", help="author named in the Atom feed (default: the feed title)")
+    parser.add_argument("--listing", action="append", metavar="SECTION", help="content directory to generate a paginated listing for (default: blog; repeatable)")
+    parser.add_argument("--page-size", type=int, default=10, help="entries per listing page")
+    parser.add_argument("-j", "--jobs", type=int, default=1, help="number of pages to render in parallel (0 = one per CPU)")
+    parser.add_argument("--executor", choices=EXECUTORS, help="how parallel pages are run (default: process when --jobs is not 1)")
+    parser.add_argument("--writers", type=int, default=2, help="background threads writing pages while the next ones render (0 = write inline)")
+    parser.add_argument("--stream-threshold", type=int, default=16, metavar="MB", help="render markdown files of at least this many megabytes block by block, straight to disk (0 = never)")
+    parser.add_argument("--minify", action="store_true", help="strip comments and whitespace between tags from the template and write compact attributes")
+    parser.add_argument("--gzip", action="store_true", help="write .gz siblings of HTML, CSS, JS and XML outputs for servers that use precompressed files")
+    parser.add_argument("--gzip-min-size", type=int, default=1024, help="smallest output in bytes that gets a .gz sibling")
+    parser.add_argument("--etags", metavar="PATH", help="with --gzip, write a JSON map of output path to ETags for the server")
+    parser.add_argument("--metrics", metavar="PATH", help="write a JSON build report with per-stage and per-page timings")
+    parser.add_argument("--trace", metavar="PATH", help="write a Chrome trace of the build stages")
+    parser.add_argument("--profile", metavar="DIR", help="run the build under cProfile and tracemalloc and write reports to DIR")
+    parser.add_argument("--profile-page", metavar="PATH", help="with --profile, profile rendering only this markdown file")
+    parser.add_argument("--log-level", default="info", choices=["debug", "info", "warning", "error"])
+    return parser.parse_args()
 
 def main():
-    basepath = sys.argv[1] if len(sys.argv) > 1 else "/"
-    move_files("static", "docs")
-    generate_pages_recursive("content", "template.html", "docs", basepath)
+    args = parse_args()
+    logging.basicConfig(level=args.log_level.upper(), format="%(message)s")
+    if args.profile:
+        profile(args)
+        return
+
+    metrics = BuildMetrics()
+    parse_cache = None
+    if args.parse_cache or args.incremental:
+        parse_cache = DiskCache(os.path.join(args.cache_dir, "parsed"), args.cache_size * 1024 * 1024)
+    block_cache = None
+    if args.block_cache or args.incremental:
+        block_cache = LRUCache(args.block_cache_entries, DiskCache(os.path.join(args.cache_dir, "blocks"), args.cache_size * 1024 * 1024))
+
+    with metrics.stage("static"):
+        if not args.clean:
+            result = sync_files("static", "docs", os.path.join(args.cache_dir, "static.json"), args.hash_static)
+            logger.info("Synced static files: %d copied, %d removed, %d unchanged", len(result.copied), len(result.removed), len(result.unchanged))
+        else:
+            move_files("static", "docs")
+    assets = None
+    if args.fingerprint:
+        with metrics.stage("assets"):
+            assets = AssetTransform(fingerprint_assets("static", "docs", os.path.join(args.cache_dir, "assets.json"), args.basepath, parse_bundles(args.bundle), args.headers), args.basepath)
+    images = None
+    if args.image_attributes:
+        with metrics.stage("images"):
+            images = ImageOptions(image_sizes("static", os.path.join(args.cache_dir, "images.json")), args.eager_images)
+    build = BuildOptions(
+        manifest_path=os.path.join(args.cache_dir, "manifest.json") if args.incremental else None,
+        index_path=os.path.join(args.cache_dir, "site-index.json"),
+        executor=args.executor or ("serial" if args.jobs == 1 else "process"),
+        workers=args.jobs,
+        output_workers=args.writers,
+        include_drafts=args.drafts,
+        derived=derived_options(args),
+    )
+    options = RenderOptions(
+        parse_cache=parse_cache,
+        block_cache=block_cache,
+        minify=args.minify,
+        stream_threshold=args.stream_threshold * 1024 * 1024,
+        assets=assets,
+        images=images,
+    )
+    failures = generate_pages_recursive("content", "template.html", "docs", args.basepath, build=build, options=options, metrics=metrics)
+    if args.gzip:
+        with metrics.stage("compress"):
+            compress_outputs("docs", os.path.join(args.cache_dir, "compressed.json"), None, args.gzip_min_size, args.etags)
+
+    with metrics.stage("changeset"):
+        state = OutputState("docs", os.path.join(args.cache_dir, "outputs.json"))
+        changeset = state.update()
+        state.save()
+        changeset.write(args.changeset or os.path.join(args.cache_dir, "changeset.json"))
+    logger.info("Output changes: %d added, %d changed, %d removed", len(changeset.added), len(changeset.changed), len(changeset.removed))
+    metrics.finish()
+
+    report = metrics.report()
+    logger.info("Built %d page(s) in %.3f s", report["pages"], report["total_seconds"])
+    if args.metrics:
+        metrics.write_report(args.metrics)
+    if args.trace:
+        metrics.write_trace(args.trace)
+
+    if args.watch:
+        # assets are not fingerprinted again after edits, so watch mode links the plain copies
+        watch(args, RenderOptions(minify=args.minify, images=images))
+    elif failures:
+        logger.error("%d page(s) failed to generate", len(failures))
+        sys.exit(1)
+
+def derived_options(args):
+    return DerivedOptions(
+        sections=tuple(args.listing or ("blog",)),
+        page_size=args.page_size,
+        site_url=args.site_url,
+        feed_title=args.feed_title,
+        feed_author=args.feed_author,
+    )
+
+# "/site.css=/index.css,/extra.css" -> {"/site.css": ["/index.css", "/extra.css"]}
+def parse_bundles(specs):
+    bundles = {}
+    for spec in specs or []:
+        bundle, _, members = spec.partition("=")
+        if not bundle or not members:
+            raise SystemExit(f"Invalid --bundle {spec!r}, expected PATH=CSS,...")
+        bundles["/" + bundle.lstrip("/")] = ["/" + member.strip().lstrip("/") for member in members.split(",")]
+    return bundles
+
+def profile(args):
+    from profiling import profile_call
+
+    if args.profile_page:
+        dest_dir = os.path.join(args.profile, "page")
+        os.makedirs(dest_dir, exist_ok=True)
+        profile_call(lambda: generate_page(args.profile_page, "template.html", dest_dir, args.basepath), args.profile)
+    else:
+        sync_files("static", "docs", os.path.join(args.cache_dir, "static.json"), args.hash_static)
+        profile_call(lambda: generate_pages_recursive("content", "template.html", "docs", args.basepath), args.profile)
+    logger.info("Wrote build.pstats, build.pstats.txt, build.collapsed and allocations.txt to %s", args.profile)
+
+def watch(args, options=None):
+    from watch import ReloadNotifier, SiteWatcher, serve
+
+    notifier = ReloadNotifier()
+    serve("docs", args.port, notifier)
+    logger.info("Serving docs/ on http://localhost:%d/ and watching for changes", args.port)
+    watcher = SiteWatcher("content", "static", "template.html", "docs", args.basepath, args.cache_dir, notifier, args.drafts, derived_options(args), options)
+    try:
+        watcher.run()
+    except KeyboardInterrupt:
+        pass
 
-main()
\ No newline at end of file
+if __name__ == "__main__":
+    main()
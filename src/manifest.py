@@ -0,0 +1,74 @@
+import hashlib, os
+from state import load_state, save_state
+
+MANIFEST_VERSION = 1
+
+def hash_file(path):
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(1 << 16), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+# Pages are keyed by source path relative to the content directory. A previous
+# manifest is only reused when generator version, template hash, basepath,
+# minification, the fingerprinted asset names and the image attributes all
+# match, so changing any of them re-renders every page.
+class BuildManifest:
+    def __init__(self, path, content_dir, dest_dir, generator_version, template_hash, basepath, minify=False, assets=None, images=None):
+        self.path = path
+        self.content_dir = os.path.abspath(content_dir)
+        self.dest_dir = os.path.abspath(dest_dir)
+        self.header = {
+            "version": MANIFEST_VERSION,
+            "generator": generator_version,
+            "template": template_hash,
+            "basepath": basepath,
+            "minify": minify,
+            "assets": assets,
+            "images": images,
+        }
+        self.previous = self._load()
+        self.pages = {}
+
+    def _load(self):
+        return load_state(self.path, self.header).get("pages", {})
+
+    def _key(self, source_path):
+        return os.path.relpath(os.path.abspath(source_path), self.content_dir)
+
+    def _output(self, dest_path):
+        return os.path.relpath(os.path.abspath(dest_path), self.dest_dir)
+
+    def is_fresh(self, source_path, source_hash, template_hash, dest_path):
+        entry = self.previous.get(self._key(source_path))
+        if entry is None:
+            return False
+        if entry["hash"] != source_hash or entry["output"] != self._output(dest_path):
+            return False
+        if entry.get("template") != template_hash:
+            return False
+        return os.path.isfile(dest_path)
+
+    def record(self, source_path, source_hash, template_hash, dest_path):
+        self.pages[self._key(source_path)] = {
+            "hash": source_hash,
+            "template": template_hash,
+            "output": self._output(dest_path),
+        }
+
+    def forget(self, source_path):
+        self.pages.pop(self._key(source_path), None)
+
+    def stale_outputs(self):
+        live = {entry["output"] for entry in self.pages.values()}
+        stale = []
+        for key, entry in self.previous.items():
+            if key in self.pages or entry["output"] in live:
+                continue
+            if not os.path.exists(os.path.join(self.content_dir, key)):
+                stale.append(os.path.join(self.dest_dir, entry["output"]))
+        return stale
+
+    def save(self):
+        save_state(self.path, self.header, pages=self.pages)
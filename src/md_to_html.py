@@ -1,56 +1,58 @@
-from md_to_text import markdown_to_blocks, block_to_block_type, BlockType, text_to_textnodes
+from md_to_text import iter_blocks, BlockType, text_to_textnodes
 from textnode import text_node_to_html_node, TextNode, TextType
 from htmlnode import ParentNode
+from itertools import islice
 import re
 
-def markdown_to_html_node(markdown):
-    blocks = markdown_to_blocks(markdown)
-    html_nodes = []
-    for block in blocks:
-        block_type = block_to_block_type(block)
-        match block_type:
-            case BlockType.HEADING:
-                text_nodes = text_to_textnodes(re.sub(r"^#+ ", "", block))
-                node = ParentNode(f"h{block.count('#')}", text_to_children(text_nodes))
-                html_nodes.append(node)
-            case BlockType.PARAGRAPH:
-                text_nodes = text_to_textnodes(block.replace("\n", " "))
-                html_node = ParentNode("p", text_to_children(text_nodes))
-                html_nodes.append(html_node)
-            case BlockType.QUOTE:
-                text_nodes = text_to_textnodes(re.sub(r"^>[ ]?", "", block, flags=re.MULTILINE).replace("\n", " "))
-                node = ParentNode("blockquote", text_to_children(text_nodes))
-                html_nodes.append(node)
-            case BlockType.ORDERED_LIST:
-                list_items = block.split("\n")
-                list_nodes = []
-                for i, item in enumerate(list_items, 1):
-                    item = re.sub(r"^\d+\. ", "", item, count=1)
-                    text_nodes = text_to_textnodes(item)
-                    html_node = ParentNode("li", text_to_children(text_nodes))
-                    list_nodes.append(html_node)
-                parent_node = ParentNode("ol", list_nodes)
-                html_nodes.append(parent_node)
-            case BlockType.UNORDERED_LIST:
-                list_items = block.split("\n")
-                list_nodes = []
-                for item in list_items:
-                    item = re.sub(r"^- ", "", item, count=1)
-                    text_nodes = text_to_textnodes(item)
-                    html_node =  ParentNode("li", text_to_children(text_nodes))
-                    list_nodes.append(html_node)
-                parent_node = ParentNode("ul", list_nodes)
-                html_nodes.append(parent_node)
-            case BlockType.CODE:
-                text_node = TextNode(block.strip("```").lstrip("\n"), TextType.CODE)
-                node = ParentNode("pre", [text_node_to_html_node(text_node)])
-                html_nodes.append(node)
-            case _:
-                raise ValueError(f"Unsupported block type: {block_type}")
-            
+# Bump whenever a change to parsing alters the tree produced for the same
+# markdown, so cached trees from older builds are not reused.
+PARSER_VERSION = "1"
 
+def markdown_to_html_node(markdown, max_blocks=None):
+    blocks = iter_blocks(markdown)
+    if max_blocks is not None:
+        blocks = islice(blocks, max_blocks)
+    html_nodes = [block_to_html_node(block) for block in blocks]
     parent_node = ParentNode("div", html_nodes)
     return parent_node
 
+# One node per block, parsed only as the blocks are consumed. `source` is
+# anything iter_blocks accepts, including the lines of an open file.
+def iter_block_nodes(source):
+    for block in iter_blocks(source):
+        yield block_to_html_node(block)
+
+def block_to_html_node(parsed_block):
+    block = parsed_block.text
+    block_type = parsed_block.block_type
+    match block_type:
+        case BlockType.HEADING:
+            text_nodes = text_to_textnodes(re.sub(r"^#+ ", "", block))
+            return ParentNode(f"h{block.count('#')}", text_to_children(text_nodes))
+        case BlockType.PARAGRAPH:
+            text_nodes = text_to_textnodes(block.replace("\n", " "))
+            return ParentNode("p", text_to_children(text_nodes))
+        case BlockType.QUOTE:
+            text_nodes = text_to_textnodes(" ".join([re.sub(r"^>[ ]?", "", line) for line in parsed_block.lines]))
+            return ParentNode("blockquote", text_to_children(text_nodes))
+        case BlockType.ORDERED_LIST:
+            list_nodes = []
+            for item in parsed_block.lines:
+                item = re.sub(r"^\d+\. ", "", item, count=1)
+                text_nodes = text_to_textnodes(item)
+                list_nodes.append(ParentNode("li", text_to_children(text_nodes)))
+            return ParentNode("ol", list_nodes)
+        case BlockType.UNORDERED_LIST:
+            list_nodes = []
+            for item in parsed_block.lines:
+                text_nodes = text_to_textnodes(item[2:])
+                list_nodes.append(ParentNode("li", text_to_children(text_nodes)))
+            return ParentNode("ul", list_nodes)
+        case BlockType.CODE:
+            text_node = TextNode(block.strip("```").lstrip("\n"), TextType.CODE)
+            return ParentNode("pre", [text_node_to_html_node(text_node)])
+        case _:
+            raise ValueError(f"Unsupported block type: {block_type}")
+
 def text_to_children(nodes):
     return  [text_node_to_html_node(node) for node in nodes]
\ No newline at end of file
@@ -1,5 +1,6 @@
 from textnode import TextNode, TextType
 from enum import Enum
+from typing import NamedTuple
 import re
 
 # Images: ![alt text](url)
@@ -29,6 +30,22 @@ link_pattern = re.compile(
     re.VERBOSE
 )
 
+# Every inline construct in one alternation, so text is scanned left to right once:
+# ![alt](url) | [anchor](url) | ** _ `
+inline_pattern = re.compile(
+    r"""
+    !\[([^\[\]]*)\]\(([^\(\)]*)\)   # Groups 1-2: image alt text and URL
+    | \[([^\[\]]*)\]\(([^\(\)]*)\)  # Groups 3-4: link anchor text and URL
+    | (\*\*|_|`)                     # Group 5: bold, italic or code delimiter
+    """,
+    re.VERBOSE
+)
+
+delimiter_text_types = {
+    "**": TextType.BOLD,
+    "_": TextType.ITALIC,
+    "`": TextType.CODE,
+}
 
 def split_nodes_delimiter(old_nodes, delimiter, text_type):
     result = []
@@ -146,6 +163,53 @@ def split_nodes_link(old_nodes):
     return new_nodes
 
 def text_to_textnodes(text):
+    return tokenize_inline(text)
+
+# Single pass over the text: plain text runs are flushed at every token, which
+# yields the same node list as the split_nodes_* pipeline below for text whose
+# inline spans are not nested inside one another.
+def tokenize_inline(text):
+    nodes = []
+    matched = False
+    position = 0
+    search_from = 0
+    while True:
+        match = inline_pattern.search(text, search_from)
+        if match is None:
+            break
+        matched = True
+        start = match.start()
+        kind = match.lastindex
+
+        if kind == 5:
+            delimiter = match.group(5)
+            end = text.find(delimiter, match.end())
+            if end == -1:
+                raise Exception(f"End delimiter '{delimiter}' not found in text: {text}")
+            if start > position:
+                nodes.append(TextNode(text[position:start], TextType.TEXT))
+            if end > match.end():
+                nodes.append(TextNode(text[match.end():end], delimiter_text_types[delimiter]))
+            position = search_from = end + len(delimiter)
+            continue
+
+        if start > position:
+            nodes.append(TextNode(text[position:start], TextType.TEXT))
+        if kind == 2:
+            nodes.append(TextNode(match.group(1), TextType.IMAGE, match.group(2)))
+        else:
+            nodes.append(TextNode(match.group(3), TextType.LINK, match.group(4)))
+        position = search_from = match.end()
+
+    if not matched:
+        return [TextNode(text, TextType.TEXT)]
+    if position < len(text):
+        nodes.append(TextNode(text[position:], TextType.TEXT))
+    return nodes
+
+# The original five-pass pipeline, kept as the reference implementation for
+# tokenize_inline.
+def text_to_textnodes_multipass(text):
     nodes = [TextNode(text, TextType.TEXT)]
     nodes = split_nodes_delimiter(nodes, "_", TextType.ITALIC)
     nodes = split_nodes_delimiter(nodes, "**", TextType.BOLD)
@@ -155,15 +219,7 @@ def text_to_textnodes(text):
     return nodes
 
 def markdown_to_blocks(markdown):
-    blocks = markdown.split("\n\n")
-    result = []
-    for block in blocks:
-        block = block.strip()
-        if len(block) == 0:
-            continue
-        result.append(block)
-    
-    return result
+    return [block.text for block in iter_blocks(markdown)]
 
 
 class BlockType(Enum):
@@ -174,25 +230,83 @@ class BlockType(Enum):
     UNORDERED_LIST = "unordered_list"
     ORDERED_LIST = "ordered_list"
 
+class Block(NamedTuple):
+    block_type: BlockType
+    text: str
+    lines: list
+    start_line: int
+    end_line: int
+
+def iter_lines(markdown):
+    start = 0
+    while True:
+        end = markdown.find("\n", start)
+        if end == -1:
+            yield markdown[start:]
+            return
+        yield markdown[start:end]
+        start = end + 1
+
+# Walks the document line by line and yields each block as soon as the empty
+# line closing it is seen, so callers that only need the first few blocks never
+# look at the rest. Blocks are the same as splitting on "\n\n" and stripping.
+# `source` is either a markdown string or an iterable of lines without newlines.
+def iter_blocks(source):
+    lines = iter_lines(source) if isinstance(source, str) else source
+    current = []
+    start_line = 0
+    number = 0
+    for number, line in enumerate(lines):
+        if line == "":
+            if current:
+                block = _make_block(current, start_line, number)
+                if block is not None:
+                    yield block
+                current = []
+        else:
+            if not current:
+                start_line = number
+            current.append(line)
+    if current:
+        block = _make_block(current, start_line, number + 1)
+        if block is not None:
+            yield block
+
+def _make_block(lines, start_line, end_line):
+    first = 0
+    last = len(lines) - 1
+    while first <= last and lines[first].strip() == "":
+        first += 1
+    while last >= first and lines[last].strip() == "":
+        last -= 1
+    if first > last:
+        return None
+
+    lines = lines[first:last + 1]
+    lines[0] = lines[0].lstrip()
+    lines[-1] = lines[-1].rstrip()
+    text = "\n".join(lines)
+    return Block(block_type_of_lines(text, lines), text, lines, start_line + first, start_line + last + 1)
+
 def block_to_block_type(block):
+    return block_type_of_lines(block, block.split("\n"))
+
+def block_type_of_lines(block, lines):
     if block.startswith(("# ", "## ", "### ", "#### ", "##### ", "###### ")):
         return BlockType.HEADING
-    elif block.startswith("```\n") and block.endswith("\n```"):
+    elif len(lines) > 1 and lines[0] == "```" and lines[-1] == "```":
         return BlockType.CODE
     elif block.startswith(">"):
-        lines = block.split("\n")
         if all(line.startswith(">") for line in lines):
             return BlockType.QUOTE
         else:
             return BlockType.PARAGRAPH
     elif block.startswith("- "):
-        lines = block.split("\n")
         if all(line.startswith("- ") for line in lines):
             return BlockType.UNORDERED_LIST
         else:            
             return BlockType.PARAGRAPH
     elif block.startswith("1. "):
-        lines = block.split("\n")
         if all(line.startswith(f"{i}. ") for i, line in enumerate(lines, 1)):
             return BlockType.ORDERED_LIST
         else:            
@@ -201,8 +315,7 @@ def block_to_block_type(block):
         return BlockType.PARAGRAPH
     
 def extract_title(markdown):
-    blocks = markdown_to_blocks(markdown)
-    for block in blocks:
-        if block.startswith("# "):
-            return block[2:].strip()
-    raise Exception("No title found in markdown")
\ No newline at end of file
+    for block in iter_blocks(markdown):
+        if block.text.startswith("# "):
+            return block.text[2:].strip()
+    raise Exception("No title found in markdown")
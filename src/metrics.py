@@ -0,0 +1,102 @@
+import json, os, threading, time
+from contextlib import contextmanager
+
+# Collects stage timings for a single page. Instances are plain picklable
+# objects so worker processes can hand them back to the parent.
+class PageTimer:
+    def __init__(self, source=None):
+        self.source = source
+        self.spans = []
+        self.bytes_in = 0
+        self.bytes_out = 0
+        self.pid = os.getpid()
+        self.tid = threading.get_ident()
+
+    @contextmanager
+    def stage(self, name):
+        started = time.perf_counter_ns()
+        try:
+            yield
+        finally:
+            self.spans.append((name, started, time.perf_counter_ns() - started))
+
+    def total_ns(self):
+        return sum(duration for _, _, duration in self.spans)
+
+    def stage_ns(self):
+        totals = {}
+        for name, _, duration in self.spans:
+            totals[name] = totals.get(name, 0) + duration
+        return totals
+
+class BuildMetrics:
+    def __init__(self):
+        self.pages = []
+        self.other = []
+        self.started = time.perf_counter_ns()
+        self.finished = None
+
+    def add_page(self, timer):
+        self.pages.append(timer)
+
+    @contextmanager
+    def stage(self, name):
+        timer = PageTimer()
+        with timer.stage(name):
+            yield
+        self.other.append(timer)
+
+    def finish(self):
+        self.finished = time.perf_counter_ns()
+
+    def report(self, slowest=10):
+        stages = {}
+        for timer in self.pages + self.other:
+            for name, duration in timer.stage_ns().items():
+                stages[name] = stages.get(name, 0) + duration
+
+        pages = sorted(self.pages, key=lambda timer: timer.total_ns(), reverse=True)
+        finished = self.finished or time.perf_counter_ns()
+        return {
+            "total_seconds": (finished - self.started) / 1e9,
+            "pages": len(self.pages),
+            "bytes_in": sum(timer.bytes_in for timer in self.pages),
+            "bytes_out": sum(timer.bytes_out for timer in self.pages),
+            "stages": {name: duration / 1e9 for name, duration in stages.items()},
+            "slowest_pages": [
+                {
+                    "source": timer.source,
+                    "seconds": timer.total_ns() / 1e9,
+                    "bytes_in": timer.bytes_in,
+                    "bytes_out": timer.bytes_out,
+                    "stages": {name: duration / 1e9 for name, duration in timer.stage_ns().items()},
+                }
+                for timer in pages[:slowest]
+            ],
+        }
+
+    # Chrome trace event format, viewable in chrome://tracing or Perfetto.
+    def trace_events(self):
+        events = []
+        for timer in self.pages + self.other:
+            for name, started, duration in timer.spans:
+                events.append({
+                    "name": name,
+                    "cat": "page" if timer.source else "build",
+                    "ph": "X",
+                    "ts": (started - self.started) / 1000,
+                    "dur": duration / 1000,
+                    "pid": timer.pid,
+                    "tid": timer.tid,
+                    "args": {"source": timer.source} if timer.source else {},
+                })
+        events.sort(key=lambda event: event["ts"])
+        return events
+
+    def write_report(self, path):
+        with open(path, "w") as f:
+            json.dump(self.report(), f, indent=2)
+
+    def write_trace(self, path):
+        with open(path, "w") as f:
+            json.dump({"traceEvents": self.trace_events(), "displayTimeUnit": "ms"}, f)
@@ -0,0 +1,133 @@
+import cProfile, io, os, pstats, sys, threading, time, tracemalloc
+
+PROFILED_MODULES = ("md_to_text", "md_to_html", "htmlnode", "textnode")
+
+# Samples the call stack of one thread at a fixed interval and counts identical
+# stacks, producing the "collapsed" format read by flamegraph.pl/speedscope.
+class StackSampler:
+    def __init__(self, thread_id, interval=0.001):
+        self.thread_id = thread_id
+        self.interval = interval
+        self.counts = {}
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, daemon=True)
+
+    def start(self):
+        self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+        self._thread.join()
+
+    def _run(self):
+        while not self._stop.wait(self.interval):
+            frame = sys._current_frames().get(self.thread_id)
+            if frame is None:
+                continue
+            stack = []
+            while frame is not None:
+                code = frame.f_code
+                stack.append(f"{code.co_name} ({os.path.basename(code.co_filename)}:{code.co_firstlineno})")
+                frame = frame.f_back
+            key = ";".join(reversed(stack))
+            self.counts[key] = self.counts.get(key, 0) + 1
+
+    def write_collapsed(self, path):
+        with open(path, "w") as f:
+            for stack, count in sorted(self.counts.items()):
+                f.write(f"{stack} {count}\n")
+
+def _module_of(filename):
+    name = os.path.splitext(os.path.basename(filename))[0]
+    return name if name in PROFILED_MODULES else None
+
+# Attributes every traced allocation to the innermost frame that belongs to one of
+# the generator's parsing and node modules, so allocations made inside `re` or
+# builtins on their behalf are charged to the call site that caused them.
+def allocation_report(snapshot, top=25):
+    sites = {}
+    for trace in snapshot.traces:
+        for frame in reversed(trace.traceback):
+            module = _module_of(frame.filename)
+            if module is None:
+                continue
+            key = (module, frame.filename, frame.lineno)
+            size, count = sites.get(key, (0, 0))
+            sites[key] = (size + trace.size, count + 1)
+            break
+
+    by_module = {}
+    for (module, _, _), (size, _) in sites.items():
+        by_module[module] = by_module.get(module, 0) + size
+
+    lines = ["Allocations by module:"]
+    for module, size in sorted(by_module.items(), key=lambda item: item[1], reverse=True):
+        lines.append(f"  {module:<12} {size / 1024:10.1f} KiB")
+    lines.append("")
+    lines.append(f"Top {top} allocation sites:")
+    ranked = sorted(sites.items(), key=lambda item: item[1][0], reverse=True)[:top]
+    for (module, filename, lineno), (size, count) in ranked:
+        lines.append(f"  {size / 1024:10.1f} KiB {count:8d} blocks  {os.path.basename(filename)}:{lineno}")
+    return "\n".join(lines) + "\n"
+
+# tracemalloc only sees live memory, and page trees are freed as soon as each
+# page is written, so the report is taken from the snapshot with the most
+# traced memory seen while the build ran.
+class PeakSnapshotter:
+    def __init__(self, interval=0.05):
+        self.interval = interval
+        self.peak = -1
+        self.snapshot = None
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, daemon=True)
+
+    def start(self):
+        self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+        self._thread.join()
+        self.check()
+
+    def check(self):
+        current = tracemalloc.get_traced_memory()[0]
+        if current > self.peak:
+            self.peak = current
+            self.snapshot = tracemalloc.take_snapshot()
+
+    def _run(self):
+        while not self._stop.wait(self.interval):
+            self.check()
+
+def profile_call(fn, out_dir, top=25, sample_interval=0.001):
+    os.makedirs(out_dir, exist_ok=True)
+    profiler = cProfile.Profile()
+    sampler = StackSampler(threading.get_ident(), sample_interval)
+    snapshotter = PeakSnapshotter()
+
+    tracemalloc.start(25)
+    sampler.start()
+    snapshotter.start()
+    started = time.perf_counter()
+    try:
+        result = profiler.runcall(fn)
+    finally:
+        elapsed = time.perf_counter() - started
+        sampler.stop()
+        snapshotter.stop()
+        snapshot = snapshotter.snapshot
+        tracemalloc.stop()
+
+    profiler.dump_stats(os.path.join(out_dir, "build.pstats"))
+    text = io.StringIO()
+    stats = pstats.Stats(profiler, stream=text)
+    stats.sort_stats("cumulative").print_stats(top)
+    stats.sort_stats("tottime").print_stats(top)
+    with open(os.path.join(out_dir, "build.pstats.txt"), "w") as f:
+        f.write(f"Profiled run took {elapsed:.3f} s\n")
+        f.write(text.getvalue())
+
+    sampler.write_collapsed(os.path.join(out_dir, "build.collapsed"))
+    with open(os.path.join(out_dir, "allocations.txt"), "w") as f:
+        f.write(allocation_report(snapshot, top))
+    return result
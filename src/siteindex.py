@@ -0,0 +1,117 @@
+import os
+from frontmatter import read_front_matter
+from state import load_state, save_state
+
+INDEX_VERSION = 2
+
+# Metadata for every page in the content tree, keyed by source path relative
+# to the content directory. Entries are reused while a source's size and mtime
+# are unchanged, so a build only reads the headers of edited pages, and pages
+# never have to be parsed for their metadata at all.
+class SiteIndex:
+    def __init__(self, path, content_dir):
+        self.path = path
+        self.content_dir = os.path.abspath(content_dir)
+        data = self._load()
+        self.previous = data.get("pages", {})
+        self.previous_derived = data.get("derived", [])
+        self.pages = {}
+        # outputs generated from the index rather than from a page
+        self.derived = []
+
+    # Starts from the saved pages instead of an empty index, so single pages can
+    # be updated without discovering the whole content tree again.
+    def resume(self):
+        self.pages = {key: dict(entry) for key, entry in self.previous.items()}
+        self.derived = list(self.previous_derived)
+        return self
+
+    def _load(self):
+        if self.path is None:
+            return {}
+        return load_state(self.path, {"version": INDEX_VERSION})
+
+    def _key(self, source_path):
+        return os.path.relpath(os.path.abspath(source_path), self.content_dir)
+
+    # `stat` may be passed in from a directory listing to save a system call.
+    def lookup(self, source_path, stat=None):
+        key = self._key(source_path)
+        if stat is None:
+            stat = os.stat(source_path)
+        stat_key = [stat.st_size, stat.st_mtime_ns]
+        entry = self.previous.get(key)
+        if entry is not None and entry.get("stat") == stat_key:
+            entry = dict(entry)
+        else:
+            entry = dict(read_front_matter(source_path), stat=stat_key)
+        entry.pop("output", None)
+        entry.pop("url", None)
+        self.pages[key] = entry
+        return entry
+
+    # A page whose front matter could not be read has no entry and is left
+    # unpublished.
+    def publish(self, source_path, output_path, url):
+        entry = self.pages.get(self._key(source_path))
+        if entry is None:
+            return
+        entry["output"] = output_path
+        entry["url"] = url
+
+    def forget(self, source_path):
+        self.pages.pop(self._key(source_path), None)
+
+    # What listings, tag pages and the feed show of a page, or None while it is
+    # unpublished. Sitemap dates of undated pages follow the source's mtime and
+    # are left to the next change that regenerates the derived pages.
+    def listed(self, source_path):
+        entry = self.pages.get(self._key(source_path))
+        if entry is None or entry.get("url") is None:
+            return None
+        return entry["url"], entry["title"], entry["date"], tuple(entry["tags"])
+
+    def set_title(self, source_path, title):
+        entry = self.pages.get(self._key(source_path))
+        if entry is not None and title is not None:
+            entry["title"] = title
+
+    # A title taken from the page's heading is only known after rendering, so a
+    # page skipped as unchanged keeps the title recorded by the previous build.
+    def carry_over_title(self, source_path):
+        key = self._key(source_path)
+        entry = self.pages.get(key)
+        if entry is not None and entry["title"] is None:
+            entry["title"] = self.previous.get(key, {}).get("title")
+
+    def source_of(self, output_path):
+        for key, entry in self.pages.items():
+            if entry.get("output") == output_path:
+                return os.path.join(self.content_dir, key)
+        return output_path
+
+    def published(self):
+        return {key: entry for key, entry in self.pages.items() if entry.get("output") is not None}
+
+    # Outputs of pages that were published by the previous build and are now
+    # drafts or gone from the content tree, and derived outputs that are no
+    # longer generated.
+    def withdrawn_outputs(self):
+        outputs = []
+        live = {entry.get("output") for entry in self.pages.values()} | set(self.derived)
+        for key, entry in self.previous.items():
+            output = entry.get("output")
+            if output is None or output in live:
+                continue
+            if self.pages.get(key, {}).get("output") is None:
+                outputs.append(output)
+        outputs.extend(output for output in self.previous_derived if output not in live)
+        return outputs
+
+    def save(self):
+        if self.path is None:
+            return
+        save_state(self.path, {"version": INDEX_VERSION}, pages=self.pages, derived=sorted(self.derived))
+        # later withdrawals are relative to what was saved
+        self.previous = {key: dict(entry) for key, entry in self.pages.items()}
+        self.previous_derived = list(self.derived)
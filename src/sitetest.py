@@ -0,0 +1,35 @@
+import os
+import tempfile
+import unittest
+
+
+TEMPLATE = "<html><title>{{ Title }}</title><body>{{ Content }}</body></html>"
+
+
+# A site in a temporary directory: content/, docs/ and template.html.
+class SiteTestCase(unittest.TestCase):
+    template_text = TEMPLATE
+
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.root = self.tmp.name
+        self.content = os.path.join(self.root, "content")
+        self.dest = os.path.join(self.root, "docs")
+        self.template = os.path.join(self.root, "template.html")
+        os.makedirs(self.content)
+        os.makedirs(self.dest)
+        self.write(self.template, self.template_text)
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    # Relative paths are under content/.
+    def write(self, path, text):
+        path = os.path.join(self.content, path)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        with open(path, "w") as f:
+            f.write(text)
+
+    def read(self, *parts):
+        with open(os.path.join(self.dest, *parts)) as f:
+            return f.read()
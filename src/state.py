@@ -0,0 +1,32 @@
+import json, logging, os
+from output import write_atomic
+
+logger = logging.getLogger(__name__)
+
+# Build state files are JSON objects whose header fields, such as "version",
+# say which build wrote them. A missing or unreadable file, or one written with
+# another header, loads as {} so the build starts afresh.
+def load_state(path, header):
+    try:
+        with open(path, "r") as f:
+            data = json.load(f)
+    except (OSError, ValueError):
+        return {}
+    for key, value in header.items():
+        if data.get(key) != value:
+            return {}
+    return data
+
+# Written through a per-process temporary file, so concurrent builds sharing
+# a cache directory never write into each other's file.
+def save_state(path, header, **fields):
+    os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+    write_atomic(path, json.dumps(dict(header, **fields), indent=2, sort_keys=True).encode("utf-8"))
+
+# Removes an output that a build no longer produces, if it is still there.
+def remove_output(path):
+    try:
+        os.remove(path)
+        logger.debug("Removed %s", path)
+    except FileNotFoundError:
+        pass
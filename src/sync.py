@@ -0,0 +1,115 @@
+import logging, os, shutil
+from manifest import hash_file
+from state import load_state, save_state
+
+logger = logging.getLogger(__name__)
+
+SNAPSHOT_VERSION = 1
+
+class SyncResult:
+    def __init__(self):
+        self.copied = []
+        self.removed = []
+        self.unchanged = []
+
+    def __repr__(self):
+        return f"SyncResult(copied={len(self.copied)}, removed={len(self.removed)}, unchanged={len(self.unchanged)})"
+
+def load_snapshot(state_path):
+    if state_path is None:
+        return {}
+    return load_state(state_path, {"version": SNAPSHOT_VERSION}).get("files", {})
+
+def save_snapshot(state_path, files):
+    save_state(state_path, {"version": SNAPSHOT_VERSION}, files=files)
+
+def walk_files(root):
+    for dirpath, dirnames, filenames in os.walk(root):
+        dirnames.sort()
+        for filename in sorted(filenames):
+            path = os.path.join(dirpath, filename)
+            yield os.path.relpath(path, root), path
+
+def _stat_key(stat):
+    return [stat.st_size, stat.st_mtime_ns]
+
+# Copies only the files in src_dir that are new or changed relative to dest_dir
+# and removes files that were synced previously but no longer exist in src_dir.
+# Anything else in dest_dir (generated pages) is left alone. The snapshot at
+# state_path records source and destination size/mtime so that unchanged files
+# are recognised from a stat alone; with use_hash, files whose stats differ are
+# compared by content before being copied.
+def sync_files(src_dir, dest_dir, state_path=None, use_hash=False):
+    src_folder = os.path.abspath(src_dir)
+    dest_folder = os.path.abspath(dest_dir)
+    os.makedirs(dest_folder, exist_ok=True)
+
+    previous = load_snapshot(state_path)
+    current = {}
+    result = SyncResult()
+
+    for rel_path, src_file_path in walk_files(src_folder):
+        dest_file_path = os.path.join(dest_folder, rel_path)
+        src_stat = _stat_key(os.stat(src_file_path))
+        try:
+            dest_stat = _stat_key(os.stat(dest_file_path))
+        except FileNotFoundError:
+            dest_stat = None
+
+        entry = previous.get(rel_path)
+        if dest_stat is not None and _is_unchanged(entry, src_stat, dest_stat, src_file_path, dest_file_path, use_hash):
+            current[rel_path] = dict(entry or {}, src=src_stat, dest=dest_stat)
+            result.unchanged.append(rel_path)
+            continue
+
+        # copied under a temporary name so the destination is never half-written
+        tmp_path = f"{dest_file_path}.{os.getpid()}.tmp"
+        try:
+            os.makedirs(os.path.dirname(dest_file_path), exist_ok=True)
+            shutil.copy2(src_file_path, tmp_path)
+            os.replace(tmp_path, dest_file_path)
+        except Exception as e:
+            logger.error('Failed to copy %s. Reason: %s', src_file_path, e)
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+            # the previous copy, if any, stays in place and stays tracked, so
+            # the next sync retries instead of deleting it as removed
+            if entry is not None:
+                current[rel_path] = entry
+            continue
+
+        current[rel_path] = {"src": src_stat, "dest": _stat_key(os.stat(dest_file_path))}
+        if use_hash:
+            current[rel_path]["hash"] = hash_file(src_file_path)
+        result.copied.append(rel_path)
+
+    for rel_path in previous:
+        if rel_path in current:
+            continue
+        dest_file_path = os.path.join(dest_folder, rel_path)
+        if os.path.isfile(dest_file_path):
+            os.remove(dest_file_path)
+            _prune_empty_dirs(os.path.dirname(dest_file_path), dest_folder)
+        result.removed.append(rel_path)
+
+    if state_path is not None:
+        save_snapshot(state_path, current)
+    return result
+
+def _is_unchanged(entry, src_stat, dest_stat, src_file_path, dest_file_path, use_hash):
+    if entry is not None and entry.get("src") == src_stat and entry.get("dest") == dest_stat:
+        return True
+    # copy2 preserves mtimes, so a matching stat means the file was copied before
+    if src_stat == dest_stat:
+        return True
+    if use_hash and src_stat[0] == dest_stat[0]:
+        return hash_file(src_file_path) == hash_file(dest_file_path)
+    return False
+
+def _prune_empty_dirs(directory, root):
+    while directory != root and directory.startswith(root + os.sep):
+        try:
+            os.rmdir(directory)
+        except OSError:
+            return
+        directory = os.path.dirname(directory)
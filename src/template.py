@@ -0,0 +1,177 @@
+import hashlib, os, re
+
+# Slots: {{ Name }}
+slot_pattern = re.compile(r"\{\{\s*(\w+)\s*\}\}")
+
+# Root-relative href="/..." and src="/..." attributes in the template markup
+url_attribute_pattern = re.compile(r'(?<![\w-])(href|src)="/(?!/)')
+
+# Any href="..." or src="..." attribute in the template markup
+any_url_attribute_pattern = re.compile(r'(?<![\w-])(href|src)="([^"]*)"')
+
+# Elements whose contents are kept verbatim when minifying
+preserved_pattern = re.compile(r"<(pre|textarea|script|style)\b.*?</\1\s*>", re.S | re.I)
+# Comments holding a slot are kept, since dropping them would drop the slot
+comment_pattern = re.compile(r"<!--(?!\[if)[^\x00]*?-->")
+# Whitespace between two tags, or between a tag and a slot; whitespace between
+# two slots is text, as in "{{ Date }} {{ Tags }}"
+between_tags_pattern = re.compile(r"(?<=>)\s+(?=[<\x00])|(?<=\x00)\s+(?=<)")
+whitespace_pattern = re.compile(r"\s+")
+placeholder_pattern = re.compile(r"<\x01(\d+)>")
+
+# Stands in for the slots while the template text is minified as a whole, so
+# a <pre> spanning a slot is preserved like any other and whitespace between a
+# tag and a slot is dropped like whitespace between tags.
+SLOT_MARKER = "\x00"
+
+TEMPLATE_FILENAME = "template.html"
+
+# Preserved elements are swapped for placeholder tags while the rest is
+# minified, so whitespace next to them is treated as between tags.
+def minify_html(text):
+    preserved = []
+
+    def hold(match):
+        preserved.append(match.group(0))
+        return f"<\x01{len(preserved) - 1}>"
+
+    text = preserved_pattern.sub(hold, text)
+    text = comment_pattern.sub("", text)
+    text = between_tags_pattern.sub("", text)
+    text = whitespace_pattern.sub(" ", text)
+    return placeholder_pattern.sub(lambda match: preserved[int(match.group(1))], text).strip()
+
+class Template:
+    def __init__(self, text, path=None):
+        self.path = path
+        self.hash = hashlib.sha256(text.encode("utf-8")).hexdigest()
+        # literals[i] is followed by slots[i]; there is always one more literal than slot
+        self.literals = []
+        self.slots = []
+        position = 0
+        for match in slot_pattern.finditer(text):
+            self.literals.append(text[position:match.start()])
+            self.slots.append((match.group(1), match.group(0)))
+            position = match.end()
+        self.literals.append(text[position:])
+        self.variants = {}
+
+    # The template's own links are rewritten once per basepath; page content is
+    # rewritten separately through attribute transforms.
+    def with_basepath(self, basepath):
+        if basepath == "/":
+            return self
+        return self._variant(("basepath", basepath), lambda text: url_attribute_pattern.sub(
+            lambda match: f'{match.group(1)}="{basepath}', text))
+
+    # Links to static assets are pointed at their fingerprinted copies once per
+    # asset set; applied after with_basepath, as the asset transform is.
+    def with_assets(self, assets):
+        if assets is None:
+            return self
+        return self._variant(("assets", assets.digest), lambda text: any_url_attribute_pattern.sub(
+            lambda match: f'{match.group(1)}="{assets.rewrite(match.group(2))}"', text))
+
+    # Comments and whitespace between tags are dropped once, when the variant
+    # is first used, rather than from every rendered page.
+    def minified(self):
+        return self._variant(("minify",), minify_html)
+
+    # Variants share the slots and differ only in their literal text, so the
+    # rewrite runs over the literals joined by a marker and is then split again.
+    def _variant(self, key, rewrite):
+        variant = self.variants.get(key)
+        if variant is None:
+            text = rewrite(SLOT_MARKER.join(self.literals))
+            variant = Template.__new__(Template)
+            variant.path = self.path
+            variant.hash = self.hash
+            variant.slots = self.slots
+            variant.variants = {}
+            variant.literals = text.split(SLOT_MARKER)
+            self.variants[key] = variant
+        return variant
+
+    # Renders the template as the text before and after the first `slot`, so
+    # content too large to hold can be written between them as a stream. Any
+    # later occurrence of the slot renders empty.
+    def render_around(self, slot, values):
+        parts = self.render(dict(values, **{slot: SLOT_MARKER})).split(SLOT_MARKER)
+        if len(parts) < 2:
+            raise ValueError(f"Template has no {slot} slot: {self.path}")
+        return parts[0], "".join(parts[1:])
+
+    def slot_names(self):
+        return [name for name, _ in self.slots]
+
+    def render(self, values):
+        parts = [self.literals[0]]
+        for (name, raw), literal in zip(self.slots, self.literals[1:]):
+            value = values.get(name)
+            parts.append(raw if value is None else value)
+            parts.append(literal)
+        return "".join(parts)
+
+    def __repr__(self):
+        return f"Template({self.path}, {self.slot_names()})"
+
+def load_template(path):
+    with open(path, "r") as f:
+        return Template(f.read(), path)
+
+def resolve_template_file(template_path):
+    template_file = None
+    template_path = os.path.abspath(template_path)
+    if os.path.isdir(template_path):
+        for filename in sorted(os.listdir(template_path)):
+            if os.path.isfile(os.path.join(template_path, filename)) and filename.endswith(".html"):
+               template_file = os.path.join(template_path, filename)
+               break
+    else:
+        template_file = template_path
+
+    if template_file is None:
+        raise Exception(f"No template file found in directory: {template_path}")
+    return template_file
+
+# Picks the template for each content directory: the nearest template.html at or
+# above the directory inside the content tree, falling back to the build
+# default. Each template file is read and compiled once, and each directory is
+# resolved once.
+class TemplateIndex:
+    def __init__(self, template_path, content_dir):
+        self.content_dir = os.path.abspath(content_dir)
+        self.templates = {}
+        self.directories = {}
+        self.default = self._load(resolve_template_file(template_path))
+
+    def _load(self, path):
+        template = self.templates.get(path)
+        if template is None:
+            template = load_template(path)
+            self.templates[path] = template
+        return template
+
+    # Templates named in a page's front matter are looked up next to the
+    # default template.
+    def named(self, name):
+        path = os.path.join(os.path.dirname(self.default.path), name)
+        if not os.path.isfile(path):
+            raise Exception(f"Template not found: {path}")
+        return self._load(os.path.abspath(path))
+
+    def for_directory(self, directory):
+        directory = os.path.abspath(directory)
+        template = self.directories.get(directory)
+        if template is not None:
+            return template
+
+        candidate = os.path.join(directory, TEMPLATE_FILENAME)
+        if os.path.isfile(candidate):
+            template = self._load(candidate)
+        elif directory == self.content_dir or not directory.startswith(self.content_dir + os.sep):
+            template = self.default
+        else:
+            template = self.for_directory(os.path.dirname(directory))
+        self.directories[directory] = template
+        return template
@@ -0,0 +1,140 @@
+import hashlib
+import os
+import tempfile
+import unittest
+
+from assets import HEADERS_FILENAME, fingerprint_assets, fingerprinted_name, rewrite_css
+from generator import BuildOptions, RenderOptions, generate_pages_recursive
+from template import Template
+from transforms import AssetTransform, page_transforms
+
+
+def digest(data):
+    return hashlib.sha256(data).hexdigest()
+
+
+class TestFingerprintAssets(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.root = self.tmp.name
+        self.static = os.path.join(self.root, "static")
+        self.dest = os.path.join(self.root, "docs")
+        self.state = os.path.join(self.root, ".cache", "assets.json")
+        os.makedirs(os.path.join(self.static, "images"))
+        self.write(os.path.join("images", "tom.png"), b"png bytes")
+        self.write("index.css", b'body { background: url("images/tom.png?v=1"); }\nh1 { background: url(data:image/png;base64,AA==); }\n')
+        self.write("extra.css", b"p { background: url(/images/tom.png); }\n")
+        self.write("robots.txt", b"User-agent: *\n")
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def write(self, rel_path, data):
+        with open(os.path.join(self.static, rel_path), "wb") as f:
+            f.write(data)
+
+    def read(self, output):
+        with open(os.path.join(self.dest, output.lstrip("/"))) as f:
+            return f.read()
+
+    def fingerprint(self, **kwargs):
+        return fingerprint_assets(self.static, self.dest, self.state, **kwargs)
+
+    def test_copies_are_named_by_content(self):
+        assets = self.fingerprint()
+        png = "/" + fingerprinted_name("images/tom.png", digest(b"png bytes"))
+        self.assertEqual(assets["/images/tom.png"], png)
+        self.assertTrue(os.path.isfile(os.path.join(self.dest, png.lstrip("/"))))
+        self.assertNotIn("/robots.txt", assets)
+        # the stylesheet is fingerprinted after its references are rewritten
+        css = self.read(assets["/index.css"])
+        self.assertIn(f'url("{png}?v=1")', css)
+        self.assertIn("url(data:image/png;base64,AA==)", css)
+        self.assertEqual(assets["/index.css"], "/" + fingerprinted_name("index.css", digest(css.encode("utf-8"))))
+
+    def test_changed_asset_replaces_superseded_copies(self):
+        first = self.fingerprint()
+        self.write(os.path.join("images", "tom.png"), b"new png bytes")
+        second = self.fingerprint()
+        self.assertNotEqual(first["/images/tom.png"], second["/images/tom.png"])
+        # the stylesheets referencing it change name too
+        self.assertNotEqual(first["/index.css"], second["/index.css"])
+        self.assertNotEqual(first["/extra.css"], second["/extra.css"])
+        for output in (first["/images/tom.png"], first["/index.css"]):
+            self.assertFalse(os.path.exists(os.path.join(self.dest, output.lstrip("/"))))
+
+    def test_bundle_concatenates_members(self):
+        assets = self.fingerprint(bundles={"/site.css": ["/index.css", "/extra.css"]}, basepath="/repo/")
+        self.assertEqual(assets["/index.css"], assets["/extra.css"])
+        self.assertTrue(assets["/index.css"].startswith("/site."))
+        bundle = self.read(assets["/index.css"])
+        png = fingerprinted_name("images/tom.png", digest(b"png bytes"))
+        self.assertEqual(bundle.count(f"/repo/{png}"), 2)
+
+    def test_missing_bundle_member(self):
+        with self.assertRaises(ValueError):
+            self.fingerprint(bundles={"/site.css": ["/missing.css"]})
+
+    def test_headers_mark_fingerprinted_assets_immutable(self):
+        assets = self.fingerprint(headers=True)
+        headers = self.read(HEADERS_FILENAME)
+        for output in assets.values():
+            self.assertIn(f"{output}\n  Cache-Control: public, max-age=31536000, immutable\n", headers)
+        self.fingerprint()
+        self.assertFalse(os.path.exists(os.path.join(self.dest, HEADERS_FILENAME)))
+
+    def test_relative_urls_resolve_against_stylesheet(self):
+        assets = {"/images/a.png": "/images/a.1.png"}
+        self.assertEqual(rewrite_css("url('../images/a.png')", "css/site.css", assets), "url('/images/a.1.png')")
+        self.assertEqual(rewrite_css("url(https://example.com/a.png)", "site.css", assets), "url(https://example.com/a.png)")
+
+
+class TestAssetTransform(unittest.TestCase):
+    def setUp(self):
+        self.assets = AssetTransform({"/index.css": "/index.1.css", "/images/tom.png": "/images/tom.2.png"}, "/repo/")
+
+    def test_rewrites_after_basepath(self):
+        transforms = page_transforms("/repo/", assets=self.assets)
+        self.assertEqual(transforms("img", {"src": "/images/tom.png#top"}), {"src": "/repo/images/tom.2.png#top"})
+        self.assertEqual(transforms("a", {"href": "/other/"}), {"href": "/repo/other/"})
+
+    def test_template_links(self):
+        template = Template('<link href="/index.css" rel="stylesheet"><a href="/about/">{{ Content }}</a>')
+        rendered = template.with_basepath("/repo/").with_assets(self.assets).render({"Content": "x"})
+        self.assertEqual(rendered, '<link href="/repo/index.1.css" rel="stylesheet"><a href="/repo/about/">x</a>')
+        self.assertIs(template.with_assets(None), template)
+
+
+class TestFingerprintedBuild(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.root = self.tmp.name
+        self.content = os.path.join(self.root, "content")
+        self.dest = os.path.join(self.root, "docs")
+        self.template = os.path.join(self.root, "template.html")
+        self.manifest = os.path.join(self.root, ".cache", "manifest.json")
+        os.makedirs(self.content)
+        with open(self.template, "w") as f:
+            f.write('<link href="/index.css">{{ Content }}')
+        with open(os.path.join(self.content, "index.md"), "w") as f:
+            f.write("# Home\n\n![Tom](/images/tom.png)")
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def build(self, assets):
+        generate_pages_recursive(self.content, self.template, self.dest, "/", build=BuildOptions(self.manifest), options=RenderOptions(assets=AssetTransform(assets)))
+        with open(os.path.join(self.dest, "index.html")) as f:
+            return f.read()
+
+    def test_pages_link_fingerprinted_assets(self):
+        self.assertEqual(
+            self.build({"/index.css": "/index.1.css", "/images/tom.png": "/images/tom.1.png"}),
+            '<link href="/index.1.css"><div><h1>Home</h1><p><img src="/images/tom.1.png" alt="Tom"></img></p></div>',
+        )
+        # new fingerprints invalidate the incremental manifest
+        self.assertIn("tom.2.png", self.build({"/index.css": "/index.1.css", "/images/tom.png": "/images/tom.2.png"}))
+
+
+if __name__ == "__main__":
+    unittest.main()
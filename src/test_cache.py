@@ -0,0 +1,124 @@
+import os
+import pickle
+import tempfile
+import unittest
+from concurrent.futures import ProcessPoolExecutor
+
+from cache import DiskCache, LRUCache, cache_key
+
+
+def write_entries(args):
+    directory, start = args
+    cache = DiskCache(directory, 10_000)
+    for i in range(start, start + 50):
+        cache.set(cache_key(str(i)), b"x" * 100)
+    return True
+
+# Reports which earlier jobs' entries this worker still holds in memory, then
+# adds its own.
+def remember(args):
+    cache, name = args
+    held = [key for key in map(str, range(3)) if key in cache._entries]
+    cache.set_object(name, name)
+    return held
+
+
+class TestDiskCache(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.directory = os.path.join(self.tmp.name, "cache")
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def test_cache_key_separates_parts(self):
+        self.assertNotEqual(cache_key("ab", "c"), cache_key("a", "bc"))
+        self.assertEqual(cache_key("a", b"b"), cache_key("a", "b"))
+
+    def test_get_set(self):
+        cache = DiskCache(self.directory)
+        key = cache_key("page")
+        self.assertIsNone(cache.get(key))
+        cache.set(key, b"data")
+        self.assertEqual(cache.get(key), b"data")
+
+    def test_objects(self):
+        cache = DiskCache(self.directory)
+        cache.set_object("abcd", ("<p>x</p>", "Title"))
+        self.assertEqual(cache.get_object("abcd"), ("<p>x</p>", "Title"))
+
+    def test_corrupt_entry_is_a_miss(self):
+        cache = DiskCache(self.directory)
+        cache.set("abcd", b"not a pickle")
+        self.assertIsNone(cache.get_object("abcd"))
+        self.assertIsNone(cache.get("abcd"))
+
+    def test_lru_eviction(self):
+        cache = DiskCache(self.directory, max_bytes=1000)
+        keys = [cache_key(str(i)) for i in range(10)]
+        for i, key in enumerate(keys):
+            cache.set(key, b"x" * 100)
+            os.utime(cache._path(key), ns=(i * 10**9, i * 10**9))
+        cache.get(keys[0])
+        cache.set(cache_key("new"), b"x" * 100)
+
+        self.assertLessEqual(cache.total_size(), 1000)
+        self.assertIsNotNone(cache.get(keys[0]))
+        self.assertIsNone(cache.get(keys[1]))
+        self.assertIsNotNone(cache.get(cache_key("new")))
+
+    def test_shared_between_processes(self):
+        with ProcessPoolExecutor(max_workers=4) as pool:
+            list(pool.map(write_entries, [(self.directory, i * 50) for i in range(4)]))
+        cache = DiskCache(self.directory, 10_000)
+        # each process may overshoot by what it wrote since its last rescan
+        self.assertLessEqual(cache.total_size(), 10_000 + 4 * 1_000)
+        for _, _, files in os.walk(self.directory):
+            for name in files:
+                self.assertEqual(cache.get(name), b"x" * 100)
+        leftovers = [name for _, _, files in os.walk(self.directory) for name in files if name.endswith(".tmp")]
+        self.assertEqual(leftovers, [])
+
+
+class TestLRUCache(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.directory = os.path.join(self.tmp.name, "cache")
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def test_bounded_to_least_recently_used(self):
+        cache = LRUCache(2)
+        cache.set_object("a", 1)
+        cache.set_object("b", 2)
+        cache.get_object("a")
+        cache.set_object("c", 3)
+        self.assertEqual(cache.get_object("a"), 1)
+        self.assertIsNone(cache.get_object("b"))
+        self.assertEqual(cache.get_object("c"), 3)
+
+    def test_misses_fall_through_to_disk(self):
+        LRUCache(2, DiskCache(self.directory)).set_object("abcd", ("x", 1))
+        cache = LRUCache(2, DiskCache(self.directory))
+        self.assertEqual(cache.get_object("abcd"), ("x", 1))
+        # now held in memory
+        cache.backing.delete("abcd")
+        self.assertEqual(cache.get_object("abcd"), ("x", 1))
+
+    def test_unpickled_copies_share_one_instance(self):
+        cache = LRUCache(2, DiskCache(self.directory))
+        data = pickle.dumps(cache)
+        first, second = pickle.loads(data), pickle.loads(data)
+        self.assertIsNot(first, cache)
+        self.assertIs(first, second)
+        self.assertEqual(first.max_entries, 2)
+
+    def test_worker_keeps_its_memory_across_jobs(self):
+        cache = LRUCache(16, DiskCache(self.directory))
+        with ProcessPoolExecutor(max_workers=1) as pool:
+            results = list(pool.map(remember, [(cache, str(i)) for i in range(3)]))
+        self.assertEqual(results, [[], ["0"], ["0", "1"]])
+
+if __name__ == "__main__":
+    unittest.main()
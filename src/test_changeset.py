@@ -0,0 +1,61 @@
+import os
+import tempfile
+import unittest
+from unittest import mock
+
+from changeset import OutputState
+
+
+class TestOutputState(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.root = self.tmp.name
+        self.dest = os.path.join(self.root, "docs")
+        self.state_path = os.path.join(self.root, ".cache", "outputs.json")
+        os.makedirs(os.path.join(self.dest, "blog"))
+        self.write("index.html", "home")
+        self.write(os.path.join("blog", "index.html"), "blog")
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def write(self, rel_path, text):
+        with open(os.path.join(self.dest, rel_path), "w") as f:
+            f.write(text)
+
+    def update(self):
+        state = OutputState(self.dest, self.state_path)
+        changeset = state.update()
+        state.save()
+        return changeset
+
+    def test_first_run_adds_everything(self):
+        changeset = self.update()
+        self.assertEqual(sorted(changeset.added), ["blog/index.html", "index.html"])
+        self.assertFalse(changeset.changed or changeset.removed)
+
+    def test_added_changed_removed(self):
+        self.update()
+        self.write("index.html", "home, edited")
+        self.write("new.html", "new")
+        os.remove(os.path.join(self.dest, "blog", "index.html"))
+        changeset = self.update()
+        self.assertEqual(list(changeset.added), ["new.html"])
+        self.assertEqual(list(changeset.changed), ["index.html"])
+        self.assertEqual(changeset.removed, ["blog/index.html"])
+        self.assertEqual(len(changeset.changed["index.html"]), 64)
+
+    def test_rewritten_with_same_bytes_is_not_a_change(self):
+        self.update()
+        os.utime(os.path.join(self.dest, "index.html"), ns=(0, 0))
+        self.assertFalse(self.update())
+
+    def test_unchanged_files_are_not_hashed(self):
+        self.update()
+        with mock.patch("changeset.hash_file") as hash_file:
+            self.assertFalse(self.update())
+        hash_file.assert_not_called()
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,83 @@
+import gzip
+import json
+import os
+import tempfile
+import unittest
+from unittest import mock
+
+from compress import compress_outputs
+
+
+class TestCompressOutputs(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.root = self.tmp.name
+        self.dest = os.path.join(self.root, "docs")
+        self.state = os.path.join(self.root, ".cache", "compressed.json")
+        os.makedirs(os.path.join(self.dest, "blog"))
+        self.write("index.html", "<p>home</p>" * 200)
+        self.write(os.path.join("blog", "index.html"), "<p>blog</p>" * 200)
+        self.write("small.css", "p{}")
+        self.write("image.png", "x" * 5000)
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def write(self, rel_path, text):
+        with open(os.path.join(self.dest, rel_path), "w") as f:
+            f.write(text)
+
+    def path(self, *parts):
+        return os.path.join(self.dest, *parts)
+
+    def compress(self, **kwargs):
+        return compress_outputs(self.dest, self.state, workers=2, **kwargs)
+
+    def test_writes_deterministic_gzip_siblings(self):
+        self.compress()
+        with gzip.open(self.path("index.html.gz"), "rb") as f:
+            self.assertEqual(f.read(), b"<p>home</p>" * 200)
+        self.assertTrue(os.path.isfile(self.path("blog", "index.html.gz")))
+        self.assertFalse(os.path.exists(self.path("small.css.gz")))
+        self.assertFalse(os.path.exists(self.path("image.png.gz")))
+
+        with open(self.path("index.html.gz"), "rb") as f:
+            first = f.read()
+        os.remove(self.path("index.html.gz"))
+        self.compress()
+        with open(self.path("index.html.gz"), "rb") as f:
+            self.assertEqual(f.read(), first)
+
+    def test_up_to_date_files_are_skipped(self):
+        self.compress()
+        # same bytes with a new mtime: hashed again, but not recompressed
+        os.utime(self.path("index.html"), ns=(0, 0))
+        with mock.patch("compress.compress_file") as compress_file:
+            self.compress()
+        compress_file.assert_not_called()
+
+        self.write("index.html", "<p>edited</p>" * 200)
+        self.compress()
+        with gzip.open(self.path("index.html.gz"), "rb") as f:
+            self.assertEqual(f.read(), b"<p>edited</p>" * 200)
+
+    def test_stale_siblings_are_removed(self):
+        self.compress()
+        os.remove(self.path("blog", "index.html"))
+        self.write("index.html", "tiny")
+        self.compress()
+        self.assertFalse(os.path.exists(self.path("blog", "index.html.gz")))
+        self.assertFalse(os.path.exists(self.path("index.html.gz")))
+
+    def test_etags(self):
+        etags_path = os.path.join(self.root, "etags.json")
+        self.compress(etags_path=etags_path)
+        with open(etags_path) as f:
+            etags = json.load(f)
+        self.assertEqual(set(etags["index.html"]), {"etag", "gzip_etag"})
+        self.assertEqual(set(etags["small.css"]), {"etag"})
+        self.assertNotEqual(etags["index.html"]["etag"], etags["blog/index.html"]["etag"])
+
+
+if __name__ == "__main__":
+    unittest.main()
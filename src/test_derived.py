@@ -0,0 +1,99 @@
+import os
+import unittest
+
+from derived import DerivedOptions, entry_updated, slugify, sort_entries
+from generator import BuildOptions, generate_pages_recursive
+from sitetest import SiteTestCase
+
+
+TEMPLATE = "<title>{{ Title }}</title>{{ Content }}"
+
+
+class TestDerivedPages(SiteTestCase):
+    template_text = TEMPLATE
+
+    def setUp(self):
+        super().setUp()
+        self.index = os.path.join(self.root, ".cache", "site-index.json")
+        self.write("index.md", "# Home")
+        for number in range(1, 6):
+            self.write(
+                os.path.join("blog", f"post{number}", "index.md"),
+                f"---\ndate: 2024-01-0{number}\ntags: [{'odd' if number % 2 else 'even'}, Middle Earth]\n---\n# Post {number}",
+            )
+
+    def build(self, **options):
+        options.setdefault("page_size", 2)
+        return generate_pages_recursive(self.content, self.template, self.dest, "/", build=BuildOptions(index_path=self.index, derived=DerivedOptions(**options)))
+
+    def test_paginated_listing_newest_first(self):
+        self.build()
+        first = self.read("blog", "index.html")
+        self.assertLess(first.index("Post 5"), first.index("Post 4"))
+        self.assertNotIn("Post 3", first)
+        self.assertIn('<a href="/blog/page/2/" rel="next">Older</a>', first)
+        third = self.read("blog", "page", "3", "index.html")
+        self.assertIn("Post 1", third)
+        self.assertIn('<a href="/blog/page/2/" rel="prev">Newer</a>', third)
+        self.assertNotIn("Older", third)
+
+    def test_tag_pages(self):
+        self.build(page_size=10)
+        even = self.read("tags", "even", "index.html")
+        self.assertIn("Post 2", even)
+        self.assertNotIn("Post 1", even)
+        self.assertIn("Post 3", self.read("tags", "middle-earth", "index.html"))
+
+    def test_feed_and_sitemap_need_site_url(self):
+        self.build()
+        self.assertFalse(os.path.exists(os.path.join(self.dest, "feed.xml")))
+        self.build(site_url="https://example.com/", feed_title="Posts")
+        feed = self.read("feed.xml")
+        self.assertIn("<title>Posts</title>", feed)
+        self.assertIn("<author><name>Posts</name></author>", feed)
+        self.assertIn('<link href="https://example.com/blog/post5/"/>', feed)
+        self.assertIn("<updated>2024-01-05T00:00:00Z</updated>", feed)
+        self.assertNotIn("Home", feed)
+        sitemap = self.read("sitemap.xml")
+        self.assertIn("<loc>https://example.com/</loc>", sitemap)
+        self.assertIn("<loc>https://example.com/blog/post1/</loc><lastmod>2024-01-01</lastmod>", sitemap)
+        self.assertIn("<loc>https://example.com/blog/page/2/</loc>", sitemap)
+
+    def test_outputs_no_longer_generated_are_removed(self):
+        self.build()
+        self.assertTrue(os.path.exists(os.path.join(self.dest, "blog", "page", "3", "index.html")))
+        self.build(page_size=10)
+        self.assertFalse(os.path.exists(os.path.join(self.dest, "blog", "page", "3", "index.html")))
+        self.assertTrue(os.path.exists(os.path.join(self.dest, "blog", "index.html")))
+
+    def test_content_page_wins_over_listing(self):
+        self.write(os.path.join("blog", "index.md"), "# My Blog")
+        self.build()
+        self.assertIn("My Blog", self.read("blog", "index.html"))
+
+
+class TestHelpers(unittest.TestCase):
+    def test_sort_entries(self):
+        entries = [
+            {"url": "/b/", "title": "B"},
+            {"url": "/old/", "title": "Old", "date": "2020-01-01"},
+            {"url": "/a/", "title": "A"},
+            {"url": "/new/", "title": "New", "date": "2024-01-01"},
+        ]
+        self.assertEqual([entry["url"] for entry in sort_entries(entries)], ["/new/", "/old/", "/a/", "/b/"])
+
+    def test_entry_updated_falls_back_to_mtime(self):
+        stat = [0, 86400 * 10**9]
+        self.assertEqual(entry_updated({"url": "/a/", "date": "2024-05-01", "stat": stat}), "2024-05-01T00:00:00Z")
+        self.assertEqual(entry_updated({"url": "/a/", "date": "2024-05-01T10:00:00+02:00", "stat": stat}), "2024-05-01T10:00:00+02:00")
+        for date in ("March 2024", "2024-13-01", "2024-05-01 10:00"):
+            with self.assertLogs("derived", "WARNING"):
+                self.assertEqual(entry_updated({"url": "/a/", "date": date, "stat": stat}), "1970-01-02T00:00:00Z")
+
+    def test_slugify(self):
+        self.assertEqual(slugify("Middle Earth!"), "middle-earth")
+        self.assertEqual(slugify("???"), "tag")
+
+
+if __name__ == "__main__":
+    unittest.main()
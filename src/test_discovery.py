@@ -0,0 +1,64 @@
+import os
+import sys
+import tempfile
+import unittest
+
+from discovery import first_file, walk_sorted
+
+
+class TestWalkSorted(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.root = self.tmp.name
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def touch(self, *parts):
+        path = os.path.join(self.root, *parts)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        open(path, "w").close()
+        return path
+
+    def test_sorted_depth_first_order(self):
+        for parts in [("b", "index.md"), ("a", "z", "index.md"), ("a", "index.md"), ("index.md",), ("a", "b", "index.md"), ("notes.txt",)]:
+            self.touch(*parts)
+        walked = [
+            (os.path.relpath(directory, self.root), [entry.name for entry in files])
+            for directory, files in walk_sorted(self.root, ".md")
+        ]
+        self.assertEqual(walked, [
+            (".", ["index.md"]),
+            ("a", ["index.md"]),
+            (os.path.join("a", "b"), ["index.md"]),
+            (os.path.join("a", "z"), ["index.md"]),
+            ("b", ["index.md"]),
+        ])
+
+    def test_deep_trees_do_not_recurse(self):
+        directory = self.root
+        for _ in range(300):
+            directory = os.path.join(directory, "d")
+            os.mkdir(directory)
+        # a recursive walk would need a frame per level
+        limit = sys.getrecursionlimit()
+        sys.setrecursionlimit(150)
+        try:
+            count = sum(1 for _ in walk_sorted(self.root))
+        finally:
+            sys.setrecursionlimit(limit)
+        self.assertEqual(count, 301)
+
+    def test_missing_root(self):
+        self.assertEqual(list(walk_sorted(os.path.join(self.root, "missing"))), [])
+
+    def test_first_file(self):
+        self.touch("b.md")
+        self.touch("a.md")
+        self.touch("sub", "0.md")
+        self.assertEqual(first_file(self.root, ".md"), os.path.join(self.root, "a.md"))
+        self.assertIsNone(first_file(self.root, ".html"))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,97 @@
+import os
+import tempfile
+import unittest
+
+from frontmatter import MAX_HEADER_LINES, parse_front_matter, read_front_matter, split_front_matter, split_front_matter_lines
+
+
+class TestParseFrontMatter(unittest.TestCase):
+    def test_scalars_and_lists(self):
+        metadata = parse_front_matter([
+            "title: \"Hello: World\"\n",
+            "date: 2024-05-01\n",
+            "tags: [tolkien, elves]\n",
+            "draft: yes\n",
+            "template: post.html\n",
+        ])
+        self.assertEqual(metadata, {
+            "title": "Hello: World",
+            "date": "2024-05-01",
+            "tags": ["tolkien", "elves"],
+            "draft": True,
+            "template": "post.html",
+        })
+
+    def test_booleans_only_for_draft(self):
+        metadata = parse_front_matter(["title: No\n", "tags: [yes, no]\n", "draft: False\n"])
+        self.assertEqual(metadata["title"], "No")
+        self.assertEqual(metadata["tags"], ["yes", "no"])
+        self.assertIs(metadata["draft"], False)
+        self.assertIs(parse_front_matter(["draft: TRUE\n"])["draft"], True)
+
+    def test_block_list_and_comments(self):
+        metadata = parse_front_matter(["# a comment\n", "tags:\n", "  - one\n", "  - two\n", "\n"])
+        self.assertEqual(metadata["tags"], ["one", "two"])
+
+    def test_defaults(self):
+        metadata = parse_front_matter([])
+        self.assertEqual(metadata, {"title": None, "date": None, "tags": [], "draft": False, "template": None})
+
+    def test_comma_separated_tags(self):
+        self.assertEqual(parse_front_matter(["tags: a, b ,c\n"])["tags"], ["a", "b", "c"])
+
+    def test_invalid_line(self):
+        with self.assertRaises(ValueError):
+            parse_front_matter(["not front matter\n"])
+
+
+class TestSplitFrontMatter(unittest.TestCase):
+    def test_split(self):
+        metadata, body = split_front_matter("---\ntitle: Home\n---\n# Heading\n\nText")
+        self.assertEqual(metadata["title"], "Home")
+        self.assertEqual(body, "# Heading\n\nText")
+
+    def test_no_front_matter(self):
+        text = "# Heading\n\n---\n\nText"
+        metadata, body = split_front_matter(text)
+        self.assertIsNone(metadata["title"])
+        self.assertIs(body, text)
+
+    def test_unclosed_header_is_content(self):
+        text = "---\n\nText"
+        self.assertEqual(split_front_matter(text)[1], text)
+
+    def test_split_lines(self):
+        metadata, body = split_front_matter_lines(iter(["---", "title: Home", "---", "# Heading", "", "Text"]))
+        self.assertEqual(metadata["title"], "Home")
+        self.assertEqual(list(body), ["# Heading", "", "Text"])
+
+    def test_split_lines_unclosed_header_is_content(self):
+        lines = ["---", "", "Text"]
+        self.assertEqual(list(split_front_matter_lines(iter(lines))[1]), lines)
+
+
+class TestReadFrontMatter(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.tmp.name, "index.md")
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def write(self, text):
+        with open(self.path, "w") as f:
+            f.write(text)
+
+    def test_reads_header_only(self):
+        # the body is not valid front matter, so reading it would raise
+        self.write("---\ndraft: true\n---\n" + "body: line\nnot front matter\n" * 1000)
+        self.assertTrue(read_front_matter(self.path)["draft"])
+
+    def test_overlong_header_is_ignored(self):
+        self.write("---\n" + "key: value\n" * (MAX_HEADER_LINES + 1) + "---\n")
+        self.assertEqual(read_front_matter(self.path)["tags"], [])
+
+
+if __name__ == "__main__":
+    unittest.main()
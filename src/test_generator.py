@@ -0,0 +1,347 @@
+import json
+import os
+import tracemalloc
+import unittest
+from unittest import mock
+
+from cache import DiskCache, LRUCache
+from executor import chunk_size, iter_jobs, run_jobs
+from generator import BuildOptions, RenderOptions, generate_page, generate_pages_recursive
+from md_to_html import block_to_html_node
+from metrics import BuildMetrics
+from sitetest import TEMPLATE, SiteTestCase
+
+
+class TestIncrementalBuild(SiteTestCase):
+    def setUp(self):
+        super().setUp()
+        self.manifest = os.path.join(self.root, ".cache", "manifest.json")
+        self.write("index.md", "# Home\n\nWelcome")
+        self.write(os.path.join("blog", "post", "index.md"), "# Post\n\nBody")
+
+    def build(self, basepath="/"):
+        generate_pages_recursive(self.content, self.template, self.dest, basepath, build=BuildOptions(self.manifest))
+
+    def mtimes(self):
+        return {
+            "home": os.stat(os.path.join(self.dest, "index.html")).st_mtime_ns,
+            "post": os.stat(os.path.join(self.dest, "blog", "post", "index.html")).st_mtime_ns,
+        }
+
+    def touch_outputs_in_past(self):
+        for path in (os.path.join(self.dest, "index.html"), os.path.join(self.dest, "blog", "post", "index.html")):
+            os.utime(path, ns=(0, 0))
+
+    def test_unchanged_pages_are_skipped(self):
+        self.build()
+        self.touch_outputs_in_past()
+        self.build()
+        self.assertEqual(self.mtimes(), {"home": 0, "post": 0})
+
+    def test_single_edit_rerenders_one_page(self):
+        self.build()
+        self.touch_outputs_in_past()
+        self.write(os.path.join("blog", "post", "index.md"), "# Post\n\nEdited")
+        self.build()
+        mtimes = self.mtimes()
+        self.assertEqual(mtimes["home"], 0)
+        self.assertNotEqual(mtimes["post"], 0)
+        self.assertIn("<p>Edited</p>", self.read("blog", "post", "index.html"))
+
+    def test_template_change_invalidates_everything(self):
+        self.build()
+        self.touch_outputs_in_past()
+        self.write(self.template, "<main>" + TEMPLATE + "</main>")
+        self.build()
+        self.assertNotIn(0, self.mtimes().values())
+
+    def test_basepath_change_invalidates_everything(self):
+        self.write("index.md", "# Home\n\n[Post](/blog/post)")
+        self.write(os.path.join("blog", "post", "index.md"), "# Post\n\n[Home](/)")
+        self.build()
+        self.touch_outputs_in_past()
+        self.build("/site/")
+        self.assertNotIn(0, self.mtimes().values())
+
+    def test_identical_output_is_not_rewritten(self):
+        self.build()
+        self.touch_outputs_in_past()
+        # a basepath change re-renders every page, but these have no root links
+        self.build("/site/")
+        self.assertEqual(self.mtimes(), {"home": 0, "post": 0})
+
+    def test_minify_change_invalidates_everything(self):
+        self.write(self.template, "<html>\n  {{ Content }}\n</html>")
+        self.build()
+        self.touch_outputs_in_past()
+        generate_pages_recursive(self.content, self.template, self.dest, "/", build=BuildOptions(self.manifest), options=RenderOptions(minify=True))
+        self.assertNotIn(0, self.mtimes().values())
+
+    def test_removed_source_deletes_output(self):
+        self.build()
+        os.remove(os.path.join(self.content, "blog", "post", "index.md"))
+        self.build()
+        self.assertFalse(os.path.exists(os.path.join(self.dest, "blog", "post", "index.html")))
+        self.assertTrue(os.path.exists(os.path.join(self.dest, "index.html")))
+
+    def test_failed_write_is_reported_and_retried(self):
+        blocked = os.path.join(self.dest, "blog", "post", "index.html")
+        os.makedirs(blocked)
+        failures = generate_pages_recursive(self.content, self.template, self.dest, "/", build=BuildOptions(self.manifest))
+        self.assertEqual([source for source, _ in failures], [os.path.join(self.content, "blog", "post", "index.md")])
+        os.rmdir(blocked)
+        self.assertEqual(generate_pages_recursive(self.content, self.template, self.dest, "/", build=BuildOptions(self.manifest)), [])
+        self.assertTrue(os.path.isfile(blocked))
+
+
+def square(n):
+    return n * n
+
+
+class TestExecutors(unittest.TestCase):
+    def test_results_keep_job_order(self):
+        jobs = list(range(20))
+        expected = [n * n for n in jobs]
+        for executor in ("serial", "thread", "process"):
+            self.assertEqual(run_jobs(square, jobs, executor, 3), expected)
+
+    def test_unknown_executor(self):
+        with self.assertRaises(ValueError):
+            run_jobs(square, [1], "cluster")
+
+    def test_iter_jobs_is_lazy_and_ordered(self):
+        consumed = []
+
+        def jobs():
+            for n in range(100):
+                consumed.append(n)
+                yield n
+
+        for executor in ("serial", "thread", "process"):
+            consumed.clear()
+            results = iter_jobs(square, jobs(), executor, workers=2, window=2)
+            self.assertEqual(next(results), (0, 0))
+            self.assertLess(len(consumed), 100)
+            self.assertEqual(list(results), [(n, n * n) for n in range(1, 100)])
+
+    def test_chunk_size(self):
+        self.assertEqual(chunk_size(3, 8), 1)
+        self.assertEqual(chunk_size(1000, 8), 31)
+
+
+class TestParallelBuild(SiteTestCase):
+    def setUp(self):
+        super().setUp()
+        for i in range(12):
+            self.write(os.path.join(f"page{i}", "index.md"), f"# Page {i}\n\nSome **bold** text and a [link](/page{i})")
+
+    def build(self, executor):
+        dest = os.path.join(self.root, executor)
+        os.makedirs(dest)
+        failures = generate_pages_recursive(self.content, self.template, dest, "/", build=BuildOptions(executor=executor, workers=4))
+        outputs = {}
+        for i in range(12):
+            with open(os.path.join(dest, f"page{i}", "index.html"), "rb") as f:
+                outputs[i] = f.read()
+        return failures, outputs
+
+    def test_parallel_output_matches_serial(self):
+        serial_failures, serial = self.build("serial")
+        self.assertEqual(serial_failures, [])
+        for executor in ("thread", "process"):
+            failures, outputs = self.build(executor)
+            self.assertEqual(failures, [])
+            self.assertEqual(outputs, serial)
+
+    def test_failures_report_source_path(self):
+        broken = os.path.join(self.content, "page3", "index.md")
+        self.write(broken, "no title here")
+        dest = os.path.join(self.root, "out")
+        os.makedirs(dest)
+        failures = generate_pages_recursive(self.content, self.template, dest, "/", build=BuildOptions(executor="process", workers=4))
+        self.assertEqual([source for source, _ in failures], [broken])
+        self.assertIn("No title found", failures[0][1])
+        self.assertTrue(os.path.exists(os.path.join(dest, "page4", "index.html")))
+
+
+class TestParseCache(SiteTestCase):
+    def setUp(self):
+        super().setUp()
+        self.cache = DiskCache(os.path.join(self.root, ".cache", "parsed"))
+        self.write("index.md", "# Home\n\nA [link](/about)")
+
+    def build(self, basepath="/"):
+        metrics = BuildMetrics()
+        generate_pages_recursive(self.content, self.template, self.dest, basepath, metrics=metrics, options=RenderOptions(parse_cache=self.cache))
+        return metrics.report()["stages"], self.read("index.html")
+
+    def test_template_change_skips_parsing(self):
+        stages, _ = self.build()
+        self.assertIn("parse", stages)
+        self.write(self.template, "<main>{{ Content }}</main>")
+        stages, html = self.build()
+        self.assertNotIn("parse", stages)
+        self.assertEqual(html, '<main><div><h1>Home</h1><p>A <a href="/about">link</a></p></div></main>')
+
+    def test_basepath_change_uses_cached_content(self):
+        self.build()
+        stages, html = self.build("/site/")
+        self.assertNotIn("parse", stages)
+        self.assertIn('href="/site/about"', html)
+
+
+class TestBlockCache(SiteTestCase):
+    def setUp(self):
+        super().setUp()
+        self.blocks = os.path.join(self.root, ".cache", "blocks")
+        self.write("index.md", "# Home\n\nA [link](/about)\n\n> Shared disclaimer")
+        self.write(os.path.join("other", "index.md"), "# Other\n\n> Shared disclaimer")
+
+    def build(self, block_cache=None):
+        generate_pages_recursive(self.content, self.template, self.dest, "/", options=RenderOptions(block_cache=block_cache))
+        return self.read("index.html")
+
+    def cache(self):
+        return LRUCache(16, DiskCache(self.blocks))
+
+    def test_output_matches_uncached_build(self):
+        expected = self.build()
+        self.assertEqual(self.build(self.cache()), expected)
+        self.assertEqual(self.build(self.cache()), expected)
+
+    def test_shared_and_unchanged_blocks_are_rendered_once(self):
+        with mock.patch("generator.block_to_html_node", wraps=block_to_html_node) as render:
+            self.build(self.cache())
+            # the disclaimer is shared by both pages
+            self.assertEqual(render.call_count, 4)
+            render.reset_mock()
+            self.write("index.md", "# Home\n\nAn edited [link](/about)\n\n> Shared disclaimer")
+            html = self.build(self.cache())
+        self.assertEqual([call.args[0].text for call in render.call_args_list], ["An edited [link](/about)"])
+        self.assertIn("<p>An edited <a", html)
+
+
+class TestMinify(SiteTestCase):
+    template_text = "<html>\n  <body>\n    {{ Content }}\n  </body>\n</html>\n"
+
+    def test_minify_keeps_code_whitespace(self):
+        self.write("index.md", "# Home\n\n![A cat](/cat.png)\n\n```\nif x:\n    y\n```")
+        generate_pages_recursive(self.content, self.template, self.dest, "/", options=RenderOptions(minify=True))
+        self.assertEqual(
+            self.read("index.html"),
+            "<html><body><div><h1>Home</h1><p><img src=/cat.png alt=\"A cat\"></img></p><pre><code>if x:\n    y\n</code></pre></div></body></html>",
+        )
+
+
+class TestFrontMatter(SiteTestCase):
+    def setUp(self):
+        super().setUp()
+        self.index = os.path.join(self.root, ".cache", "site-index.json")
+        self.write(os.path.join(self.root, "post.html"), "<article>{{ Title }} {{ Date }} {{ Tags }}|{{ Content }}</article>")
+        self.write("index.md", "# Home\n\nWelcome")
+        self.write(os.path.join("post", "index.md"), "---\ntitle: A Post\ndate: 2024-05-01\ntags: [a, b]\ntemplate: post.html\n---\nBody")
+
+    def build(self, include_drafts=False):
+        return generate_pages_recursive(self.content, self.template, self.dest, "/", build=BuildOptions(index_path=self.index, include_drafts=include_drafts))
+
+    def test_front_matter_sets_title_and_template(self):
+        self.assertEqual(self.build(), [])
+        self.assertEqual(self.read("post", "index.html"), "<article>A Post 2024-05-01 a, b|<div><p>Body</p></div></article>")
+
+    def test_index_records_every_page(self):
+        self.build()
+        with open(self.index) as f:
+            pages = json.load(f)["pages"]
+        self.assertEqual(pages["index.md"]["title"], "Home")
+        self.assertEqual(pages["index.md"]["url"], "/")
+        self.assertEqual(pages[os.path.join("post", "index.md")]["url"], "/post/")
+        self.assertEqual(pages[os.path.join("post", "index.md")]["tags"], ["a", "b"])
+
+    def test_missing_template_fails_only_that_page(self):
+        self.write(os.path.join("post", "index.md"), "---\ntemplate: nope.html\n---\n# Post")
+        failures = self.build()
+        self.assertEqual([source for source, _ in failures], [os.path.join(self.content, "post", "index.md")])
+        self.assertIn("nope.html", failures[0][1])
+        self.assertTrue(os.path.exists(os.path.join(self.dest, "index.html")))
+
+    def test_invalid_front_matter_fails_only_that_page(self):
+        self.build()
+        self.write(os.path.join("post", "index.md"), "---\nnot valid\n---\n# Post")
+        failures = self.build()
+        self.assertEqual([source for source, _ in failures], [os.path.join(self.content, "post", "index.md")])
+        self.assertIn("Invalid front matter on line 2", failures[0][1])
+        self.assertTrue(os.path.exists(os.path.join(self.dest, "index.html")))
+        with open(self.index) as f:
+            self.assertNotIn("url", json.load(f)["pages"].get(os.path.join("post", "index.md"), {}))
+
+    def test_drafts_are_skipped_and_unpublished(self):
+        self.build()
+        # a draft with a body that would fail to render is never read past its header
+        self.write(os.path.join("post", "index.md"), "---\ndraft: true\n---\nno heading")
+        self.assertEqual(self.build(), [])
+        self.assertFalse(os.path.exists(os.path.join(self.dest, "post", "index.html")))
+        self.assertTrue(os.path.exists(os.path.join(self.dest, "index.html")))
+
+        self.write(os.path.join("post", "index.md"), "---\ndraft: true\ntitle: Draft\n---\nno heading")
+        self.assertEqual(self.build(include_drafts=True), [])
+        self.assertTrue(os.path.exists(os.path.join(self.dest, "post", "index.html")))
+
+
+class TestStreaming(SiteTestCase):
+    def setUp(self):
+        super().setUp()
+        self.source = os.path.join(self.content, "big.md")
+        blocks = ["# Big", "Intro with [a link](/docs/) and *emphasis*"]
+        for number in range(4000):
+            blocks.append(f"## Section {number}\n\nSome **text** about `item {number}` and [more](/item/{number}/).\n\n- one\n- two")
+        self.write(self.source, "---\ntags: big\n---\n" + "\n\n".join(blocks))
+
+    def render(self, name, **options):
+        title = generate_page(self.source, self.template, os.path.join(self.dest, name), "/base/", options=RenderOptions(**options))
+        return title, self.read(name)
+
+    def test_streamed_page_matches_buffered_page(self):
+        for minify in (False, True):
+            with self.subTest(minify=minify):
+                expected = self.render("buffered.html", minify=minify)
+                self.assertEqual(self.render("streamed.html", minify=minify, stream_threshold=1), expected)
+                self.assertEqual(expected[0], "Big")
+
+    def test_identical_streamed_output_is_not_rewritten(self):
+        dest = os.path.join(self.dest, "streamed.html")
+        generate_page(self.source, self.template, dest, "/base/", options=RenderOptions(stream_threshold=1))
+        os.utime(dest, ns=(0, 0))
+        generate_page(self.source, self.template, dest, "/base/", options=RenderOptions(stream_threshold=1))
+        self.assertEqual(os.stat(dest).st_mtime_ns, 0)
+        self.assertEqual(os.listdir(self.dest), ["streamed.html"])
+        with open(self.source, "a") as f:
+            f.write("\n\nOne more paragraph")
+        generate_page(self.source, self.template, dest, "/base/", options=RenderOptions(stream_threshold=1))
+        self.assertNotEqual(os.stat(dest).st_mtime_ns, 0)
+
+    def peak_memory(self, **options):
+        dest = os.path.join(self.dest, "measured.html")
+        # a first render loads the template and compiles the patterns
+        generate_page(self.source, self.template, dest, "/base/", options=RenderOptions(**options))
+        tracemalloc.start()
+        try:
+            generate_page(self.source, self.template, dest, "/base/", options=RenderOptions(**options))
+            return tracemalloc.get_traced_memory()[1]
+        finally:
+            tracemalloc.stop()
+
+    def test_memory_is_bounded_by_block(self):
+        buffered = self.peak_memory()
+        streamed = self.peak_memory(stream_threshold=1)
+        self.assertGreater(buffered, os.path.getsize(self.source))
+        self.assertLess(streamed, buffered / 4)
+
+    def test_template_without_content_slot_fails(self):
+        self.write(self.template, "<html>{{ Title }}</html>")
+        with self.assertRaises(ValueError):
+            self.render("streamed.html", stream_threshold=1)
+        self.assertEqual(os.listdir(self.dest), [])
+
+
+if __name__ == "__main__":
+    unittest.main()
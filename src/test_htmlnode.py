@@ -1,6 +1,8 @@
+import io
+import pickle
 import unittest
 
-from htmlnode import HTMLNode, LeafNode, ParentNode, ParentNode
+from htmlnode import HTMLNode, LeafNode, ParentNode, ParentNode, EMPTY_CHILDREN, EMPTY_PROPS
 
 
 class TestHtmlNode(unittest.TestCase):
@@ -22,6 +24,10 @@ class TestHtmlNode(unittest.TestCase):
         node = HTMLNode(tag="p", value="Hello World", props={"class": "text", "id": "paragraph"})
         self.assertEqual(node.props_to_html(), ' class="text" id="paragraph"')
 
+    def test_compact_props_to_html(self):
+        node = HTMLNode(tag="img", value="", props={"src": "/a.png", "alt": "two words", "title": "", "data-x": "a=b"})
+        self.assertEqual(node.props_to_html(compact=True), ' src=/a.png alt="two words" title data-x="a=b"')
+
     def test_empty_props_to_html(self):
         node = HTMLNode(tag="p", value="Hello World")
         self.assertEqual(node.props_to_html(), '')
@@ -87,5 +93,61 @@ class TestHtmlNode(unittest.TestCase):
         node = LeafNode("img", "", {"src": "/images/tolkien.png", "alt": "JRR Tolkien sitting"})
         self.assertEqual(node.to_html(), '<img src="/images/tolkien.png" alt="JRR Tolkien sitting"></img>')
 
+    def test_iter_html_matches_to_html(self):
+        node = ParentNode("div", [
+            ParentNode("p", [LeafNode(None, "Hello "), LeafNode("b", "world")], {"class": "intro"}),
+            ParentNode("ul", [ParentNode("li", [LeafNode("a", "link", {"href": "/x"})])]),
+        ])
+        self.assertEqual("".join(node.iter_html()), node.to_html())
+        self.assertEqual(list(node.iter_html())[:3], ['<div>', '<p class="intro">', 'Hello '])
+
+    def test_iter_html_child_not_htmlnode(self):
+        parent_node = ParentNode("div", ["not a html node"])
+        with self.assertRaises(ValueError):
+            list(parent_node.iter_html())
+
+    def test_write_to_stream(self):
+        node = ParentNode("div", [ParentNode("span", [LeafNode("b", "deep")])])
+        stream = io.StringIO()
+        node.write_to(stream)
+        self.assertEqual(stream.getvalue(), "<div><span><b>deep</b></span></div>")
+
+    def test_deep_nesting(self):
+        node = LeafNode("b", "x")
+        for _ in range(2000):
+            node = ParentNode("span", [node])
+        html = "".join(node.iter_html())
+        self.assertTrue(html.startswith("<span><span>"))
+        self.assertEqual(len(html), 2000 * len("<span></span>") + len("<b>x</b>"))
+
+    def test_nodes_have_no_instance_dict(self):
+        for node in (HTMLNode("p", "x"), LeafNode("b", "x"), ParentNode("div", [])):
+            self.assertFalse(hasattr(node, "__dict__"))
+
+    def test_shared_empty_sentinels(self):
+        first = LeafNode("b", "one")
+        second = LeafNode("i", "two")
+        self.assertIs(first.props, EMPTY_PROPS)
+        self.assertIs(first.children, second.children)
+        self.assertEqual(first.children, [])
+        self.assertEqual(first.props, {})
+
+    def test_empty_sentinels_are_immutable(self):
+        node = LeafNode("b", "text")
+        with self.assertRaises(TypeError):
+            node.props["class"] = "x"
+        with self.assertRaises(TypeError):
+            node.children.append(LeafNode(None, "x"))
+        self.assertEqual(EMPTY_PROPS, {})
+        self.assertEqual(EMPTY_CHILDREN, [])
+
+    def test_pickle_preserves_sentinels(self):
+        node = ParentNode("p", [LeafNode("a", "link", {"href": "/x"}), LeafNode(None, "text")])
+        copy = pickle.loads(pickle.dumps(node))
+        self.assertEqual(copy, node)
+        self.assertIs(copy.children[1].props, EMPTY_PROPS)
+        self.assertIs(copy.children[1].children, EMPTY_CHILDREN)
+
+
 if __name__ == "__main__":
     unittest.main()
\ No newline at end of file
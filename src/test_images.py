@@ -0,0 +1,119 @@
+import os
+import struct
+import tempfile
+import unittest
+from unittest import mock
+
+from images import ImageOptions, image_sizes, read_image_size
+from transforms import ImageTransform, page_transforms
+
+
+def png(width, height):
+    return b"\x89PNG\r\n\x1a\n\x00\x00\x00\x0dIHDR" + struct.pack(">II", width, height) + b"\x08\x06\x00\x00\x00"
+
+def riff(chunk, payload):
+    return b"RIFF" + struct.pack("<I", 4 + 8 + len(payload)) + b"WEBP" + chunk + struct.pack("<I", len(payload)) + payload
+
+
+class TestReadImageSize(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def size(self, filename, data):
+        path = os.path.join(self.tmp.name, filename)
+        with open(path, "wb") as f:
+            f.write(data)
+        return read_image_size(path)
+
+    def test_png_and_gif(self):
+        self.assertEqual(self.size("a.png", png(640, 480)), (640, 480))
+        self.assertEqual(self.size("a.gif", b"GIF89a" + struct.pack("<HH", 5, 4) + b"\x00" * 8), (5, 4))
+
+    def test_webp(self):
+        lossy = b"\x30\x01\x00\x9d\x01\x2a" + struct.pack("<HH", 300, 200) + b"\x00" * 4
+        self.assertEqual(self.size("a.webp", riff(b"VP8 ", lossy)), (300, 200))
+        bits = (299 | (199 << 14)).to_bytes(4, "little")
+        self.assertEqual(self.size("b.webp", riff(b"VP8L", b"\x2f" + bits + b"\x00" * 4)), (300, 200))
+        extended = b"\x00" * 4 + (299).to_bytes(3, "little") + (199).to_bytes(3, "little")
+        self.assertEqual(self.size("c.webp", riff(b"VP8X", extended)), (300, 200))
+
+    def test_truncated_webp(self):
+        self.assertIsNone(self.size("a.webp", b"RIFF\x00\x00\x00\x00WEBPVP8L"))
+        self.assertIsNone(self.size("b.webp", riff(b"VP8 ", b"\x30\x01\x00\x9d\x01\x2a")[:28]))
+        self.assertIsNone(self.size("c.webp", riff(b"VP8X", b"\x00" * 6)))
+
+    def test_jpeg_skips_segments_before_the_frame(self):
+        app0 = b"\xff\xe0" + struct.pack(">H", 16) + b"JFIF\x00" + b"\x00" * 9
+        frame = b"\xff\xc0" + struct.pack(">HBHHB", 17, 8, 480, 640, 3) + b"\x00" * 9
+        self.assertEqual(self.size("a.jpg", b"\xff\xd8" + app0 + frame), (640, 480))
+        self.assertIsNone(self.size("b.jpg", b"\xff\xd8" + app0))
+
+    def test_svg(self):
+        self.assertEqual(self.size("a.svg", b'<?xml version="1.0"?>\n<svg xmlns="http://www.w3.org/2000/svg" width="40px" height="30.4">'), (40, 30))
+        self.assertEqual(self.size("b.svg", b'<svg viewBox="0 0 120 80" width="100%">'), (120, 80))
+        self.assertIsNone(self.size("c.svg", b'<svg width="2em" height="1em">'))
+
+    def test_unknown_format(self):
+        self.assertIsNone(self.size("a.png", b"not an image"))
+
+
+class TestImageSizes(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.static = os.path.join(self.tmp.name, "static")
+        self.state = os.path.join(self.tmp.name, ".cache", "images.json")
+        os.makedirs(os.path.join(self.static, "images"))
+        self.write(os.path.join("images", "a.png"), png(10, 20))
+        self.write(os.path.join("images", "copy.png"), png(10, 20))
+        self.write("index.css", b"p {}")
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def write(self, rel_path, data):
+        with open(os.path.join(self.static, rel_path), "wb") as f:
+            f.write(data)
+
+    def test_sizes_by_site_path(self):
+        self.assertEqual(image_sizes(self.static, self.state), {"/images/a.png": (10, 20), "/images/copy.png": (10, 20)})
+
+    def test_truncated_image_is_skipped(self):
+        self.write(os.path.join("images", "bad.webp"), b"RIFF\x00\x00\x00\x00WEBPVP8L")
+        self.assertEqual(sorted(image_sizes(self.static, self.state)), ["/images/a.png", "/images/copy.png"])
+
+    def test_sizes_are_cached_by_hash(self):
+        image_sizes(self.static, self.state)
+        self.write(os.path.join("images", "new.png"), png(10, 20))
+        with mock.patch("images.read_image_size") as read:
+            sizes = image_sizes(self.static, self.state)
+        read.assert_not_called()
+        self.assertEqual(sizes["/images/new.png"], (10, 20))
+
+
+class TestImageTransform(unittest.TestCase):
+    def test_attributes(self):
+        transform = ImageTransform({"/images/a.png": (10, 20)}, eager=1)
+        self.assertEqual(
+            transform("img", {"src": "/images/a.png", "alt": "A"}),
+            {"src": "/images/a.png", "alt": "A", "width": "10", "height": "20", "decoding": "async"},
+        )
+        self.assertEqual(
+            transform("img", {"src": "/images/b.png?v=2", "alt": "B"}),
+            {"src": "/images/b.png?v=2", "alt": "B", "loading": "lazy", "decoding": "async"},
+        )
+        props = {"href": "/images/a.png"}
+        self.assertIs(transform("a", props), props)
+
+    def test_runs_before_basepath(self):
+        transforms = page_transforms("/repo/", images=ImageOptions({"/a.png": (1, 2)}, eager=0))
+        self.assertEqual(
+            transforms("img", {"src": "/a.png"}),
+            {"src": "/repo/a.png", "width": "1", "height": "2", "loading": "lazy", "decoding": "async"},
+        )
+
+
+if __name__ == "__main__":
+    unittest.main()
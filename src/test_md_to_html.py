@@ -118,6 +118,18 @@ Here's the deal, **I like Tolkien**.
             "<div><p>Here's the deal, <b>I like Tolkien</b>.</p><blockquote>\"I am in fact a Hobbit in all but size.\"  -- J.R.R. Tolkien</blockquote></div>",
         )
 
+    def test_max_blocks_excerpt(self):
+        md = """
+# Heading
+
+First paragraph
+
+Second paragraph
+"""
+        node = markdown_to_html_node(md, max_blocks=2)
+        self.assertEqual(node.to_html(), "<div><h1>Heading</h1><p>First paragraph</p></div>")
+
+
 if __name__ == "__main__":
     unittest.main()
 
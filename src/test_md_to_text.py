@@ -1,7 +1,8 @@
+import random
 import unittest
 
 from textnode import TextNode, TextType
-from md_to_text import BlockType, split_nodes_delimiter, extract_markdown_images, extract_markdown_links, split_nodes_image, split_nodes_link, text_to_textnodes, markdown_to_blocks, block_to_block_type, extract_title
+from md_to_text import BlockType, split_nodes_delimiter, extract_markdown_images, extract_markdown_links, split_nodes_image, split_nodes_link, text_to_textnodes, markdown_to_blocks, block_to_block_type, extract_title, tokenize_inline, text_to_textnodes_multipass, iter_blocks
 
 
 class TestTextNode(unittest.TestCase):
@@ -423,5 +424,109 @@ This is a paragraph with a [link](https://boot.dev) and an ![image](https://i.im
             extract_title(md)
         self.assertTrue("No title found in markdown" in str(context.exception))
 
+def random_inline_text(rng):
+    words = ["Frodo", "walks", "to", "Mordor,", "slowly!", "and", "then", "(again)", "it's", "over.", " "]
+    pieces = []
+    for _ in range(rng.randint(0, 12)):
+        phrase = " ".join(rng.choice(words) for _ in range(rng.randint(1, 4)))
+        kind = rng.randrange(6)
+        if kind == 0:
+            pieces.append(phrase)
+        elif kind == 1:
+            pieces.append(f"**{phrase}**")
+        elif kind == 2:
+            pieces.append(f"_{phrase}_")
+        elif kind == 3:
+            pieces.append(f"`{phrase}`")
+        elif kind == 4:
+            pieces.append(f"![{phrase}](/images/{rng.randint(0, 9)}.png)")
+        else:
+            pieces.append(f"[{phrase}](https://example.com/{rng.randint(0, 9)})")
+    return rng.choice(["", " "]).join(pieces)
+
+
+class TestTokenizeInline(unittest.TestCase):
+    def test_matches_multipass_pipeline(self):
+        rng = random.Random(1954)
+        for _ in range(2000):
+            text = random_inline_text(rng)
+            self.assertListEqual(tokenize_inline(text), text_to_textnodes_multipass(text), text)
+
+    def test_empty_text(self):
+        self.assertEqual(tokenize_inline(""), [TextNode("", TextType.TEXT)])
+        self.assertEqual(tokenize_inline(""), text_to_textnodes_multipass(""))
+
+    def test_empty_delimiters(self):
+        text = "This is ``consecutive delimiters`` test"
+        self.assertListEqual(tokenize_inline(text), text_to_textnodes_multipass(text))
+
+    def test_unclosed_delimiter(self):
+        with self.assertRaises(Exception) as context:
+            tokenize_inline("This is **not closed")
+        self.assertIn("End delimiter '**' not found in text", str(context.exception))
+
+    def test_delimiter_inside_code_span(self):
+        nodes = tokenize_inline("Use `snake_case` names")
+        self.assertListEqual(
+            [
+                TextNode("Use ", TextType.TEXT),
+                TextNode("snake_case", TextType.CODE),
+                TextNode(" names", TextType.TEXT),
+            ],
+            nodes,
+        )
+
+    def test_underscore_in_link_url(self):
+        nodes = tokenize_inline("See [the docs](https://example.com/a_b_c)")
+        self.assertListEqual(
+            [
+                TextNode("See ", TextType.TEXT),
+                TextNode("the docs", TextType.LINK, "https://example.com/a_b_c"),
+            ],
+            nodes,
+        )
+
+
+class TestIterBlocks(unittest.TestCase):
+    def test_matches_split_on_blank_lines(self):
+        rng = random.Random(1937)
+        pieces = ["# Title", "text", "  indented", "- item", "", "", " ", "\t", "> quote", "```", "1. one"]
+        for _ in range(2000):
+            md = "\n".join(rng.choice(pieces) for _ in range(rng.randint(0, 15)))
+            expected = [block.strip() for block in md.split("\n\n") if block.strip()]
+            self.assertEqual([block.text for block in iter_blocks(md)], expected, repr(md))
+
+    def test_block_types_and_line_spans(self):
+        md = "# Title\n\nFirst line\nsecond line\n\n\n- a\n- b\n"
+        blocks = list(iter_blocks(md))
+        self.assertEqual(
+            [(block.block_type, block.start_line, block.end_line) for block in blocks],
+            [
+                (BlockType.HEADING, 0, 1),
+                (BlockType.PARAGRAPH, 2, 4),
+                (BlockType.UNORDERED_LIST, 6, 8),
+            ],
+        )
+        self.assertEqual(blocks[2].lines, ["- a", "- b"])
+
+    def test_accepts_line_iterables(self):
+        lines = ["# Title", "", "Body"]
+        self.assertEqual([block.text for block in iter_blocks(lines)], ["# Title", "Body"])
+
+    def test_stops_early(self):
+        consumed = []
+        def lines():
+            for line in ["intro", "", "# Title", "", "rest", "", "more"]:
+                consumed.append(line)
+                yield line
+        blocks = iter_blocks(lines())
+        self.assertEqual(next(blocks).text, "intro")
+        self.assertEqual(consumed, ["intro", ""])
+
+    def test_extract_title_ignores_later_content(self):
+        md = "# Title\n\n" + "body\n\n" * 1000 + "# Another"
+        self.assertEqual(extract_title(md), "Title")
+
+
 if __name__ == "__main__":
     unittest.main()
\ No newline at end of file
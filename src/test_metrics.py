@@ -0,0 +1,69 @@
+import json
+import os
+import unittest
+
+from generator import generate_pages_recursive
+from metrics import BuildMetrics, PageTimer
+from sitetest import SiteTestCase
+
+# The stages of a page rendered in memory without the parse or block cache
+BUFFERED_STAGES = ("read", "parse", "serialize", "title", "transform", "template", "write")
+
+
+class TestPageTimer(unittest.TestCase):
+    def test_stage_totals(self):
+        timer = PageTimer("page.md")
+        with timer.stage("parse"):
+            pass
+        with timer.stage("parse"):
+            pass
+        with timer.stage("write"):
+            pass
+        self.assertEqual(sorted(timer.stage_ns()), ["parse", "write"])
+        self.assertEqual(len(timer.spans), 3)
+        self.assertEqual(timer.total_ns(), sum(timer.stage_ns().values()))
+
+    def test_stage_recorded_on_error(self):
+        timer = PageTimer()
+        with self.assertRaises(ValueError):
+            with timer.stage("parse"):
+                raise ValueError("boom")
+        self.assertEqual([name for name, _, _ in timer.spans], ["parse"])
+
+
+class TestBuildMetrics(SiteTestCase):
+    template_text = "<html>{{ Content }}</html>"
+
+    def setUp(self):
+        super().setUp()
+        self.write("index.md", "# Home")
+        self.write(os.path.join("big", "index.md"), "# Big\n\n" + "Some **bold** paragraph text\n\n" * 500)
+
+    def test_report_from_build(self):
+        metrics = BuildMetrics()
+        with metrics.stage("static"):
+            pass
+        generate_pages_recursive(self.content, self.template, self.dest, "/", metrics=metrics)
+        metrics.finish()
+        report = metrics.report()
+
+        self.assertEqual(report["pages"], 2)
+        self.assertEqual(set(report["stages"]), set(BUFFERED_STAGES) | {"static", "flush"})
+        self.assertEqual(report["slowest_pages"][0]["source"], os.path.join(self.content, "big", "index.md"))
+        self.assertEqual(report["bytes_out"], os.path.getsize(os.path.join(self.dest, "index.html")) + os.path.getsize(os.path.join(self.dest, "big", "index.html")))
+
+    def test_trace_file(self):
+        metrics = BuildMetrics()
+        generate_pages_recursive(self.content, self.template, self.dest, "/", metrics=metrics)
+        path = os.path.join(self.root, "trace.json")
+        metrics.write_trace(path)
+        with open(path) as f:
+            events = json.load(f)["traceEvents"]
+        # every page stage for both pages, plus waiting for the output writer
+        self.assertEqual(len(events), 2 * len(BUFFERED_STAGES) + 1)
+        self.assertTrue(all(event["ph"] == "X" for event in events))
+        self.assertEqual(events, sorted(events, key=lambda event: event["ts"]))
+
+
+if __name__ == "__main__":
+    unittest.main()
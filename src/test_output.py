@@ -0,0 +1,72 @@
+import os
+import tempfile
+import threading
+import unittest
+from unittest import mock
+
+from output import OutputWriter, write_if_changed
+
+
+class TestOutputWriter(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.root = self.tmp.name
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def test_writes_everything_before_close_returns(self):
+        paths = [os.path.join(self.root, f"{number}.html") for number in range(50)]
+        with OutputWriter(workers=3) as writer:
+            for number, path in enumerate(paths):
+                writer.write(path, f"page {number}".encode())
+        self.assertEqual(writer.written, 50)
+        for number, path in enumerate(paths):
+            with open(path) as f:
+                self.assertEqual(f.read(), f"page {number}")
+
+    def test_errors_are_collected(self):
+        path = os.path.join(self.root, "missing", "index.html")
+        writer = OutputWriter()
+        writer.write(path, b"x")
+        errors = writer.close()
+        self.assertEqual([failed for failed, _ in errors], [path])
+        self.assertIn("FileNotFoundError", errors[0][1])
+
+    def test_write_blocks_when_budget_is_used(self):
+        release = threading.Event()
+
+        def slow_write(path, data):
+            release.wait(5)
+            return True
+
+        with mock.patch("output.write_if_changed", side_effect=slow_write):
+            writer = OutputWriter(workers=1, max_pending_bytes=10)
+            writer.write(os.path.join(self.root, "a"), b"12345678")
+            second = threading.Thread(target=writer.write, args=(os.path.join(self.root, "b"), b"12345"))
+            second.start()
+            second.join(0.1)
+            self.assertTrue(second.is_alive())
+
+            release.set()
+            second.join(5)
+            self.assertFalse(second.is_alive())
+            self.assertEqual(writer.close(), [])
+        self.assertEqual(writer.written, 2)
+
+
+class TestWriteIfChanged(unittest.TestCase):
+    def test_identical_bytes_keep_mtime(self):
+        with tempfile.TemporaryDirectory() as root:
+            path = os.path.join(root, "index.html")
+            self.assertTrue(write_if_changed(path, b"page"))
+            os.utime(path, ns=(0, 0))
+            self.assertFalse(write_if_changed(path, b"page"))
+            self.assertEqual(os.stat(path).st_mtime_ns, 0)
+            self.assertTrue(write_if_changed(path, b"edit"))
+            self.assertNotEqual(os.stat(path).st_mtime_ns, 0)
+            self.assertEqual(os.listdir(root), ["index.html"])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,31 @@
+import os
+import tempfile
+import unittest
+
+from md_to_html import markdown_to_html_node
+from profiling import profile_call
+
+
+class TestProfileCall(unittest.TestCase):
+    def test_writes_reports(self):
+        markdown = "# Title\n\n" + "A paragraph with **bold** and a [link](/x)\n\n" * 300
+        with tempfile.TemporaryDirectory() as out_dir:
+            tree = profile_call(lambda: markdown_to_html_node(markdown), out_dir, sample_interval=0.0005)
+            self.assertEqual(len(tree.children), 301)
+            for name in ("build.pstats", "build.pstats.txt", "build.collapsed", "allocations.txt"):
+                self.assertTrue(os.path.exists(os.path.join(out_dir, name)), name)
+
+            with open(os.path.join(out_dir, "build.pstats.txt")) as f:
+                self.assertIn("markdown_to_html_node", f.read())
+            with open(os.path.join(out_dir, "allocations.txt")) as f:
+                allocations = f.read()
+            self.assertIn("textnode", allocations)
+            self.assertIn("htmlnode", allocations)
+            with open(os.path.join(out_dir, "build.collapsed")) as f:
+                for line in f:
+                    stack, count = line.rsplit(" ", 1)
+                    self.assertTrue(int(count) > 0)
+
+
+if __name__ == "__main__":
+    unittest.main()
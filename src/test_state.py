@@ -0,0 +1,37 @@
+import os
+import tempfile
+import unittest
+
+from state import load_state, remove_output, save_state
+
+
+class TestState(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.tmp.name, ".cache", "state.json")
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def test_round_trip(self):
+        save_state(self.path, {"version": 1}, files={"a": 1})
+        self.assertEqual(load_state(self.path, {"version": 1}), {"version": 1, "files": {"a": 1}})
+        self.assertEqual(os.listdir(os.path.dirname(self.path)), ["state.json"])
+
+    def test_missing_corrupt_or_other_header_loads_empty(self):
+        self.assertEqual(load_state(self.path, {"version": 1}), {})
+        save_state(self.path, {"version": 1}, files={})
+        self.assertEqual(load_state(self.path, {"version": 2}), {})
+        with open(self.path, "w") as f:
+            f.write("{not json")
+        self.assertEqual(load_state(self.path, {"version": 1}), {})
+
+    def test_remove_output(self):
+        save_state(self.path, {"version": 1})
+        remove_output(self.path)
+        remove_output(self.path)
+        self.assertFalse(os.path.exists(self.path))
+
+
+if __name__ == "__main__":
+    unittest.main()
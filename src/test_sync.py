@@ -0,0 +1,98 @@
+import os
+import tempfile
+import unittest
+from unittest import mock
+
+from sync import sync_files
+
+
+class TestSyncFiles(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.root = self.tmp.name
+        self.static = os.path.join(self.root, "static")
+        self.dest = os.path.join(self.root, "docs")
+        self.state = os.path.join(self.root, ".cache", "static.json")
+        os.makedirs(os.path.join(self.static, "images"))
+        self.write(os.path.join(self.static, "index.css"), "body {}")
+        self.write(os.path.join(self.static, "images", "a.png"), "png-a")
+        self.write(os.path.join(self.static, "images", "b.png"), "png-b")
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def write(self, path, text):
+        with open(path, "w") as f:
+            f.write(text)
+
+    def read(self, path):
+        with open(path) as f:
+            return f.read()
+
+    def sync(self, use_hash=False):
+        return sync_files(self.static, self.dest, self.state, use_hash)
+
+    def test_first_sync_copies_everything(self):
+        result = self.sync()
+        self.assertEqual(sorted(result.copied), ["images/a.png", "images/b.png", "index.css"])
+        self.assertEqual(self.read(os.path.join(self.dest, "images", "a.png")), "png-a")
+
+    def test_unchanged_files_are_not_copied(self):
+        self.sync()
+        result = self.sync()
+        self.assertEqual(result.copied, [])
+        self.assertEqual(len(result.unchanged), 3)
+
+    def test_changed_file_is_copied(self):
+        self.sync()
+        path = os.path.join(self.static, "index.css")
+        self.write(path, "body { color: red }")
+        os.utime(path, ns=(1, 1))
+        result = self.sync()
+        self.assertEqual(result.copied, ["index.css"])
+        self.assertEqual(self.read(os.path.join(self.dest, "index.css")), "body { color: red }")
+
+    def test_failed_copy_keeps_previous_copy(self):
+        self.sync()
+        path = os.path.join(self.static, "index.css")
+        self.write(path, "body { color: red }")
+        os.utime(path, ns=(1, 1))
+        def partial_copy(src, dest):
+            self.write(dest, "body")
+            raise OSError("disk full")
+
+        with mock.patch("sync.shutil.copy2", side_effect=partial_copy):
+            result = self.sync()
+        self.assertEqual(result.removed, [])
+        self.assertEqual(self.read(os.path.join(self.dest, "index.css")), "body {}")
+        self.assertEqual([name for name in os.listdir(self.dest) if name.endswith(".tmp")], [])
+        # still tracked, so the next sync retries the copy
+        self.assertEqual(self.sync().copied, ["index.css"])
+        self.assertEqual(self.read(os.path.join(self.dest, "index.css")), "body { color: red }")
+
+    def test_removed_file_is_deleted_but_pages_are_kept(self):
+        self.sync()
+        page = os.path.join(self.dest, "index.html")
+        self.write(page, "<html></html>")
+        os.remove(os.path.join(self.static, "images", "b.png"))
+        result = self.sync()
+        self.assertEqual(result.removed, ["images/b.png"])
+        self.assertFalse(os.path.exists(os.path.join(self.dest, "images", "b.png")))
+        self.assertTrue(os.path.exists(page))
+
+    def test_hash_comparison_skips_touched_files(self):
+        self.sync()
+        os.utime(os.path.join(self.static, "index.css"), ns=(5, 5))
+        result = self.sync(use_hash=True)
+        self.assertEqual(result.copied, [])
+
+    def test_empty_directories_are_pruned(self):
+        self.sync()
+        os.remove(os.path.join(self.static, "images", "a.png"))
+        os.remove(os.path.join(self.static, "images", "b.png"))
+        self.sync()
+        self.assertFalse(os.path.exists(os.path.join(self.dest, "images")))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,96 @@
+import os
+import tempfile
+import unittest
+
+from template import Template, TemplateIndex
+
+
+class TestTemplate(unittest.TestCase):
+    def test_compile_slots(self):
+        template = Template("<title>{{ Title }}</title><article>{{Content}}</article>")
+        self.assertEqual(template.literals, ["<title>", "</title><article>", "</article>"])
+        self.assertEqual(template.slot_names(), ["Title", "Content"])
+
+    def test_render(self):
+        template = Template("<title>{{ Title }}</title><article>{{ Content }}</article>")
+        html = template.render({"Title": "Home", "Content": "<p>Hi</p>"})
+        self.assertEqual(html, "<title>Home</title><article><p>Hi</p></article>")
+
+    def test_repeated_slot(self):
+        template = Template("{{ Title }} | {{ Title }}")
+        self.assertEqual(template.render({"Title": "A"}), "A | A")
+
+    def test_unknown_slot_left_in_place(self):
+        template = Template("<p>{{ Unknown }}</p>{{ Content }}")
+        self.assertEqual(template.render({"Content": "x"}), "<p>{{ Unknown }}</p>x")
+
+    def test_no_slots(self):
+        template = Template("<p>static</p>")
+        self.assertEqual(template.render({"Title": "A"}), "<p>static</p>")
+
+
+class TestMinify(unittest.TestCase):
+    def test_strips_comments_and_whitespace_between_tags(self):
+        template = Template("<!doctype html>\n<html>\n  <!-- nav -->\n  <body>\n    <p>Hello   there</p>\n    {{ Content }}\n  </body>\n</html>\n")
+        self.assertEqual(
+            template.minified().render({"Content": "<p>x</p>"}),
+            "<!doctype html><html><body><p>Hello there</p><p>x</p></body></html>",
+        )
+
+    def test_preserves_pre_and_script(self):
+        template = Template("<div>\n  <pre>\n  a\n    b</pre>\n  <script>\n if (a < b) {}\n</script>\n</div>")
+        self.assertEqual(template.minified().render({}), "<div><pre>\n  a\n    b</pre><script>\n if (a < b) {}\n</script></div>")
+
+    def test_slots_survive(self):
+        template = Template("<title>\n  {{ Title }}\n</title><!-- {{ Title }} --><pre> {{ Content }} </pre><p>{{ Date }} {{ Tags }}</p>")
+        minified = template.minified()
+        self.assertEqual(minified.slot_names(), template.slot_names())
+        self.assertEqual(
+            minified.render({"Title": "T", "Content": "C", "Date": "D", "Tags": "t"}),
+            "<title>T</title><!-- T --><pre> C </pre><p>D t</p>",
+        )
+
+    def test_variants_are_memoized_and_compose(self):
+        template = Template('<a href="/x">\n  {{ Content }}</a>')
+        self.assertIs(template.minified(), template.minified())
+        self.assertEqual(template.with_basepath("/site/").minified().render({"Content": "c"}), '<a href="/site/x">c</a>')
+
+
+class TestTemplateIndex(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.root = self.tmp.name
+        self.content = os.path.join(self.root, "content")
+        os.makedirs(os.path.join(self.content, "blog", "post"))
+        os.makedirs(os.path.join(self.content, "contact"))
+        self.default_path = os.path.join(self.root, "template.html")
+        with open(self.default_path, "w") as f:
+            f.write("default {{ Content }}")
+        with open(os.path.join(self.content, "blog", "template.html"), "w") as f:
+            f.write("blog {{ Content }}")
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def test_default_template(self):
+        index = TemplateIndex(self.default_path, self.content)
+        self.assertIs(index.for_directory(self.content), index.default)
+        self.assertIs(index.for_directory(os.path.join(self.content, "contact")), index.default)
+
+    def test_directory_override_applies_to_subdirectories(self):
+        index = TemplateIndex(self.default_path, self.content)
+        blog = index.for_directory(os.path.join(self.content, "blog"))
+        post = index.for_directory(os.path.join(self.content, "blog", "post"))
+        self.assertIs(blog, post)
+        self.assertEqual(post.render({"Content": "x"}), "blog x")
+
+    def test_templates_loaded_once(self):
+        index = TemplateIndex(self.default_path, self.content)
+        index.for_directory(os.path.join(self.content, "blog", "post"))
+        index.for_directory(os.path.join(self.content, "blog"))
+        index.for_directory(os.path.join(self.content, "contact"))
+        self.assertEqual(len(index.templates), 2)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -64,6 +64,12 @@ class TestTextNode(unittest.TestCase):
         self.assertEqual(html_node.value, "")
         self.assertEqual(html_node.props, {"src": "https://www.example.com/image.png", "alt": "This is an image"})
 
+    def test_no_instance_dict(self):
+        node = TextNode("text", TextType.TEXT)
+        self.assertFalse(hasattr(node, "__dict__"))
+        with self.assertRaises(AttributeError):
+            node.extra = True
+
 
 if __name__ == "__main__":
     unittest.main()
\ No newline at end of file
@@ -0,0 +1,79 @@
+import unittest
+
+from htmlnode import LeafNode, ParentNode
+from md_to_html import markdown_to_html_node
+from template import Template
+from transforms import AttributeTransforms, BasepathTransform, Fragment, page_transforms
+
+
+class TestBasepathTransform(unittest.TestCase):
+    def test_rewrites_root_relative_urls(self):
+        transform = BasepathTransform("/site/")
+        self.assertEqual(transform("a", {"href": "/about"}), {"href": "/site/about"})
+        self.assertEqual(transform("img", {"src": "/a.png", "alt": "x"}), {"src": "/site/a.png", "alt": "x"})
+
+    def test_leaves_other_urls(self):
+        transform = BasepathTransform("/site/")
+        props = {"href": "https://example.com/"}
+        self.assertIs(transform("a", props), props)
+        self.assertEqual(transform("a", {"href": "//cdn.example.com/x"}), {"href": "//cdn.example.com/x"})
+        self.assertEqual(transform("a", {"href": "relative"}), {"href": "relative"})
+
+    def test_does_not_touch_text(self):
+        node = markdown_to_html_node('Write `href="/x"` to [link](/about)')
+        html = Fragment.from_node(node).render(page_transforms("/site/"))
+        self.assertIn('<code>href="/x"</code>', html)
+        self.assertIn('<a href="/site/about">link</a>', html)
+
+
+class TestAttributeTransforms(unittest.TestCase):
+    def test_chained_in_order(self):
+        transforms = AttributeTransforms()
+        transforms.register(BasepathTransform("/site/"))
+        transforms.register(lambda tag, props: dict(props, rel="nofollow") if tag == "a" else props)
+        self.assertEqual(transforms("a", {"href": "/x"}), {"href": "/site/x", "rel": "nofollow"})
+        self.assertEqual(transforms("img", {"src": "/y"}), {"src": "/site/y"})
+
+    def test_root_basepath_has_no_transforms(self):
+        self.assertFalse(page_transforms("/"))
+        self.assertTrue(page_transforms("/site/"))
+
+
+class TestFragment(unittest.TestCase):
+    def setUp(self):
+        self.node = ParentNode("div", [
+            LeafNode("a", "home", {"href": "/"}),
+            ParentNode("p", [LeafNode(None, "text "), LeafNode("img", "", {"src": "/i.png", "alt": "i"})]),
+        ], {"class": "page"})
+
+    def test_render_matches_to_html(self):
+        fragment = Fragment.from_node(self.node)
+        self.assertEqual(fragment.render(), self.node.to_html())
+        transform = BasepathTransform("/site/")
+        self.assertEqual(fragment.render(transform), self.node.to_html(transform))
+
+    def test_join_matches_enclosing_tree(self):
+        blocks = markdown_to_html_node("# Home\n\nA [link](/a) and ![i](/i.png)\n\nText").children
+        joined = Fragment.join([Fragment.from_node(block) for block in blocks], "<div>", "</div>")
+        self.assertEqual(joined, Fragment.from_node(ParentNode("div", blocks)))
+
+    def test_only_elements_with_attributes_are_slots(self):
+        fragment = Fragment.from_node(self.node)
+        slots = [part for part in fragment.parts if type(part) is tuple]
+        self.assertEqual([tag for tag, _ in slots], ["div", "a", "img"])
+
+
+class TestTemplateBasepath(unittest.TestCase):
+    def test_template_links_rewritten_once(self):
+        template = Template('<link href="/index.css"><a data-href="/x" href="//cdn/y">{{ Content }}</a>')
+        variant = template.with_basepath("/site/")
+        self.assertIs(template.with_basepath("/site/"), variant)
+        self.assertIs(template.with_basepath("/"), template)
+        self.assertEqual(
+            variant.render({"Content": 'href="/z"'}),
+            '<link href="/site/index.css"><a data-href="/x" href="//cdn/y">href="/z"</a>',
+        )
+
+
+if __name__ == "__main__":
+    unittest.main()
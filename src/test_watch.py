@@ -0,0 +1,164 @@
+import json
+import os
+import struct
+import unittest
+import urllib.request
+from unittest import mock
+
+from derived import DerivedOptions
+from generator import BuildOptions, RenderOptions, finish_site, generate_pages_recursive
+from images import ImageOptions, image_sizes
+from sitetest import SiteTestCase
+from watch import RELOAD_PATH, ReloadNotifier, SiteWatcher, diff_snapshots, serve, stat_snapshot
+
+
+class TestSnapshots(unittest.TestCase):
+    def test_diff_snapshots(self):
+        old = {"a": (1, 1), "b": (2, 2), "c": (3, 3)}
+        new = {"a": (1, 1), "b": (2, 5), "d": (4, 4)}
+        self.assertEqual(diff_snapshots(old, new), ({"b", "d"}, {"c"}))
+
+    def test_missing_root(self):
+        self.assertEqual(stat_snapshot("/does/not/exist"), {})
+
+
+class TestSiteWatcher(SiteTestCase):
+    template_text = "<html><body>{{ Content }}</body></html>"
+
+    def setUp(self):
+        super().setUp()
+        self.static = os.path.join(self.root, "static")
+        os.makedirs(self.static)
+        self.write("index.md", "# Home")
+        self.write(os.path.join("post", "index.md"), "# Post")
+        generate_pages_recursive(self.content, self.template, self.dest, "/")
+        self.notifier = ReloadNotifier()
+        self.watcher = SiteWatcher(self.content, self.static, self.template, self.dest, "/", os.path.join(self.root, ".cache"), self.notifier)
+
+    # Edits land within one mtime tick of the build, so they are moved a
+    # second later for the snapshots to see them.
+    def write(self, path, text):
+        super().write(path, text)
+        self.touch_later(os.path.join(self.content, path))
+
+    def touch_later(self, path):
+        stat = os.stat(path)
+        os.utime(path, ns=(stat.st_atime_ns, stat.st_mtime_ns + 1_000_000_000))
+
+    def write_png(self, width, height):
+        path = os.path.join(self.static, "a.png")
+        with open(path, "wb") as f:
+            f.write(b"\x89PNG\r\n\x1a\n\x00\x00\x00\x0dIHDR" + struct.pack(">II", width, height))
+        self.touch_later(path)
+
+    def test_image_attributes_follow_edits(self):
+        self.write_png(10, 20)
+        cache_dir = os.path.join(self.root, ".cache")
+        images = ImageOptions(image_sizes(self.static, os.path.join(cache_dir, "images.json")), eager=0)
+        watcher = SiteWatcher(self.content, self.static, self.template, self.dest, "/", cache_dir, options=RenderOptions(images=images))
+        self.write(os.path.join(self.content, "post", "index.md"), "# Post\n\n![A](/a.png)")
+        watcher.poll()
+        self.assertIn('width="10" height="20" loading="lazy" decoding="async"', self.read("post", "index.html"))
+        self.write_png(30, 40)
+        watcher.poll()
+        self.assertIn('width="30" height="40"', self.read("post", "index.html"))
+
+    def test_no_changes(self):
+        self.assertFalse(self.watcher.poll())
+        self.assertEqual(self.notifier.generation, 0)
+
+    def test_content_edit_rebuilds_that_page(self):
+        home_mtime = os.stat(os.path.join(self.dest, "index.html")).st_mtime_ns
+        self.write(os.path.join(self.content, "post", "index.md"), "# Edited")
+        self.assertTrue(self.watcher.poll())
+        self.assertIn("<h1>Edited</h1>", self.read("post", "index.html"))
+        self.assertEqual(os.stat(os.path.join(self.dest, "index.html")).st_mtime_ns, home_mtime)
+        self.assertEqual(self.notifier.generation, 1)
+
+    def test_invalid_front_matter_keeps_watching(self):
+        self.write(os.path.join(self.content, "post", "index.md"), "---\nnot valid\n---\n# Post")
+        self.assertTrue(self.watcher.poll())
+        self.write(os.path.join(self.content, "post", "index.md"), "# Fixed")
+        self.watcher.poll()
+        self.assertIn("<h1>Fixed</h1>", self.read("post", "index.html"))
+
+    def test_derived_pages_follow_only_listed_changes(self):
+        cache_dir = os.path.join(self.root, ".cache")
+        index = os.path.join(cache_dir, "site-index.json")
+        derived = DerivedOptions(sections=("blog",))
+        generate_pages_recursive(self.content, self.template, self.dest, "/", build=BuildOptions(index_path=index, derived=derived))
+        watcher = SiteWatcher(self.content, self.static, self.template, self.dest, "/", cache_dir, derived=derived)
+        saved = os.stat(index).st_mtime_ns
+        source = os.path.join(self.content, "blog", "first", "index.md")
+        os.makedirs(os.path.dirname(source))
+        self.write(source, "# First")
+        with mock.patch("watch.finish_site", wraps=finish_site) as finish:
+            watcher.poll()
+            self.assertIn("First", self.read("blog", "index.html"))
+            # a body edit changes nothing the listing shows
+            self.write(source, "# First\n\nBody")
+            watcher.poll()
+            self.assertEqual(finish.call_count, 1)
+            self.write(source, "# Renamed\n\nBody")
+            watcher.poll()
+            self.assertEqual(finish.call_count, 2)
+        self.assertIn("Renamed", self.read("blog", "index.html"))
+        self.assertNotEqual(os.stat(index).st_mtime_ns, saved)
+
+    def test_unsaved_index_is_saved_on_exit(self):
+        cache_dir = os.path.join(self.root, ".cache")
+        index = os.path.join(cache_dir, "site-index.json")
+        generate_pages_recursive(self.content, self.template, self.dest, "/", build=BuildOptions(index_path=index))
+        watcher = SiteWatcher(self.content, self.static, self.template, self.dest, "/", cache_dir)
+        source = os.path.join(self.content, "post", "index.md")
+        self.write(source, "# Post\n\nBody")
+        with open(index) as f:
+            before = f.read()
+        with mock.patch("watch.finish_site") as finish:
+            watcher.poll()
+        finish.assert_not_called()
+        with open(index) as f:
+            self.assertEqual(f.read(), before)
+        with mock.patch("time.sleep", side_effect=KeyboardInterrupt), self.assertRaises(KeyboardInterrupt):
+            watcher.run()
+        with open(index) as f:
+            pages = json.load(f)["pages"]
+        self.assertEqual(pages[os.path.join("post", "index.md")]["stat"][1], os.stat(source).st_mtime_ns)
+
+    def test_new_page(self):
+        os.makedirs(os.path.join(self.content, "new"))
+        self.write(os.path.join(self.content, "new", "index.md"), "# New")
+        self.watcher.poll()
+        self.assertIn("<h1>New</h1>", self.read("new", "index.html"))
+
+    def test_removed_page(self):
+        os.remove(os.path.join(self.content, "post", "index.md"))
+        self.watcher.poll()
+        self.assertFalse(os.path.exists(os.path.join(self.dest, "post", "index.html")))
+
+    def test_template_edit_rebuilds_everything(self):
+        self.write(self.template, "<main>{{ Content }}</main>")
+        self.watcher.poll()
+        self.assertEqual(self.read("index.html"), "<main><div><h1>Home</h1></div></main>")
+        self.assertEqual(self.read("post", "index.html"), "<main><div><h1>Post</h1></div></main>")
+
+    def test_static_edit_is_synced(self):
+        self.write(os.path.join(self.static, "site.css"), "body {}")
+        self.watcher.poll()
+        self.assertEqual(self.read("site.css"), "body {}")
+
+    def test_served_pages_get_reload_script(self):
+        server = serve(self.dest, 0, self.notifier)
+        try:
+            url = f"http://127.0.0.1:{server.server_address[1]}/post/"
+            with urllib.request.urlopen(url) as response:
+                html = response.read().decode("utf-8")
+        finally:
+            server.shutdown()
+            server.server_close()
+        self.assertIn(RELOAD_PATH, html)
+        self.assertIn("<h1>Post</h1>", html)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -10,10 +10,12 @@ class TextType(Enum):
     IMAGE = "image"
 
 class TextNode:
+    __slots__ = ("text", "text_type", "url")
+
     def __init__(self, text, text_type, url=None):
         self.text = text
         self.text_type = text_type
-        self.url = url if text_type in [TextType.LINK, TextType.IMAGE] else None
+        self.url = url if text_type in (TextType.LINK, TextType.IMAGE) else None
 
     
     def __eq__(self, other):
@@ -0,0 +1,162 @@
+import hashlib, json
+from htmlnode import EMPTY_PROPS, format_props
+
+URL_ATTRIBUTES = ("href", "src")
+
+# Rewrites root-relative href/src attributes so the site can be served from a
+# sub-path. Transforms are classes rather than closures so page jobs carrying
+# them can be sent to worker processes.
+class BasepathTransform:
+    def __init__(self, basepath):
+        self.basepath = basepath
+
+    def __call__(self, tag, props):
+        changed = None
+        for name in URL_ATTRIBUTES:
+            value = props.get(name)
+            if value is not None and value.startswith("/") and not value.startswith("//"):
+                if changed is None:
+                    changed = dict(props)
+                changed[name] = self.basepath + value[1:]
+        return changed if changed is not None else props
+
+# Points href/src attributes at fingerprinted copies of static assets. `assets`
+# maps site paths to fingerprinted paths; URLs are looked up as the basepath
+# transform leaves them, so this runs after it.
+class AssetTransform:
+    def __init__(self, assets, basepath="/"):
+        self.urls = {basepath + path[1:]: basepath + output[1:] for path, output in assets.items()}
+        self.digest = hashlib.sha256(json.dumps(sorted(self.urls.items())).encode("utf-8")).hexdigest()
+
+    def rewrite(self, url):
+        path, suffix = split_url(url)
+        output = self.urls.get(path)
+        return url if output is None else output + suffix
+
+    def __call__(self, tag, props):
+        changed = None
+        for name in URL_ATTRIBUTES:
+            value = props.get(name)
+            if value is None:
+                continue
+            rewritten = self.rewrite(value)
+            if rewritten is not value:
+                if changed is None:
+                    changed = dict(props)
+                changed[name] = rewritten
+        return changed if changed is not None else props
+
+# Adds the intrinsic width and height to <img> elements whose source size is
+# known, so the browser reserves their space before they load, and marks them
+# decoding="async" and, past the first `eager` images of the page,
+# loading="lazy". Attributes already set are kept. It counts the images it has
+# seen, so page_transforms makes one per page; it runs before the basepath
+# and asset transforms, so `sizes` is keyed by site path.
+class ImageTransform:
+    def __init__(self, sizes, eager=1):
+        self.sizes = sizes
+        self.eager = eager
+        self.seen = 0
+
+    def __call__(self, tag, props):
+        if tag != "img":
+            return props
+        self.seen += 1
+        changed = dict(props)
+        size = self.sizes.get(split_url(props.get("src", ""))[0])
+        if size is not None and "width" not in props and "height" not in props:
+            changed["width"], changed["height"] = str(size[0]), str(size[1])
+        if self.seen > self.eager:
+            changed.setdefault("loading", "lazy")
+        changed.setdefault("decoding", "async")
+        return changed
+
+# Splits "/a.png?v=1#x" into "/a.png" and "?v=1#x".
+def split_url(url):
+    for index, char in enumerate(url):
+        if char in "?#":
+            return url[:index], url[index:]
+    return url, ""
+
+# An ordered set of attribute transforms applied together, so adding a
+# transform costs one more call per element with attributes rather than
+# another pass over the page.
+class AttributeTransforms:
+    def __init__(self, transforms=None):
+        self.transforms = list(transforms or [])
+
+    def register(self, transform):
+        self.transforms.append(transform)
+        return transform
+
+    def __bool__(self):
+        return bool(self.transforms)
+
+    def __call__(self, tag, props):
+        for transform in self.transforms:
+            props = transform(tag, props)
+        return props
+
+def page_transforms(basepath, extra=None, assets=None, images=None):
+    transforms = AttributeTransforms()
+    if images is not None:
+        transforms.register(ImageTransform(images.sizes, images.eager))
+    if basepath != "/":
+        transforms.register(BasepathTransform(basepath))
+    if assets is not None:
+        transforms.register(assets)
+    for transform in extra or []:
+        transforms.register(transform)
+    return transforms
+
+# A serialized node tree with the attributes of every element left open:
+# `parts` alternates literal HTML with (tag, props) slots. Rendering applies the
+# transforms to the slots only, so cached content can be re-rendered for a new
+# basepath or transform set without re-parsing or walking the tree again.
+class Fragment:
+    def __init__(self, parts):
+        self.parts = parts
+
+    @classmethod
+    def from_node(cls, node):
+        parts = []
+        buffer = []
+
+        def open_slot(tag, props):
+            parts.append("".join(buffer))
+            buffer.clear()
+            parts.append((tag, props))
+            return EMPTY_PROPS
+
+        node.write_chunks(buffer.append, open_slot)
+        parts.append("".join(buffer))
+        return cls(parts)
+
+    # Concatenates fragments between a literal prefix and suffix. Fragments
+    # start and end with literal text, which is merged with its neighbours,
+    # so the result equals the fragment of the enclosing tree.
+    @classmethod
+    def join(cls, fragments, prefix="", suffix=""):
+        parts = [prefix]
+        for fragment in fragments:
+            parts[-1] += fragment.parts[0]
+            parts.extend(fragment.parts[1:])
+        parts[-1] += suffix
+        return cls(parts)
+
+    def render(self, transform=None, compact=False):
+        chunks = []
+        for part in self.parts:
+            if type(part) is str:
+                chunks.append(part)
+            elif transform:
+                chunks.append(format_props(transform(part[0], part[1]), compact))
+            else:
+                chunks.append(format_props(part[1], compact))
+        return "".join(chunks)
+
+    def __eq__(self, other):
+        return isinstance(other, Fragment) and self.parts == other.parts
+
+    def __repr__(self):
+        return f"Fragment({self.parts})"
@@ -0,0 +1,281 @@
+import logging, os, threading, time
+from functools import partial
+from http.server import SimpleHTTPRequestHandler, ThreadingHTTPServer
+
+from generator import BuildOptions, PageJob, RenderOptions, discover_pages, finish_site, generate_pages_recursive, publish_page, publish_pages, run_page_job
+from images import image_sizes
+from siteindex import SiteIndex
+from sync import sync_files
+from template import TemplateIndex
+
+logger = logging.getLogger(__name__)
+
+RELOAD_PATH = "/__livereload"
+RELOAD_SCRIPT = f"""<script>new EventSource("{RELOAD_PATH}").onmessage = function () {{ location.reload(); }};</script>"""
+
+def stat_snapshot(root):
+    snapshot = {}
+    if os.path.isfile(root):
+        stat = os.stat(root)
+        snapshot[os.path.abspath(root)] = (stat.st_size, stat.st_mtime_ns)
+        return snapshot
+
+    stack = [os.path.abspath(root)]
+    while stack:
+        directory = stack.pop()
+        try:
+            entries = os.scandir(directory)
+        except FileNotFoundError:
+            continue
+        with entries:
+            for entry in entries:
+                if entry.is_dir(follow_symlinks=False):
+                    stack.append(entry.path)
+                elif entry.is_file():
+                    stat = entry.stat()
+                    snapshot[entry.path] = (stat.st_size, stat.st_mtime_ns)
+    return snapshot
+
+def diff_snapshots(old, new):
+    changed = {path for path, stat in new.items() if old.get(path) != stat}
+    removed = {path for path in old if path not in new}
+    return changed, removed
+
+# Tracks which browsers are waiting for a reload. Each rebuild bumps the
+# generation and wakes every open event stream.
+class ReloadNotifier:
+    def __init__(self):
+        self.generation = 0
+        self.condition = threading.Condition()
+
+    def notify(self):
+        with self.condition:
+            self.generation += 1
+            self.condition.notify_all()
+
+    def wait(self, generation, timeout):
+        with self.condition:
+            self.condition.wait_for(lambda: self.generation != generation, timeout)
+            return self.generation
+
+class LiveReloadHandler(SimpleHTTPRequestHandler):
+    notifier = None
+
+    def log_message(self, format, *args):
+        pass
+
+    def do_GET(self):
+        if self.path == RELOAD_PATH:
+            self.send_events()
+            return
+
+        request_path = self.path.split("?", 1)[0]
+        path = self.translate_path(request_path)
+        if request_path.endswith("/"):
+            path = os.path.join(path, "index.html")
+        if not path.endswith(".html") or not os.path.isfile(path):
+            super().do_GET()
+            return
+
+        with open(path, "r") as f:
+            html = f.read()
+        if "</body>" in html:
+            html = html.replace("</body>", RELOAD_SCRIPT + "</body>", 1)
+        else:
+            html += RELOAD_SCRIPT
+        body = html.encode("utf-8")
+        self.send_response(200)
+        self.send_header("Content-Type", "text/html; charset=utf-8")
+        self.send_header("Content-Length", str(len(body)))
+        self.send_header("Cache-Control", "no-store")
+        self.end_headers()
+        self.wfile.write(body)
+
+    def send_events(self):
+        self.send_response(200)
+        self.send_header("Content-Type", "text/event-stream")
+        self.send_header("Cache-Control", "no-store")
+        self.end_headers()
+        generation = self.notifier.generation
+        try:
+            while True:
+                new_generation = self.notifier.wait(generation, 15)
+                if new_generation == generation:
+                    self.wfile.write(b": ping\n\n")
+                else:
+                    self.wfile.write(b"data: reload\n\n")
+                    generation = new_generation
+                self.wfile.flush()
+        except (BrokenPipeError, ConnectionResetError):
+            pass
+
+def serve(directory, port, notifier):
+    handler = type("Handler", (LiveReloadHandler,), {"notifier": notifier})
+    server = ThreadingHTTPServer(("", port), partial(handler, directory=directory))
+    server.daemon_threads = True
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    return server
+
+# Keeps the build warm between edits: content edits re-render only the edited
+# pages, static edits sync only the changed assets, and template edits
+# re-render every page.
+class SiteWatcher:
+    def __init__(self, content_dir, static_dir, template_path, dest_dir, basepath, cache_dir, notifier=None, include_drafts=False, derived=None, options=None):
+        self.content_dir = os.path.abspath(content_dir)
+        self.static_dir = os.path.abspath(static_dir)
+        self.template_path = os.path.abspath(template_path)
+        self.dest_dir = os.path.abspath(dest_dir)
+        self.basepath = basepath
+        self.static_state = os.path.join(cache_dir, "static.json")
+        self.images_state = os.path.join(cache_dir, "images.json")
+        self.index_path = os.path.join(cache_dir, "site-index.json")
+        self.notifier = notifier
+        self.include_drafts = include_drafts
+        self.derived = derived
+        self.options = options if options is not None else RenderOptions()
+        self.templates = TemplateIndex(self.template_path, self.content_dir)
+        # the site index kept in memory between edits, whether it has changes
+        # not yet saved and whether the derived pages may not match it
+        self.site_index = None
+        self.index_dirty = False
+        self.derived_stale = False
+        self.snapshots = self._take_snapshots()
+
+    def _take_snapshots(self):
+        return {
+            "content": stat_snapshot(self.content_dir),
+            "static": stat_snapshot(self.static_dir),
+            "template": stat_snapshot(self.template_path),
+        }
+
+    def poll(self):
+        snapshots = self._take_snapshots()
+        content_changed, content_removed = diff_snapshots(self.snapshots["content"], snapshots["content"])
+        static_changed, static_removed = diff_snapshots(self.snapshots["static"], snapshots["static"])
+        template_changed, template_removed = diff_snapshots(self.snapshots["template"], snapshots["template"])
+        self.snapshots = snapshots
+
+        template_changed |= {path for path in content_changed | content_removed if path.endswith(".html")}
+        rebuilt = False
+        if static_changed or static_removed:
+            sync_files(self.static_dir, self.dest_dir, self.static_state)
+            rebuilt = True
+            # any page may show an image whose size changed
+            template_changed |= self.refresh_images()
+        if template_changed or template_removed:
+            self.rebuild_all()
+            rebuilt = True
+        elif content_changed or content_removed:
+            self.rebuild_pages(content_changed, content_removed)
+            rebuilt = True
+
+        if rebuilt and self.notifier is not None:
+            self.notifier.notify()
+        return rebuilt
+
+    # Re-reads the static image sizes; returns the images that changed size.
+    def refresh_images(self):
+        images = self.options.images
+        if images is None:
+            return set()
+        sizes = image_sizes(self.static_dir, self.images_state)
+        changed = {path for path in sizes.keys() | images.sizes.keys() if sizes.get(path) != images.sizes.get(path)}
+        self.options = self.options._replace(images=images._replace(sizes=sizes))
+        return changed
+
+    def rebuild_all(self):
+        logger.info("Template or image sizes changed, rebuilding all pages")
+        self.templates = TemplateIndex(self.template_path, self.content_dir)
+        # the full build saves a fresh index
+        self.site_index = None
+        self.index_dirty = False
+        self.derived_stale = False
+        build = BuildOptions(index_path=self.index_path, include_drafts=self.include_drafts, derived=self.derived)
+        generate_pages_recursive(self.content_dir, self.template_path, self.dest_dir, self.basepath, build=build, options=self.options)
+
+    def page_job(self, source, metadata=None):
+        directory = os.path.dirname(source)
+        dest_dir = os.path.join(self.dest_dir, os.path.relpath(directory, self.content_dir))
+        template = self.templates.for_directory(directory)
+        if metadata is not None and metadata["template"]:
+            try:
+                template = self.templates.named(metadata["template"])
+            except Exception as e:
+                return PageJob(source, template, os.path.normpath(dest_dir), self.basepath, options=self.options, error=f"{type(e).__name__}: {e}")
+        return PageJob(source, template, os.path.normpath(dest_dir), self.basepath, options=self.options)
+
+    # Re-renders the edited pages and updates only their site index entries.
+    # Listings, tag pages and the feed are regenerated, and the index saved,
+    # only when an edit changes what they show of a page.
+    def rebuild_pages(self, changed, removed):
+        site_index = self.load_index()
+        listed = {source: site_index.listed(source) for source in changed | removed if source.endswith(".md")}
+        unpublished = set(removed)
+        for source in sorted(changed):
+            if not source.endswith(".md"):
+                continue
+            try:
+                metadata = site_index.lookup(source)
+            except ValueError:
+                # rendering reports the error; the page is unlisted meanwhile
+                site_index.forget(source)
+                metadata = None
+            if metadata is not None and metadata["draft"] and not self.include_drafts:
+                unpublished.add(source)
+                continue
+            job = self.page_job(source, metadata)
+            os.makedirs(job.dest_dir, exist_ok=True)
+            publish_page(site_index, job, self.dest_dir)
+            error, _, title = run_page_job(job)
+            if error is not None:
+                logger.error("Failed to generate page from %s. Reason: %s", job.source, error)
+            else:
+                site_index.set_title(source, title)
+                logger.info("Rebuilt page %s", job.dest_file)
+
+        for source in sorted(unpublished):
+            if not source.endswith(".md"):
+                continue
+            if source in removed:
+                site_index.forget(source)
+            dest_file = self.page_job(source).dest_file
+            if os.path.isfile(dest_file):
+                logger.info("Removing page %s", dest_file)
+                os.remove(dest_file)
+
+        self.index_dirty = True
+        if self.derived_stale or any(site_index.listed(source) != before for source, before in listed.items()):
+            finish_site(site_index, self.templates.default, self.dest_dir, self.basepath, self.derived, options=self.options)
+            self.index_dirty = False
+            self.derived_stale = False
+
+    # The index saved by the last build, or, when there is none, one read from
+    # the headers of every page.
+    def load_index(self):
+        if self.site_index is not None:
+            return self.site_index
+        site_index = SiteIndex(self.index_path, self.content_dir).resume()
+        if not site_index.pages:
+            jobs = discover_pages(self.content_dir, self.templates, self.dest_dir, self.basepath, site_index, self.include_drafts)
+            publish_pages(site_index, jobs, self.dest_dir)
+            for job in jobs:
+                site_index.carry_over_title(job.source)
+            self.derived_stale = True
+        self.site_index = site_index
+        return site_index
+
+    def save_index(self):
+        if self.site_index is not None and self.index_dirty:
+            self.site_index.save()
+            self.index_dirty = False
+
+    def run(self, interval=0.2):
+        try:
+            while True:
+                time.sleep(interval)
+                started = time.perf_counter()
+                if self.poll():
+                    logger.info("Rebuilt in %.0f ms", (time.perf_counter() - started) * 1000)
+        finally:
+            self.save_index()